@@ -0,0 +1,218 @@
+import asyncio
+from itertools import islice
+import ssl
+import time
+from typing import Iterable, Optional
+import aiosmtplib
+import certifi
+from core.ports.driven_ports import IAsyncEmailSender, ILogger
+from core.domain.rendered_campaign import RenderedCampaign
+from core.domain.send_metrics import SendMetrics
+from config.global_env_vars import (
+    GOOGLE_SENDER_EMAIL, GOOGLE_SENDER_PASSWORD,
+    SMTP_SERVER, SMTP_PORT,
+    SMTP_MAX_MESSAGES_PER_CONNECTION,
+    SMTP_ASYNC_CONCURRENCY, SMTP_RATE_LIMIT_PER_SECOND
+)
+
+
+class _TokenBucket:
+    """
+    Async token bucket. `rate` tokens are refilled per second up to `rate`
+    (one second of burst). A rate <= 0 disables the limit.
+    """
+
+    def __init__(self, rate: float):
+        self._rate = rate
+        self._tokens = max(rate, 1.0)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self._rate <= 0:
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(max(self._rate, 1.0), self._tokens + (now - self._updated_at) * self._rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+# Providers (SMTP hosts) share one limiter even across different adapters,
+# because the quota is enforced by the provider, not per account.
+_PROVIDER_RATE_LIMITERS: dict[str, _TokenBucket] = {}
+
+def _get_provider_rate_limiter(provider: str, rate: float) -> _TokenBucket:
+    if provider not in _PROVIDER_RATE_LIMITERS:
+        _PROVIDER_RATE_LIMITERS[provider] = _TokenBucket(rate)
+    return _PROVIDER_RATE_LIMITERS[provider]
+
+
+class _Connection:
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.sent_count = 0
+
+
+class AsyncSmtpAdapter(IAsyncEmailSender):
+    """
+    asyncio-native sender. `send_many` spreads recipients over `concurrency`
+    workers, each one holding its own persistent SMTP session, while a per
+    provider token bucket keeps the send rate under the provider limits.
+    """
+
+    def __init__(self,
+                 logger: ILogger,
+                 concurrency: int = SMTP_ASYNC_CONCURRENCY,
+                 rate_limit_per_second: float = SMTP_RATE_LIMIT_PER_SECOND,
+                 max_messages_per_connection: int = SMTP_MAX_MESSAGES_PER_CONNECTION,
+                 host: str = SMTP_SERVER,
+                 port: int | str = SMTP_PORT,
+                 username: Optional[str] = GOOGLE_SENDER_EMAIL,
+                 password: Optional[str] = GOOGLE_SENDER_PASSWORD,
+                 use_starttls: bool = True,
+                 timeout: float = 30.0
+                 ):
+        self._logger = logger
+        self._concurrency = concurrency
+        self._max_messages_per_connection = max_messages_per_connection
+        self._host = host
+        self._port = int(port) if port else None
+        self._username = username
+        self._password = password
+        self._use_starttls = use_starttls
+        self._timeout = timeout
+        self.ssl_context = ssl.create_default_context()
+        self.ssl_context.load_verify_locations(cafile=certifi.where())
+
+        self._rate_limiter = _get_provider_rate_limiter(host, rate_limit_per_second)
+        # Bounds messages in flight across every concurrent campaign
+        self._in_flight_slots = asyncio.Semaphore(concurrency)
+        self._metrics = SendMetrics()
+
+    async def send(self, campaign: RenderedCampaign, to: str) -> bool:
+        return await self.send_many(campaign, [to]) == 1
+
+    async def send_many(self, campaign: RenderedCampaign, recipients: Iterable[str]) -> int:
+        # Bounded queue: the producer waits when the workers fall behind, so a
+        # lazy `recipients` iterable is never fully materialized in memory.
+        queue: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=2 * self._concurrency)
+        workers = [asyncio.create_task(self._worker(queue, campaign)) for _ in range(self._concurrency)]
+
+        try:
+            recipients = iter(recipients)
+            # A lazy `recipients` fetches its pages from the database when
+            # advanced, so it is read in a thread to keep the event loop free
+            while chunk := await asyncio.to_thread(lambda: list(islice(recipients, queue.maxsize))):
+                for to in chunk:
+                    await queue.put(to)
+            for _ in workers:
+                await queue.put(None)
+            sent_per_worker = await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            raise
+
+        sent = sum(sent_per_worker)
+        self._logger.log_info(f"Async dispatch finished: {sent} emails sent by {self._username}. Metrics: {self._metrics.to_dict()}")
+        return sent
+
+    def get_metrics(self) -> SendMetrics:
+        return self._metrics
+
+    ############################################################################
+    #### Private functions
+
+    async def _worker(self, queue: asyncio.Queue, campaign: RenderedCampaign) -> int:
+        connection: Optional[_Connection] = None
+        sent = 0
+        try:
+            while True:
+                to = await queue.get()
+                if to is None:
+                    return sent
+
+                message = campaign.for_recipient(to)
+
+                await self._rate_limiter.acquire()
+                async with self._in_flight_slots:
+                    self._metrics.in_flight += 1
+                    started_at = time.monotonic()
+                    was_sent, connection = await self._deliver(connection, message, to)
+                    self._metrics.in_flight -= 1
+                    self._metrics.record(time.monotonic() - started_at, was_sent)
+
+                if was_sent:
+                    sent += 1
+        finally:
+            if connection is not None:
+                await self._quit(connection)
+
+    async def _deliver(self,
+                       connection: Optional[_Connection],
+                       message: bytes,
+                       to: str
+                       ) -> tuple[bool, Optional[_Connection]]:
+        """
+        Sends `message` reusing `connection` when possible and returns the
+        connection that should be reused by the next send.
+        """
+
+        for attempt in range(2):
+            try:
+                if connection is None:
+                    connection = await self._open_connection()
+                await connection.client.sendmail(self._username, [to], message)
+                connection.sent_count += 1
+                if connection.sent_count >= self._max_messages_per_connection:
+                    await self._quit(connection)
+                    connection = None
+                return True, connection
+            except aiosmtplib.SMTPServerDisconnected as disconnected_error:
+                connection = None
+                if attempt == 0:
+                    continue
+                self._logger.log_error(f"SMTP server disconnected while sending from {self._username}: {disconnected_error}")
+            except aiosmtplib.SMTPAuthenticationError as auth_error:
+                connection = await self._discard(connection)
+                self._logger.log_error(f"Authentication Error for {self._username}: {auth_error}. Check App Password/Less Secure Apps.")
+            except aiosmtplib.SMTPRecipientsRefused as refused_error:
+                self._logger.log_error(f"SMTP Error during sending from {self._username} to {to}: {refused_error}")
+            except aiosmtplib.SMTPException as smtp_error:
+                connection = await self._discard(connection)
+                self._logger.log_error(f"SMTP Error during sending from {self._username} to {to}: {smtp_error}")
+            except Exception as e:
+                connection = await self._discard(connection)
+                self._logger.log_error(f"An unexpected error occurred during email sending to {to}: {e}")
+            return False, connection
+        return False, connection
+
+    async def _open_connection(self) -> _Connection:
+        client = aiosmtplib.SMTP(
+            hostname=self._host,
+            port=self._port,
+            username=self._username if self._password else None,
+            password=self._password,
+            start_tls=self._use_starttls,
+            tls_context=self.ssl_context,
+            timeout=self._timeout
+        )
+        await client.connect()
+        return _Connection(client)
+
+    async def _discard(self, connection: Optional[_Connection]) -> None:
+        if connection is not None:
+            await self._quit(connection)
+        return None
+
+    async def _quit(self, connection: _Connection) -> None:
+        try:
+            await connection.client.quit()
+        except Exception:
+            connection.client.close()
@@ -0,0 +1,49 @@
+from typing import Optional
+from core.ports.driven_ports import ICache, IChangeNotifier, ISenderBehaviorRepository
+from core.domain.sender_behavior_enum import SenderBehaviorEnum
+
+SENDER_BEHAVIOR_CHANNEL = "sender_behavior"
+_CACHE_KEY = "sender_behavior:current"
+
+
+class CachedSenderBehaviorRepository(ISenderBehaviorRepository):
+    """
+    Keeps the current sender behavior in `cache` for its TTL instead of
+    querying the database on every campaign. A change made through this
+    process is cached right away and published on `notifier` (when given),
+    so the other replicas subscribed to it drop their copy instead of
+    waiting for the TTL.
+    """
+
+    def __init__(self,
+                 sender_behavior_repository: ISenderBehaviorRepository,
+                 cache: ICache,
+                 notifier: Optional[IChangeNotifier] = None
+                 ):
+        self._sender_behavior_repository = sender_behavior_repository
+        self._cache = cache
+        self._notifier = notifier
+        if notifier is not None:
+            notifier.subscribe(SENDER_BEHAVIOR_CHANNEL, lambda _: self.invalidate())
+
+    def get_current_behavior(self) -> SenderBehaviorEnum:
+        behavior = self._cache.get(_CACHE_KEY)
+        if behavior is None:
+            behavior = self._sender_behavior_repository.get_current_behavior()
+            self._cache.set(_CACHE_KEY, behavior)
+        return behavior
+
+    def update_behavior(self, new_behavior: SenderBehaviorEnum) -> None:
+        try:
+            self._sender_behavior_repository.update_behavior(new_behavior)
+        except Exception:
+            self.invalidate() # The write may have happened before the error
+            raise
+
+        if self._notifier is not None:
+            self._notifier.publish(SENDER_BEHAVIOR_CHANNEL, new_behavior.value)
+        # After publishing, so our own notification doesn't evict the new value
+        self._cache.set(_CACHE_KEY, new_behavior)
+
+    def invalidate(self) -> None:
+        self._cache.delete(_CACHE_KEY)
@@ -0,0 +1,189 @@
+import copy
+from datetime import date
+import time
+from typing import Callable, Iterator, List, Optional
+from uuid import UUID
+from core.ports.driven_ports import ICache, IUserRepository
+from core.domain.user import User
+
+_MISSING = object()
+
+
+class CachedUserRepository(IUserRepository):
+    """
+    Read-through cache in front of another IUserRepository for the lookups
+    by id, email and CPF. "Not found" answers are cached too, for a shorter
+    `negative_ttl`, since registrations mostly look up emails/CPFs that don't
+    exist yet. Writes go to the wrapped repository first and then refresh
+    the cached entries of that user.
+
+    The total count is cached for `count_ttl` and bumped on every save made
+    through this process, so polling it doesn't count the table each time.
+
+    Cached users are copies: callers may mutate what they get (UserService
+    does on update) without touching the cache.
+    """
+
+    def __init__(self, user_repository: IUserRepository, cache: ICache, negative_ttl: float, count_ttl: float):
+        self._user_repository = user_repository
+        self._cache = cache
+        self._negative_ttl = negative_ttl
+        self._count_ttl = count_ttl
+        self._negative_hits = 0
+
+    ############################################################################
+    #### --- Cached lookups ---
+
+    def find_by_id(self, user_id: UUID) -> Optional[User]:
+        return self._read_through(_id_key(user_id), lambda: self._user_repository.find_by_id(user_id))
+
+    def find_by_email(self, email: str) -> Optional[User]:
+        load = lambda: self._user_repository.find_by_email(email)
+        return self._checked(self._read_through(_email_key(email), load), "email", email, _email_key(email), load)
+
+    def find_by_cpf(self, cpf: str) -> Optional[User]:
+        load = lambda: self._user_repository.find_by_cpf(cpf)
+        return self._checked(self._read_through(_cpf_key(cpf), load), "cpf", cpf, _cpf_key(cpf), load)
+
+    def get_total_count(self, estimated: bool = False) -> int:
+        cached = self._cache.get(_count_key(estimated))
+        if cached is not None:
+            return cached[0]
+
+        count = self._user_repository.get_total_count(estimated)
+        self._cache.set(_count_key(estimated), (count, time.monotonic() + self._count_ttl), self._count_ttl)
+        return count
+
+    def find_conflicts(self, email: Optional[str], cpf: Optional[str]) -> List[User]:
+        cached = {}
+        for key, field, value in ((_email_key(email), "email", email), (_cpf_key(cpf), "cpf", cpf)):
+            if value is None:
+                continue
+            user = self._cache.get(key, _MISSING)
+            if user is _MISSING or (user is not None and getattr(user, field) != value):
+                break
+            cached[key] = user
+        else:
+            # Answered from the cache, without any round trip
+            self._negative_hits += sum(user is None for user in cached.values())
+            return _unique_copies(user for user in cached.values() if user is not None)
+
+        conflicts = self._user_repository.find_conflicts(email, cpf)
+        for user in conflicts:
+            self._cache_user(user)
+        if email is not None and not any(user.email == email for user in conflicts):
+            self._cache.set(_email_key(email), None, self._negative_ttl)
+        if cpf is not None and not any(user.cpf == cpf for user in conflicts):
+            self._cache.set(_cpf_key(cpf), None, self._negative_ttl)
+        return conflicts
+
+    ############################################################################
+    #### --- Writes, with invalidation ---
+
+    def save(self, user: User) -> None:
+        try:
+            self._user_repository.save(user)
+        finally:
+            # Drops the "not found" entries of this email/CPF even if the save failed
+            self._cache.delete(_email_key(user.email), _cpf_key(user.cpf))
+        self._cache_user(user)
+        self._bump_total_counts()
+
+    def update(self, user: User) -> None:
+        previous = self._cache.get(_id_key(user._id))
+        try:
+            self._user_repository.update(user)
+        finally:
+            keys = [_id_key(user._id), _email_key(user.email), _cpf_key(user.cpf)]
+            if previous is not None:
+                keys += [_email_key(previous.email), _cpf_key(previous.cpf)]
+            self._cache.delete(*keys)
+        self._cache_user(user)
+
+    ############################################################################
+    #### --- Not cached ---
+
+    def find_random_users(self, limit: int, start_key: Optional[float] = None) -> List[User]:
+        return self._user_repository.find_random_users(limit, start_key)
+
+    def find_random_users_by_birthday(self, limit: int) -> List[User]:
+        return self._user_repository.find_random_users_by_birthday(limit)
+
+    def iter_users(self, page_size: int) -> Iterator[User]:
+        return self._user_repository.iter_users(page_size)
+
+    def iter_sampled_users(self, rate: float, seed: int, page_size: int) -> Iterator[User]:
+        return self._user_repository.iter_sampled_users(rate, seed, page_size)
+
+    def iter_users_by_birthday(self, day: date, page_size: int) -> Iterator[User]:
+        return self._user_repository.iter_users_by_birthday(day, page_size)
+
+    def get_cache_stats(self) -> dict[str, int]:
+        return {**self._cache.get_stats(), "negative_hits": self._negative_hits}
+
+    ############################################################################
+    #### Private functions
+
+    def _read_through(self, key: str, load: Callable[[], Optional[User]]) -> Optional[User]:
+        user = self._cache.get(key, _MISSING)
+        if user is None:
+            self._negative_hits += 1
+            return None
+        if user is not _MISSING:
+            return copy.copy(user)
+
+        user = load()
+        if user is None:
+            self._cache.set(key, None, self._negative_ttl)
+        else:
+            self._cache_user(user)
+        return user
+
+    def _checked(self,
+                 user: Optional[User],
+                 field: str,
+                 value: str,
+                 key: str,
+                 load: Callable[[], Optional[User]]
+                 ) -> Optional[User]:
+        # An entry of a user whose email/CPF changed without passing through
+        # `update` (e.g. another server process) is not trusted
+        if user is None or getattr(user, field) == value:
+            return user
+        self._cache.delete(key)
+        return self._read_through(key, load)
+
+    def _bump_total_counts(self) -> None:
+        # Keeps the original expiration: the count is still refreshed from
+        # the database every `count_ttl`, catching writes of other processes
+        for estimated in (False, True):
+            cached = self._cache.get(_count_key(estimated))
+            if cached is not None:
+                count, expires_at = cached
+                remaining_ttl = expires_at - time.monotonic()
+                if remaining_ttl > 0:
+                    self._cache.set(_count_key(estimated), (count + 1, expires_at), remaining_ttl)
+
+    def _cache_user(self, user: User) -> None:
+        if user._id is None:
+            return
+        cached = copy.copy(user)
+        for key in (_id_key(user._id), _email_key(user.email), _cpf_key(user.cpf)):
+            self._cache.set(key, cached)
+
+
+def _id_key(user_id) -> str:
+    return f"id:{user_id}"
+
+def _email_key(email: Optional[str]) -> str:
+    return f"email:{email}"
+
+def _cpf_key(cpf: Optional[str]) -> str:
+    return f"cpf:{cpf}"
+
+def _count_key(estimated: bool) -> str:
+    return "count:estimated" if estimated else "count:exact"
+
+def _unique_copies(users) -> List[User]:
+    unique = {id(user): user for user in users}
+    return [copy.copy(user) for user in unique.values()]
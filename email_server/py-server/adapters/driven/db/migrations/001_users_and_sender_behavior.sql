@@ -0,0 +1,18 @@
+-- Tables used by SupabaseRepository and PostgresRepository, for a local
+-- Postgres (psql -d <dbname> -f 001_users_and_sender_behavior.sql).
+-- Idempotent: running it against the Supabase database changes nothing.
+
+CREATE TABLE IF NOT EXISTS users (
+    _id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    created_at timestamptz NOT NULL DEFAULT now(),
+    client_full_name text NOT NULL,
+    birth_date date NOT NULL,
+    email text NOT NULL UNIQUE,
+    telephone text,
+    cpf text NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS sender_behavior (
+    _id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    strategy text
+);
@@ -0,0 +1,25 @@
+-- Random recipients without sorting the whole table (ORDER BY random()).
+-- Every user gets a uniform random key, indexed: a sample is the `limit`
+-- users following a random start point in key order, wrapping around to
+-- the lowest keys, which is an index range scan of `limit` rows.
+--
+-- Adding a column with a volatile default rewrites the table once.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS random_key double precision NOT NULL DEFAULT random();
+CREATE INDEX IF NOT EXISTS users_random_key_idx ON users (random_key);
+
+-- Called by SupabaseRepository.find_random_users, PostgresRepository runs the same query
+CREATE OR REPLACE FUNCTION get_random_users(p_limit integer)
+RETURNS SETOF users
+LANGUAGE plpgsql VOLATILE
+AS $$
+DECLARE
+    start_key double precision := random();
+BEGIN
+    RETURN QUERY
+        (SELECT * FROM users WHERE random_key >= start_key ORDER BY random_key LIMIT p_limit)
+        UNION ALL
+        (SELECT * FROM users WHERE random_key < start_key ORDER BY random_key LIMIT p_limit)
+        LIMIT p_limit;
+END;
+$$;
@@ -0,0 +1,33 @@
+-- Birthday lookups by index: a month-day key kept by Postgres itself, so
+-- "who celebrates today" no longer compares the month/day of every row.
+-- Same "MM-DD" format as core/utils/birthday.py and the MongoDB field.
+-- extract() is used instead of to_char(), which is not immutable.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS birth_mmdd text GENERATED ALWAYS AS (
+    lpad(extract(month FROM birth_date)::int::text, 2, '0') || '-' ||
+    lpad(extract(day FROM birth_date)::int::text, 2, '0')
+) STORED;
+CREATE INDEX IF NOT EXISTS users_birth_mmdd_idx ON users (birth_mmdd);
+
+-- Users born on Feb 29 celebrate on Feb 28 of non leap years
+CREATE OR REPLACE FUNCTION birthday_keys(p_day date)
+RETURNS text[]
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT CASE
+        WHEN to_char(p_day, 'MM-DD') = '02-28' AND to_char(p_day + 1, 'MM-DD') = '03-01'
+            THEN ARRAY['02-28', '02-29']
+        ELSE ARRAY[to_char(p_day, 'MM-DD')]
+    END;
+$$;
+
+-- Called by SupabaseRepository.find_random_users_by_birthday
+CREATE OR REPLACE FUNCTION get_users_by_birthday(p_limit integer)
+RETURNS SETOF users
+LANGUAGE sql VOLATILE
+AS $$
+    SELECT * FROM users
+    WHERE birth_mmdd = ANY(birthday_keys(current_date))
+    ORDER BY random() -- only sorts today's celebrants, ~1/365 of the table
+    LIMIT p_limit;
+$$;
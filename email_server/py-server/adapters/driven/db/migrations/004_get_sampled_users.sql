@@ -0,0 +1,16 @@
+-- Chance based campaigns to every user: each user is kept with probability
+-- p_rate, decided by a hash of its id and the campaign seed. Only the kept
+-- users leave the database, and the same seed keeps the same users.
+-- Pages follow the primary key (keyset pagination, p_after = last _id of
+-- the previous page, NULL for the first one).
+
+CREATE OR REPLACE FUNCTION get_sampled_users(p_rate double precision, p_seed bigint, p_after uuid, p_limit integer)
+RETURNS SETOF users
+LANGUAGE sql STABLE
+AS $$
+    SELECT * FROM users
+    WHERE (p_after IS NULL OR _id > p_after)
+      AND (hashtextextended(_id::text, p_seed) & 1048575) < p_rate * 1048576
+    ORDER BY _id
+    LIMIT p_limit;
+$$;
@@ -0,0 +1,36 @@
+-- Sending accounts used by SenderRouter (one SenderBehavior record each,
+-- not to be confused with the single line `sender_behavior` strategy table)
+-- and how many emails each one sent per day.
+--
+-- config holds the SMTP account: {"host": ..., "port": 587, "username": ...,
+-- "password": ..., "use_starttls": true, "pool_size": 4, "from_email": ...}
+-- from_email is the envelope sender and From header of the account (the
+-- username when missing). Required when the username is not an address,
+-- e.g. "apikey" on SendGrid or an IAM key id on SES.
+
+CREATE TABLE IF NOT EXISTS sender_behaviors (
+    _id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    name text NOT NULL UNIQUE,
+    provider text NOT NULL,
+    max_daily_limit integer, -- NULL: no daily limit
+    priority integer NOT NULL DEFAULT 100, -- lower is preferred
+    config jsonb NOT NULL DEFAULT '{}',
+    is_active boolean NOT NULL DEFAULT true
+);
+
+CREATE TABLE IF NOT EXISTS sender_daily_counts (
+    day date NOT NULL,
+    sender_name text NOT NULL,
+    sent integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, sender_name)
+);
+
+-- Called by SupabaseRepository.add_sent_counts, p_counts = {"sender name": sent, ...}
+CREATE OR REPLACE FUNCTION add_sender_counts(p_day date, p_counts jsonb)
+RETURNS void
+LANGUAGE sql VOLATILE
+AS $$
+    INSERT INTO sender_daily_counts (day, sender_name, sent)
+    SELECT p_day, key, value::integer FROM jsonb_each_text(p_counts)
+    ON CONFLICT (day, sender_name) DO UPDATE SET sent = sender_daily_counts.sent + excluded.sent;
+$$;
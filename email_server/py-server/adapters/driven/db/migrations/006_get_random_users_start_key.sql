@@ -0,0 +1,24 @@
+-- Seeded campaigns: the caller may pass the start point of the random_key
+-- range scan (migrations/002_users_random_key.sql), so the same seed picks
+-- the same users again while the table does not change. NULL draws it here.
+--
+-- The one argument version is dropped, a call with only p_limit would be
+-- ambiguous between both.
+
+DROP FUNCTION IF EXISTS get_random_users(integer);
+
+-- Called by SupabaseRepository.find_random_users, PostgresRepository runs the same query
+CREATE OR REPLACE FUNCTION get_random_users(p_limit integer, p_start_key double precision DEFAULT NULL)
+RETURNS SETOF users
+LANGUAGE plpgsql VOLATILE
+AS $$
+DECLARE
+    start_key double precision := coalesce(p_start_key, random());
+BEGIN
+    RETURN QUERY
+        (SELECT * FROM users WHERE random_key >= start_key ORDER BY random_key LIMIT p_limit)
+        UNION ALL
+        (SELECT * FROM users WHERE random_key < start_key ORDER BY random_key LIMIT p_limit)
+        LIMIT p_limit;
+END;
+$$;
@@ -1,52 +1,215 @@
 # py-server/adapters/driven/db/mongodb_repository.py
-from core.ports.driven_ports import ISenderBehaviorRepository, IUserRepository # ATUALIZADO
-from core.domain.email import Email
-from core.domain.user import User # NOVO
-from pymongo import MongoClient
-from typing import List, Optional
+from datetime import date
+from core.ports.driven_ports import ISenderAccountRepository, ISenderBehaviorRepository, IUserRepository
+from core.domain.user import User
+from core.domain.sender_behavior import SenderBehavior
+from core.domain.sender_behavior_enum import SenderBehaviorEnum
+from core.utils.birthday import birth_mmdd, birthday_keys
+from pymongo import ASCENDING, MongoClient, ReadPreference
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from typing import Any, Iterator, List, Optional
+from uuid import UUID
 from bson.objectid import ObjectId # Para converter IDs de/para MongoDB
 
-class MongoDbRepository(ISenderBehaviorRepository, IUserRepository):
-    def __init__(self, connection_string: str, db_name: str):
-        self._client = MongoClient(connection_string)
+BIRTH_MMDD_FIELD = "birth_mmdd" # "MM-DD" of birth_date, indexed for the birthday campaigns
+
+
+class MongoDbRepository(ISenderAccountRepository, ISenderBehaviorRepository, IUserRepository):
+    """
+    MongoDB implementation of the user and sender behavior ports. Uses the
+    synchronous pymongo driver like the ports it implements; the HTTP layer
+    already runs these calls in a thread pool, and MongoClient is thread safe
+    with its own connection pool (`max_pool_size` connections at most).
+    """
+
+    def __init__(self,
+                 connection_string: str,
+                 db_name: str,
+                 max_pool_size: int = 100,
+                 min_pool_size: int = 0,
+                 connect_timeout_ms: int = 5000,
+                 server_selection_timeout_ms: int = 5000,
+                 socket_timeout_ms: Optional[int] = None,
+                 read_preference: str = "primary"
+                 ):
+        self._client = MongoClient(
+            connection_string,
+            maxPoolSize=max_pool_size,
+            minPoolSize=min_pool_size,
+            connectTimeoutMS=connect_timeout_ms,
+            serverSelectionTimeoutMS=server_selection_timeout_ms,
+            socketTimeoutMS=socket_timeout_ms,
+        )
         self._db = self._client[db_name]
-        self._emails_collection = self._db['emails']
-        self._users_collection = self._db['users'] # NOVA COLEÇÃO para usuários
-
-    # Métodos de IEmailRepository (como antes)
-    def save(self, email: Email) -> None:
-        email_dict = email.to_dict()
-        self._emails_collection.insert_one(email_dict)
-    # ... find_by_id, find_all para Email
-
-    # Métodos de IUserRepository (NOVOS)
-    def save(self, user: User) -> None: # Sobrescreve save? Cuidado! Mude o nome ou separe.
-                                         # Melhor: renomeie para save_email e save_user
-                                         # Ou: crie classes separadas
-        user_dict = user.to_dict()
-        result = self._users_collection.insert_one(user_dict)
+        self._users_collection = self._db['users']
+        # Reads that tolerate replication lag (random picks, counts) may go to secondaries
+        self._users_reads_collection = self._users_collection.with_options(
+            read_preference=_to_read_preference(read_preference)
+        )
+        self._sender_behavior_collection = self._db['sender_behavior']
+        self._sender_accounts_collection = self._db['sender_behaviors'] # One SenderBehavior per sending account
+        self._sender_counts_collection = self._db['sender_daily_counts'] # {_id: "YYYY-MM-DD", counts: {name: sent}}
+        self._ensure_indexes()
+
+    ############################################################################
+    #### --- Métodos de IUserRepository ---
+
+    def save(self, user: User) -> None:
+        user_dict = _to_document(user)
+        try:
+            result = self._users_collection.insert_one(user_dict)
+        except DuplicateKeyError as e:
+            raise ValueError("User with this email or CPF already exists.") from e
         user._id = str(result.inserted_id) # Atribui o ID gerado pelo MongoDB
 
     def update(self, user: User) -> None:
-        if not user._id: 
+        if not user._id:
             raise ValueError("User must have an ID to be updated.")
 
-        user_dict = user.to_dict()
-        if '_id' in user_dict: 
+        user_dict = _to_document(user)
+        if '_id' in user_dict:
             del user_dict['_id']
 
-        self._users_collection.update_one(
-            {"_id": ObjectId(user._id)},
-            {"$set": user_dict}
-        )
+        try:
+            self._users_collection.update_one(
+                {"_id": ObjectId(str(user._id))},
+                {"$set": user_dict}
+            )
+        except DuplicateKeyError as e:
+            raise ValueError("User with this email or CPF already exists.") from e
 
-    def find_by_id(self, user_id: str) -> Optional[User]:
-        data = self._users_collection.find_one({"_id": ObjectId(user_id)})
+    def find_by_id(self, user_id: UUID | str) -> Optional[User]:
+        if not ObjectId.is_valid(str(user_id)): # e.g. an UUID from a Supabase era link
+            return None
+        data = self._users_collection.find_one({"_id": ObjectId(str(user_id))})
         return User.from_dict(data) if data else None
 
     def find_by_email(self, email: str) -> Optional[User]:
         data = self._users_collection.find_one({"email": email})
         return User.from_dict(data) if data else None
 
+    def find_by_cpf(self, cpf: str) -> Optional[User]:
+        data = self._users_collection.find_one({"cpf": cpf})
+        return User.from_dict(data) if data else None
+
+    def find_conflicts(self, email: Optional[str], cpf: Optional[str]) -> List[User]:
+        filters = [{field: value} for field, value in (("email", email), ("cpf", cpf)) if value is not None]
+        if not filters:
+            return []
+        # No limit: with the plain index fallback of _ensure_indexes several users
+        # can share an email, and a limit could hide the one holding the CPF
+        return [User.from_dict(d) for d in self._users_collection.find({"$or": filters})]
+
+    def get_total_count(self, estimated: bool = False) -> int:
+        if estimated:
+            return self._users_reads_collection.estimated_document_count() # Collection metadata, no scan
+        return self._users_reads_collection.count_documents({})
+
+    def find_random_users(self, limit: int, start_key: Optional[float] = None) -> List[User]:
+        # $sample as the first stage picks random documents without sorting the collection.
+        # It can't be seeded, so `start_key` is ignored and every call draws new users
+        cursor = self._users_reads_collection.aggregate([{"$sample": {"size": limit}}])
+        return [User.from_dict(d) for d in cursor]
+
+    def find_random_users_by_birthday(self, limit: int) -> List[User]:
+        today = date.today()
+        cursor = self._users_reads_collection.aggregate([
+            {"$match": {BIRTH_MMDD_FIELD: {"$in": birthday_keys(today)}}}, # Index lookup
+            {"$sample": {"size": limit}},
+        ])
+        return [User.from_dict(d) for d in cursor]
+
     def find_all(self) -> List[User]:
         return [User.from_dict(d) for d in self._users_collection.find()]
+
+    def iter_users(self, page_size: int) -> Iterator[User]:
+        # The server cursor hands documents over `page_size` at a time
+        cursor = self._users_collection.find().sort("_id", 1).batch_size(page_size)
+        try:
+            for d in cursor:
+                yield User.from_dict(d)
+        finally:
+            cursor.close()
+
+    def iter_sampled_users(self, rate: float, seed: int, page_size: int) -> Iterator[User]:
+        # $rand draws on the server, so only the kept users are sent. It takes
+        # no seed: on MongoDB the same seed does not repeat the selection.
+        cursor = self._users_collection.find({"$expr": {"$lt": [{"$rand": {}}, rate]}}).batch_size(page_size)
+        try:
+            for d in cursor:
+                yield User.from_dict(d)
+        finally:
+            cursor.close()
+
+    def iter_users_by_birthday(self, day: date, page_size: int) -> Iterator[User]:
+        cursor = self._users_collection.find({BIRTH_MMDD_FIELD: {"$in": birthday_keys(day)}}).batch_size(page_size)
+        try:
+            for d in cursor:
+                yield User.from_dict(d)
+        finally:
+            cursor.close()
+
+    ############################################################################
+    #### --- Métodos de ISenderBehaviorRepository ---
+
+    def get_current_behavior(self) -> SenderBehaviorEnum:
+        data = self._sender_behavior_collection.find_one({}, {"strategy": 1})
+        if data and data.get("strategy"):
+            return SenderBehaviorEnum(data["strategy"])
+        return SenderBehaviorEnum.NOT_DEFINED
+
+    def update_behavior(self, new_behavior: SenderBehaviorEnum) -> None:
+        # Single document collection: updates the first one or creates it
+        self._sender_behavior_collection.update_one(
+            {},
+            {"$set": {"strategy": new_behavior.value}},
+            upsert=True
+        )
+
+    ############################################################################
+    #### --- Métodos de ISenderAccountRepository ---
+
+    def find_active_senders(self) -> List[SenderBehavior]:
+        cursor = self._sender_accounts_collection.find({"is_active": {"$ne": False}}).sort([("priority", ASCENDING), ("name", ASCENDING)])
+        return [SenderBehavior.from_dict(d) for d in cursor]
+
+    def get_sent_counts(self, day: date) -> dict[str, int]:
+        data = self._sender_counts_collection.find_one({"_id": day.isoformat()})
+        return dict(data.get("counts", {})) if data else {}
+
+    def add_sent_counts(self, day: date, counts: dict[str, int]) -> None:
+        # $inc is atomic, every process adds its own sends (sender names must not contain dots)
+        self._sender_counts_collection.update_one(
+            {"_id": day.isoformat()},
+            {"$inc": {f"counts.{name}": sent for name, sent in counts.items()}},
+            upsert=True
+        )
+
+    ############################################################################
+    #### Private functions
+
+    def _ensure_indexes(self) -> None:
+        # Users saved before birth_mmdd existed (birth_date is an ISO "YYYY-MM-DD" string)
+        self._users_collection.update_many(
+            {BIRTH_MMDD_FIELD: {"$exists": False}, "birth_date": {"$type": "string"}},
+            [{"$set": {BIRTH_MMDD_FIELD: {"$substrCP": ["$birth_date", 5, 5]}}}]
+        )
+        self._users_collection.create_index([(BIRTH_MMDD_FIELD, ASCENDING)])
+        for field in ("email", "cpf"):
+            try:
+                self._users_collection.create_index([(field, ASCENDING)], unique=True)
+            except OperationFailure as e:
+                # Existing duplicates: still index the lookups, uniqueness then relies on find_conflicts
+                print(f"Warning: could not create a unique index on users.{field} ({e}), creating a plain one.")
+                self._users_collection.create_index([(field, ASCENDING)])
+
+
+def _to_document(user: User) -> dict[str, Any]:
+    user_dict = user.to_dict()
+    user_dict[BIRTH_MMDD_FIELD] = birth_mmdd(user.birth_date)
+    return user_dict
+
+def _to_read_preference(name: str) -> ReadPreference:
+    # "primary", "primaryPreferred", "secondary", "secondaryPreferred" or "nearest"
+    snake_case = "".join(f"_{c}" if c.isupper() else c for c in name).upper()
+    return getattr(ReadPreference, snake_case)
@@ -0,0 +1,266 @@
+import random
+from datetime import date
+from typing import Iterator, List, Optional
+from uuid import UUID
+from core.ports.driven_ports import ISenderAccountRepository, ISenderBehaviorRepository, IUserRepository
+from core.domain.user import User
+from core.domain.sender_behavior import SenderBehavior
+from core.domain.sender_behavior_enum import SenderBehaviorEnum
+from core.utils.birthday import birthday_keys
+from psycopg import errors
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
+from psycopg_pool import ConnectionPool
+
+_USER_COLUMNS = "_id, created_at, client_full_name, birth_date, email, telephone, cpf"
+# Per user coin flip of iter_sampled_users: 20 bits of a seeded hash of the id, same as migrations/004_get_sampled_users.sql
+_SAMPLED_USER = "(hashtextextended(_id::text, %(seed)s) & 1048575) < %(rate)s * 1048576"
+
+
+class PostgresRepository(ISenderAccountRepository, ISenderBehaviorRepository, IUserRepository):
+    """
+    Talks to the Supabase Postgres directly, instead of going through the
+    PostgREST API over HTTPS: every call borrows a connection from a pool and
+    runs a single statement, prepared server side after `prepare_threshold`
+    executions on that connection (None disables it, needed behind the
+    transaction mode pooler on port 6543).
+
+    Synchronous like the ports it implements, the HTTP layer already runs
+    these calls in a thread pool. Threads wait up to `pool_timeout` seconds
+    for a free connection.
+    """
+
+    def __init__(self,
+                 host: str,
+                 port: str | int,
+                 user: str,
+                 password: str,
+                 dbname: str,
+                 pool_min_size: int = 1,
+                 pool_max_size: int = 20,
+                 pool_timeout: float = 5.0,
+                 prepare_threshold: Optional[int] = 0
+                 ):
+        self._pool = ConnectionPool(
+            make_conninfo(host=host, port=port, user=user, password=password, dbname=dbname),
+            min_size=pool_min_size,
+            max_size=pool_max_size,
+            timeout=pool_timeout,
+            kwargs={"row_factory": dict_row, "prepare_threshold": prepare_threshold, "autocommit": True},
+            open=True,
+            name="users-db"
+        )
+
+    def close(self) -> None:
+        self._pool.close()
+
+    ############################################################################
+    #### --- Métodos de IUserRepository ---
+
+    def save(self, user: User) -> None:
+        # created_at and _id come from the table defaults, like in SupabaseRepository
+        try:
+            with self._pool.connection() as connection:
+                row = connection.execute(
+                    """
+                    INSERT INTO users (client_full_name, birth_date, email, telephone, cpf)
+                    VALUES (%s, %s, %s, %s, %s)
+                    RETURNING _id
+                    """,
+                    (user.client_full_name, user.birth_date, user.email, user.telephone, user.cpf)
+                ).fetchone()
+        except errors.UniqueViolation as e:
+            raise ValueError("User with this email or CPF already exists.") from e
+        user._id = str(row["_id"])
+
+    def update(self, user: User) -> None:
+        if not user._id:
+            raise ValueError("User must have an ID to be updated.")
+
+        try:
+            with self._pool.connection() as connection:
+                cursor = connection.execute(
+                    """
+                    UPDATE users
+                    SET client_full_name = %s, birth_date = %s, email = %s, telephone = %s, cpf = %s
+                    WHERE _id = %s
+                    """,
+                    (user.client_full_name, user.birth_date, user.email, user.telephone, user.cpf, _to_uuid(user._id))
+                )
+        except errors.UniqueViolation as e:
+            raise ValueError("User with this email or CPF already exists.") from e
+        if cursor.rowcount == 0:
+            print(f"Warning: Postgres update for user {user._id} did not affect any rows.")
+
+    def find_by_id(self, user_id: UUID | str) -> Optional[User]:
+        user_uuid = _to_uuid(user_id)
+        if user_uuid is None: # e.g. a MongoDB ObjectId, which would fail the uuid cast
+            return None
+        return self._fetch_one(f"SELECT {_USER_COLUMNS} FROM users WHERE _id = %s", (user_uuid,))
+
+    def find_by_email(self, email: str) -> Optional[User]:
+        return self._fetch_one(f"SELECT {_USER_COLUMNS} FROM users WHERE email = %s LIMIT 1", (email,))
+
+    def find_by_cpf(self, cpf: str) -> Optional[User]:
+        return self._fetch_one(f"SELECT {_USER_COLUMNS} FROM users WHERE cpf = %s LIMIT 1", (cpf,))
+
+    def find_conflicts(self, email: Optional[str], cpf: Optional[str]) -> List[User]:
+        if email is None and cpf is None:
+            return []
+        # A None parameter compares as NULL and matches nothing, so one prepared statement serves every case.
+        # No LIMIT, a duplicated email (no unique constraint) must not hide the CPF holder
+        return self._fetch_all(
+            f"SELECT {_USER_COLUMNS} FROM users WHERE email = %s OR cpf = %s",
+            (email, cpf)
+        )
+
+    def get_total_count(self, estimated: bool = False) -> int:
+        with self._pool.connection() as connection:
+            if estimated:
+                # Planner statistics, same source as PostgREST's count=estimated
+                row = connection.execute(
+                    "SELECT reltuples::bigint AS count FROM pg_class WHERE oid = 'users'::regclass"
+                ).fetchone()
+                if row["count"] >= 0: # -1 until the table is first vacuumed/analyzed
+                    return row["count"]
+            return connection.execute("SELECT count(*) AS count FROM users").fetchone()["count"]
+
+    def find_random_users(self, limit: int, start_key: Optional[float] = None) -> List[User]:
+        # Index range scan from a random point of the indexed random_key,
+        # wrapping around to the start (migrations/002_users_random_key.sql)
+        start_key = random.random() if start_key is None else start_key
+        return self._fetch_all(
+            f"""
+            (SELECT {_USER_COLUMNS} FROM users WHERE random_key >= %(start_key)s ORDER BY random_key LIMIT %(limit)s)
+            UNION ALL
+            (SELECT {_USER_COLUMNS} FROM users WHERE random_key < %(start_key)s ORDER BY random_key LIMIT %(limit)s)
+            LIMIT %(limit)s
+            """,
+            {"start_key": start_key, "limit": limit}
+        )
+
+    def find_random_users_by_birthday(self, limit: int) -> List[User]:
+        return self._fetch_all(
+            f"""
+            SELECT {_USER_COLUMNS} FROM users
+            WHERE birth_mmdd = ANY(%s)
+            ORDER BY random()
+            LIMIT %s
+            """,
+            (birthday_keys(date.today()), limit) # Index lookup on the generated column (migrations/003_users_birth_mmdd.sql)
+        )
+
+    def find_all(self) -> List[User]:
+        return self._fetch_all(f"SELECT {_USER_COLUMNS} FROM users", ())
+
+    def iter_users(self, page_size: int) -> Iterator[User]:
+        # Keyset pagination on the primary key, one pooled connection per page:
+        # a slow campaign never holds a connection between pages
+        page = self._fetch_all(f"SELECT {_USER_COLUMNS} FROM users ORDER BY _id LIMIT %s", (page_size,))
+        while page:
+            yield from page
+            if len(page) < page_size:
+                return
+            page = self._fetch_all(
+                f"SELECT {_USER_COLUMNS} FROM users WHERE _id > %s ORDER BY _id LIMIT %s",
+                (_to_uuid(page[-1]._id), page_size)
+            )
+
+    def iter_sampled_users(self, rate: float, seed: int, page_size: int) -> Iterator[User]:
+        # Walks the primary key index and hashes every id, but only the kept users are sent
+        params = {"rate": rate, "seed": seed, "limit": page_size}
+        page = self._fetch_all(
+            f"SELECT {_USER_COLUMNS} FROM users WHERE {_SAMPLED_USER} ORDER BY _id LIMIT %(limit)s",
+            params
+        )
+        while page:
+            yield from page
+            if len(page) < page_size:
+                return
+            page = self._fetch_all(
+                f"SELECT {_USER_COLUMNS} FROM users WHERE _id > %(after)s AND {_SAMPLED_USER} ORDER BY _id LIMIT %(limit)s",
+                {**params, "after": _to_uuid(page[-1]._id)}
+            )
+
+    def iter_users_by_birthday(self, day: date, page_size: int) -> Iterator[User]:
+        keys = birthday_keys(day)
+        page = self._fetch_all(
+            f"SELECT {_USER_COLUMNS} FROM users WHERE birth_mmdd = ANY(%s) ORDER BY _id LIMIT %s",
+            (keys, page_size)
+        )
+        while page:
+            yield from page
+            if len(page) < page_size:
+                return
+            page = self._fetch_all(
+                f"SELECT {_USER_COLUMNS} FROM users WHERE birth_mmdd = ANY(%s) AND _id > %s ORDER BY _id LIMIT %s",
+                (keys, _to_uuid(page[-1]._id), page_size)
+            )
+
+    ############################################################################
+    #### --- Métodos de ISenderBehaviorRepository ---
+
+    def get_current_behavior(self) -> SenderBehaviorEnum:
+        with self._pool.connection() as connection:
+            row = connection.execute("SELECT strategy FROM sender_behavior ORDER BY _id LIMIT 1").fetchone()
+        if row and row["strategy"]:
+            return SenderBehaviorEnum(row["strategy"])
+        return SenderBehaviorEnum.NOT_DEFINED
+
+    def update_behavior(self, new_behavior: SenderBehaviorEnum) -> None:
+        # Updates the first line or creates it, in one transaction
+        with self._pool.connection() as connection, connection.transaction():
+            cursor = connection.execute(
+                """
+                UPDATE sender_behavior SET strategy = %s
+                WHERE _id = (SELECT _id FROM sender_behavior ORDER BY _id LIMIT 1)
+                """,
+                (new_behavior.value,)
+            )
+            if cursor.rowcount == 0:
+                connection.execute("INSERT INTO sender_behavior (strategy) VALUES (%s)", (new_behavior.value,))
+
+    ############################################################################
+    #### --- Métodos de ISenderAccountRepository ---
+
+    def find_active_senders(self) -> List[SenderBehavior]:
+        with self._pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT * FROM sender_behaviors WHERE is_active ORDER BY priority, name"
+            ).fetchall()
+        return [SenderBehavior.from_dict(row) for row in rows]
+
+    def get_sent_counts(self, day: date) -> dict[str, int]:
+        with self._pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT sender_name, sent FROM sender_daily_counts WHERE day = %s", (day,)
+            ).fetchall()
+        return {row["sender_name"]: row["sent"] for row in rows}
+
+    def add_sent_counts(self, day: date, counts: dict[str, int]) -> None:
+        # Same statement as the add_sender_counts function (migrations/005_sender_accounts.sql)
+        with self._pool.connection() as connection:
+            connection.execute("SELECT add_sender_counts(%s, %s)", (day, Jsonb(counts)))
+
+    ############################################################################
+    #### Private functions
+
+    def _fetch_one(self, query: str, params: tuple | dict) -> Optional[User]:
+        with self._pool.connection() as connection:
+            row = connection.execute(query, params).fetchone()
+        return User.from_dict(row) if row else None
+
+    def _fetch_all(self, query: str, params: tuple | dict) -> List[User]:
+        with self._pool.connection() as connection:
+            rows = connection.execute(query, params).fetchall()
+        return [User.from_dict(row) for row in rows]
+
+
+def _to_uuid(user_id: UUID | str) -> Optional[UUID]:
+    if isinstance(user_id, UUID):
+        return user_id
+    try:
+        return UUID(str(user_id))
+    except ValueError:
+        return None
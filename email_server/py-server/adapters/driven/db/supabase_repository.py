@@ -1,14 +1,19 @@
-from typing import Optional
+from datetime import date
+from typing import Any, Callable, Iterator, Optional
 from uuid import UUID
-from core.ports.driven_ports import ISenderBehaviorRepository, IUserRepository
+from core.ports.driven_ports import ISenderAccountRepository, ISenderBehaviorRepository, IUserRepository
 from core.domain.email import Email
 from core.domain.user import User
 from core.domain.sender_behavior_enum import SenderBehaviorEnum
 from core.domain.sender_behavior import SenderBehavior
+from core.utils.birthday import birthday_keys
 from supabase import create_client, Client
+from postgrest.exceptions import APIError
 
+UNIQUE_VIOLATION = "23505" # Postgres error code
 
-class SupabaseRepository(ISenderBehaviorRepository, IUserRepository):
+
+class SupabaseRepository(ISenderAccountRepository, ISenderBehaviorRepository, IUserRepository):
     def __init__(self, url: str, key: str):
        
         # https://supabase.com/docs/reference/python/initializing
@@ -33,7 +38,11 @@ class SupabaseRepository(ISenderBehaviorRepository, IUserRepository):
         if 'created_at' in user_dict:
             del user_dict['created_at']
             
-        response = self._users_table.insert(user_dict).execute()
+        try:
+            response = self._users_table.insert(user_dict).execute()
+        except APIError as e:
+            _raise_if_unique_violation(e)
+            raise
         if response.data and len(response.data) > 0:
             user._id = str(response.data[0]['_id'])
         else:
@@ -48,7 +57,11 @@ class SupabaseRepository(ISenderBehaviorRepository, IUserRepository):
         if 'created_at' in update_data: 
             del update_data['created_at']
 
-        response = self._users_table.update(update_data).eq("_id", user._id).execute()
+        try:
+            response = self._users_table.update(update_data).eq("_id", user._id).execute()
+        except APIError as e:
+            _raise_if_unique_violation(e)
+            raise
         if response.data is None or len(response.data) == 0:
             print(f"Warning: Supabase update for user {user._id} might not have affected any rows.")
 
@@ -70,34 +83,78 @@ class SupabaseRepository(ISenderBehaviorRepository, IUserRepository):
             return None
         return User.from_dict(response.data[0])
 
+    def find_conflicts(self, email: Optional[str], cpf: Optional[str]) -> list[User]:
+        filters = []
+        if email is not None:
+            filters.append(f"email.eq.{_quote_filter_value(email)}")
+        if cpf is not None:
+            filters.append(f"cpf.eq.{_quote_filter_value(cpf)}")
+        if not filters:
+            return []
+
+        # Not limited to one user per field: without the unique constraints several
+        # users can share an email, and a limit could hide the one holding the CPF
+        response = self._users_table.select("*").or_(",".join(filters)).execute()
+        if not response.data:
+            return []
+        return [User.from_dict(d) for d in response.data]
+
     def find_all(self) -> list[User]:
         response = self._users_table.select("*").execute()
         if not response.data:
             return []
         return [User.from_dict(d) for d in response.data]
 
-    def get_total_count(self) -> int:
-        response = self._users_table.select("_id", count="exact").limit(0).execute()
+    def iter_users(self, page_size: int) -> Iterator[User]:
+        return self._iter_pages(lambda: self._users_table.select("*"), page_size)
+
+    def iter_sampled_users(self, rate: float, seed: int, page_size: int) -> Iterator[User]:
+        # Sampled by the database, see migrations/004_get_sampled_users.sql
+        last_id = None
+        while True:
+            response = self._supabase.rpc(
+                'get_sampled_users',
+                {'p_rate': rate, 'p_seed': seed, 'p_after': last_id, 'p_limit': page_size}
+            ).execute()
+            if not response.data:
+                return
+
+            for d in response.data:
+                yield User.from_dict(d)
+
+            if len(response.data) < page_size:
+                return
+            last_id = response.data[-1]['_id']
+
+    def iter_users_by_birthday(self, day: date, page_size: int) -> Iterator[User]:
+        # birth_mmdd is an indexed generated column, see migrations/003_users_birth_mmdd.sql
+        keys = birthday_keys(day)
+        return self._iter_pages(lambda: self._users_table.select("*").in_("birth_mmdd", keys), page_size)
+
+    def get_total_count(self, estimated: bool = False) -> int:
+        # "estimated" uses the planner statistics (pg_class.reltuples) on big tables instead of a full scan
+        response = self._users_table.select("_id", count="estimated" if estimated else "exact").limit(0).execute()
         if response.count is None:
             return 0
         return response.count 
 
-    def find_random_users(self, limit: int) -> list[User]:
+    def find_random_users(self, limit: int, start_key: Optional[float] = None) -> list[User]:
+        # Samples through the indexed random_key, see migrations/002_users_random_key.sql
+        # and 006_get_random_users_start_key.sql (p_start_key NULL draws one in the database)
         response = self._supabase.rpc(
             'get_random_users', 
-            {'p_limit': limit}
+            {'p_limit': limit, 'p_start_key': start_key}
         ).execute()
-        # response = self._users_table.select("*").order("random()").limit(limit).execute()
         if not response.data:
             return []
         return [User.from_dict(d) for d in response.data]
     
     def find_random_users_by_birthday(self, limit: int) -> list[User]:
+        # Index lookup on birth_mmdd, see migrations/003_users_birth_mmdd.sql
         response = self._supabase.rpc(
             'get_users_by_birthday', 
             {'p_limit': limit}
         ).execute()
-        # response = self._users_table.select("*").eq("birth_date", "current_date").order("random()").limit(limit).execute()
         if not response.data:
             return []
         return [User.from_dict(d) for d in response.data]
@@ -134,3 +191,54 @@ class SupabaseRepository(ISenderBehaviorRepository, IUserRepository):
             .update({"strategy": new_behavior.value}) \
             .eq("_id", response.data[0]['_id']) \
             .execute()
+
+    ############################################################################
+    #### --- Métodos de ISenderAccountRepository ---
+    # Tables and function from migrations/005_sender_accounts.sql
+
+    def find_active_senders(self) -> list[SenderBehavior]:
+        response = self._supabase.table('sender_behaviors').select("*").eq("is_active", True).order("priority").execute()
+        return [SenderBehavior.from_dict(d) for d in response.data or []]
+
+    def get_sent_counts(self, day: date) -> dict[str, int]:
+        response = self._supabase.table('sender_daily_counts').select("sender_name, sent").eq("day", day.isoformat()).execute()
+        return {d['sender_name']: d['sent'] for d in response.data or []}
+
+    def add_sent_counts(self, day: date, counts: dict[str, int]) -> None:
+        self._supabase.rpc('add_sender_counts', {'p_day': day.isoformat(), 'p_counts': counts}).execute()
+
+    ############################################################################
+    #### Private functions
+
+    def _iter_pages(self, new_query: Callable[[], Any], page_size: int) -> Iterator[User]:
+        # Keyset pagination: each page is an index range scan on the primary
+        # key, unlike offset pagination which rescans all previous rows.
+        last_id = None
+        while True:
+            query = new_query().order("_id") # Builders are mutable, one per page
+            if last_id is not None:
+                query = query.gt("_id", last_id)
+            response = query.limit(page_size).execute()
+            if not response.data:
+                return
+
+            for d in response.data:
+                yield User.from_dict(d)
+
+            if len(response.data) < page_size:
+                return
+            last_id = response.data[-1]['_id']
+
+
+################################################################################
+#### Private functions
+
+def _quote_filter_value(value: str) -> str:
+    # PostgREST or=(...) values containing , . : ( ) must be double quoted
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+def _raise_if_unique_violation(error: APIError) -> None:
+    # Raced with another registration: the unique constraint has the last word
+    if error.code == UNIQUE_VIOLATION:
+        raise ValueError("User with this email or CPF already exists.") from error
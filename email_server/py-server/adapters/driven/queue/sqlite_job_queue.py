@@ -0,0 +1,138 @@
+from contextlib import contextmanager
+from itertools import islice
+import sqlite3
+import time
+from typing import Iterable, Iterator, Optional
+from core.ports.driven_ports import IEmailJobQueue
+from core.domain.email_job import EmailJob
+from core.domain.rendered_campaign import RenderedCampaign
+
+PENDING = "pending"
+RESERVED = "reserved"
+DONE = "done"
+DEAD = "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    _id TEXT PRIMARY KEY,
+    message BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS email_jobs (
+    _id INTEGER PRIMARY KEY AUTOINCREMENT,
+    campaign_id TEXT NOT NULL REFERENCES campaigns(_id),
+    recipient TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS email_jobs_due_idx ON email_jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS email_jobs_campaign_idx ON email_jobs (campaign_id, status);
+"""
+
+
+class SqliteJobQueue(IEmailJobQueue):
+    """
+    Persistent email job queue on a local SQLite file. Safe to share between
+    the HTTP server and any number of worker processes on the same host.
+    """
+
+    def __init__(self, path: str, enqueue_batch_size: int = 1000):
+        self._path = path
+        self._enqueue_batch_size = enqueue_batch_size
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def enqueue_campaign(self, campaign: RenderedCampaign, recipients: Iterable[str]) -> int:
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO campaigns (_id, message, created_at) VALUES (?, ?, ?)",
+                (campaign.campaign_id, campaign.message, time.time())
+            )
+
+        # One short transaction per batch: the write lock is never held while
+        # `recipients` fetches its next page, and workers start on the first jobs
+        recipients = iter(recipients)
+        jobs_count = 0
+        while batch := list(islice(recipients, self._enqueue_batch_size)):
+            now = time.time()
+            with self._connect() as connection:
+                connection.executemany(
+                    "INSERT INTO email_jobs (campaign_id, recipient, available_at) VALUES (?, ?, ?)",
+                    ((campaign.campaign_id, recipient, now) for recipient in batch)
+                )
+            jobs_count += len(batch)
+        return jobs_count
+
+    def get_campaign(self, campaign_id: str) -> Optional[RenderedCampaign]:
+        with self._connect() as connection:
+            row = connection.execute("SELECT message FROM campaigns WHERE _id = ?", (campaign_id,)).fetchone()
+        return RenderedCampaign(campaign_id=campaign_id, message=row[0]) if row else None
+
+    def reserve(self, visibility_timeout: float) -> Optional[EmailJob]:
+        now = time.time()
+        # Single statement, so two workers can never reserve the same job.
+        # Reserved jobs whose worker died become due again after the timeout.
+        with self._connect() as connection:
+            row = connection.execute(
+                """
+                UPDATE email_jobs
+                SET status = ?, available_at = ?, attempts = attempts + 1
+                WHERE _id = (
+                    SELECT _id FROM email_jobs
+                    WHERE status IN (?, ?) AND available_at <= ?
+                    ORDER BY available_at
+                    LIMIT 1
+                )
+                RETURNING _id, campaign_id, recipient, attempts
+                """,
+                (RESERVED, now + visibility_timeout, PENDING, RESERVED, now)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return EmailJob(_id=row[0], campaign_id=row[1], recipient=row[2], attempts=row[3])
+
+    def ack(self, job_id: int) -> None:
+        with self._connect() as connection:
+            connection.execute("UPDATE email_jobs SET status = ?, last_error = NULL WHERE _id = ?", (DONE, job_id))
+
+    def retry(self, job_id: int, delay: float, error: str) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE email_jobs SET status = ?, available_at = ?, last_error = ? WHERE _id = ?",
+                (PENDING, time.time() + delay, error, job_id)
+            )
+
+    def dead_letter(self, job_id: int, error: str) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE email_jobs SET status = ?, last_error = ? WHERE _id = ?",
+                (DEAD, error, job_id)
+            )
+
+    def get_campaign_status(self, campaign_id: str) -> dict[str, int]:
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT status, COUNT(*) FROM email_jobs WHERE campaign_id = ? GROUP BY status",
+                (campaign_id,)
+            ).fetchall()
+        status = {PENDING: 0, RESERVED: 0, DONE: 0, DEAD: 0}
+        status.update(dict(rows))
+        return status
+
+    ############################################################################
+    #### Private functions
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short lived connection per operation keeps the adapter usable from
+        # any thread or process without sharing sqlite3 objects.
+        connection = sqlite3.connect(self._path, timeout=30)
+        try:
+            with connection: # Commits or rolls back the transaction
+                yield connection
+        finally:
+            connection.close()
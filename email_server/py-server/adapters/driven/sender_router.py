@@ -0,0 +1,246 @@
+from datetime import date
+from email import policy
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+import random
+import threading
+import time
+from typing import Optional
+from core.ports.driven_ports import IEmailSender, ILogger, ISenderAccountRepository
+from core.domain.send_result_enum import SendResultEnum
+from core.domain.sender_behavior import SenderBehavior
+from core.utils.template_cache import replace_headers
+from adapters.driven.smtp_pool_adapter import PooledSmtpAdapter
+from config.global_env_vars import SMTP_POOL_SIZE
+
+# Weight given to the remaining quota of an account without daily limit
+UNLIMITED_QUOTA_WEIGHT = 10_000
+
+
+class _Route:
+    def __init__(self, behavior: SenderBehavior, sender: IEmailSender):
+        self.behavior = behavior
+        self.sender = sender
+        self.from_email: Optional[str] = behavior.config.get("from_email")
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+
+class SenderRouter(IEmailSender):
+    """
+    Spreads the sends over several sending accounts (active SenderBehavior
+    records), each one with its own IEmailSender. Every send picks an account
+    at random, weighted by its remaining daily quota divided by its priority
+    (lower priority values are preferred), and fails over to the next one
+    when it is throttled or fails to connect/authenticate. An account failing
+    `failure_threshold` sends in a row that way is left out for `cooldown`
+    seconds. A recipient refused by the server is not retried elsewhere and
+    does not count against the account. The From header is set to the
+    `from_email` of the account sending, when its config has one.
+
+    Sends per account are counted in memory and added to the repository every
+    `flush_interval` seconds, which then returns the totals of every process.
+    A send reserves its quota before going out, so concurrent sends never go
+    over an account's `max_daily_limit`.
+    """
+
+    def __init__(self,
+                 routes: list[tuple[SenderBehavior, IEmailSender]],
+                 account_repository: ISenderAccountRepository,
+                 logger: ILogger,
+                 flush_interval: float = 30.0,
+                 failure_threshold: int = 3,
+                 cooldown: float = 300.0
+                 ):
+        if not routes:
+            raise ValueError("SenderRouter needs at least one sending account.")
+
+        self._routes = [_Route(behavior, sender) for behavior, sender in routes]
+        self._account_repository = account_repository
+        self._logger = logger
+        self._flush_interval = flush_interval
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        self._day = date.today()
+        self._stored_counts: dict[str, int] = account_repository.get_sent_counts(self._day)
+        # (day, sender name) -> sends not added to the repository yet, and
+        # those being added by a flush (still counted until it returns)
+        self._unflushed_counts: dict[tuple[date, str], int] = {}
+        self._flushing_counts: dict[tuple[date, str], int] = {}
+        self._flushed_at = time.monotonic()
+
+    def send(self, email: MIMEMultipart | MIMEText | bytes, to: str) -> bool:
+        return self.send_with_result(email, to) == SendResultEnum.SENT
+
+    def send_with_result(self, email: MIMEMultipart | MIMEText | bytes, to: str) -> SendResultEnum:
+        tried: set[str] = set()
+        result = SendResultEnum.SENDER_FAILED
+        while (reserved := self._reserve(tried)) is not None:
+            route, day = reserved
+            tried.add(route.behavior.name)
+            result = route.sender.send_with_result(self._from_account(route, email), to)
+            self._settle(route, day, result)
+            self._flush_if_due()
+            if result == SendResultEnum.SENT:
+                return result
+            if result == SendResultEnum.RECIPIENT_REFUSED:
+                # Another account would be refused the same address
+                self._logger.log_error(f"Recipient {to} refused by sending account {route.behavior.name}, not retried.")
+                return result
+
+        self._logger.log_error(f"No sending account could send to {to} (tried: {', '.join(sorted(tried)) or 'none available'}).")
+        return result
+
+    def get_sent_counts(self) -> dict[str, int]:
+        """Emails sent today by each account, as known by this process."""
+        with self._lock:
+            return {route.behavior.name: self._sent_today(route) for route in self._routes}
+
+    def close(self) -> None:
+        self.flush()
+        for route in self._routes:
+            if hasattr(route.sender, "close"):
+                route.sender.close()
+
+    def flush(self) -> None:
+        self._flush(blocking=True)
+
+    ############################################################################
+    #### Private functions
+
+    def _from_account(self, route: _Route, email: MIMEMultipart | MIMEText | bytes) -> MIMEMultipart | MIMEText | bytes:
+        """`email` with the From header of the account, which SPF/DMARC align with its envelope sender."""
+        if route.from_email is None:
+            return email
+        message = email if isinstance(email, bytes) else email.as_bytes(policy=policy.SMTP)
+        return replace_headers(message, From=route.from_email)
+
+    def _reserve(self, tried: set[str]) -> Optional[tuple[_Route, date]]:
+        """Picks the account of the next attempt and reserves one send of its quota."""
+        with self._lock:
+            self._roll_day()
+            now = time.monotonic()
+            candidates, weights = [], []
+            for route in self._routes:
+                if route.behavior.name in tried or route.cooldown_until > now:
+                    continue
+                remaining = self._remaining_quota(route)
+                if remaining > 0:
+                    candidates.append(route)
+                    weights.append(remaining / max(route.behavior.priority, 1))
+            if not candidates:
+                return None
+
+            route = random.choices(candidates, weights)[0]
+            self._add_unflushed(self._day, route, 1)
+            return route, self._day
+
+    def _settle(self, route: _Route, day: date, result: SendResultEnum) -> None:
+        with self._lock:
+            if result == SendResultEnum.SENT:
+                route.consecutive_failures = 0
+                return
+
+            self._add_unflushed(day, route, -1) # Gives the reserved send back
+            if result == SendResultEnum.RECIPIENT_REFUSED:
+                return # The address is the problem, not the account
+            route.consecutive_failures += 1
+            if route.consecutive_failures >= self._failure_threshold:
+                route.consecutive_failures = 0
+                route.cooldown_until = time.monotonic() + self._cooldown
+                self._logger.log_error(
+                    f"Sending account {route.behavior.name} ({route.behavior.provider}) failed "
+                    f"{self._failure_threshold} sends in a row (last: {result}), paused for {self._cooldown:.0f}s."
+                )
+
+    def _flush_if_due(self) -> None:
+        if time.monotonic() - self._flushed_at >= self._flush_interval:
+            self._flush(blocking=False) # Skipped if another thread is already flushing
+
+    def _flush(self, blocking: bool) -> None:
+        if not self._flush_lock.acquire(blocking=blocking):
+            return
+        try:
+            with self._lock:
+                self._flushing_counts, self._unflushed_counts = self._unflushed_counts, {}
+                flushing, today = self._flushing_counts, self._day
+                self._flushed_at = time.monotonic()
+
+            flushed_days = set()
+            try:
+                for day in {day for day, _ in flushing}:
+                    counts = {name: sent for (counts_day, name), sent in flushing.items() if counts_day == day and sent}
+                    if counts:
+                        self._account_repository.add_sent_counts(day, counts)
+                    flushed_days.add(day)
+                stored_counts = self._account_repository.get_sent_counts(today)
+            except Exception as e:
+                # Kept for the next flush, the quotas keep counting them meanwhile
+                with self._lock:
+                    for (day, name), sent in flushing.items():
+                        if day not in flushed_days:
+                            self._unflushed_counts[(day, name)] = self._unflushed_counts.get((day, name), 0) + sent
+                        elif day == self._day: # Stored, but the totals could not be read back
+                            self._stored_counts[name] = self._stored_counts.get(name, 0) + sent
+                    self._flushing_counts = {}
+                self._logger.log_error("Failed to persist the sender counts.", e)
+                return
+
+            with self._lock:
+                if self._day == today:
+                    # Totals of every process, the sends just flushed included
+                    self._stored_counts = stored_counts
+                self._flushing_counts = {}
+        finally:
+            self._flush_lock.release()
+
+    def _roll_day(self) -> None:
+        # Quotas are daily: unflushed sends of the previous day stay keyed by it
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self._stored_counts = {}
+
+    def _remaining_quota(self, route: _Route) -> float:
+        if route.behavior.max_daily_limit is None:
+            return UNLIMITED_QUOTA_WEIGHT
+        return route.behavior.max_daily_limit - self._sent_today(route)
+
+    def _sent_today(self, route: _Route) -> int:
+        key = (self._day, route.behavior.name)
+        return self._stored_counts.get(key[1], 0) + self._unflushed_counts.get(key, 0) + self._flushing_counts.get(key, 0)
+
+    def _add_unflushed(self, day: date, route: _Route, sent: int) -> None:
+        key = (day, route.behavior.name)
+        self._unflushed_counts[key] = self._unflushed_counts.get(key, 0) + sent
+
+
+def create_smtp_sender_router(account_repository: ISenderAccountRepository,
+                              logger: ILogger,
+                              **router_options
+                              ) -> Optional[SenderRouter]:
+    """
+    One pooled SMTP sender per active account, from its `config` (host, port,
+    username, password, use_starttls, pool_size, from_email). `from_email` is
+    the envelope sender and From header of the account, its username when
+    missing. None without active accounts.
+    """
+
+    routes = []
+    for behavior in account_repository.find_active_senders():
+        config = behavior.config
+        sender = PooledSmtpAdapter(
+            logger,
+            pool_size=config.get("pool_size", SMTP_POOL_SIZE),
+            host=config["host"],
+            port=config.get("port", 587),
+            username=config.get("username"),
+            password=config.get("password"),
+            use_starttls=config.get("use_starttls", True),
+            from_email=config.get("from_email")
+        )
+        routes.append((behavior, sender))
+    return SenderRouter(routes, account_repository, logger, **router_options) if routes else None
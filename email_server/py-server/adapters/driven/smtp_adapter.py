@@ -33,13 +33,14 @@ class SmtpAdapter(IEmailSender):
         self.ssl_context = ssl.create_default_context()
         self.ssl_context.load_verify_locations(cafile=certifi.where())
 
-    def send(self, email: MIMEMultipart | MIMEText, to: str) -> bool:
+    def send(self, email: MIMEMultipart | MIMEText | bytes, to: str) -> bool:
 
         try:
             with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
                 server.starttls(context=self.ssl_context) # For secure connection
                 server.login(GOOGLE_SENDER_EMAIL, GOOGLE_SENDER_PASSWORD)
-                server.sendmail(GOOGLE_SENDER_EMAIL, to, email.as_string())
+                message = email if isinstance(email, bytes) else email.as_string()
+                server.sendmail(GOOGLE_SENDER_EMAIL, to, message)
                 self._logger.log_info(f"Email sent successfully by {GOOGLE_SENDER_EMAIL} to {to}")
             return True
         except smtplib.SMTPAuthenticationError as auth_error:
@@ -0,0 +1,202 @@
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from typing import Optional
+import certifi
+from core.ports.driven_ports import IEmailSender, ILogger
+from core.domain.send_result_enum import SendResultEnum
+from config.global_env_vars import (
+    GOOGLE_SENDER_EMAIL, GOOGLE_SENDER_PASSWORD,
+    SMTP_SERVER, SMTP_PORT,
+    SMTP_POOL_SIZE, SMTP_MAX_MESSAGES_PER_CONNECTION, SMTP_HEALTH_CHECK_INTERVAL
+)
+
+
+class _PooledConnection:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.sent_count = 0
+        self.last_used_at = time.monotonic()
+
+
+class PooledSmtpAdapter(IEmailSender):
+    """
+    Drop-in replacement for SmtpAdapter that keeps up to `pool_size`
+    authenticated SMTP sessions alive and reuses them across sends, so the
+    TCP + STARTTLS + AUTH handshake is paid once per connection instead of
+    once per recipient.
+    """
+
+    def __init__(self,
+                 logger: ILogger,
+                 pool_size: int = SMTP_POOL_SIZE,
+                 max_messages_per_connection: int = SMTP_MAX_MESSAGES_PER_CONNECTION,
+                 health_check_interval: float = SMTP_HEALTH_CHECK_INTERVAL,
+                 host: str = SMTP_SERVER,
+                 port: int | str = SMTP_PORT,
+                 username: Optional[str] = GOOGLE_SENDER_EMAIL,
+                 password: Optional[str] = GOOGLE_SENDER_PASSWORD,
+                 use_starttls: bool = True,
+                 from_email: Optional[str] = None,
+                 timeout: float = 30.0
+                 ):
+        self._logger = logger
+        self._max_messages_per_connection = max_messages_per_connection
+        self._health_check_interval = health_check_interval
+        self._host = host
+        self._port = port
+        self._username = username
+        self._password = password
+        self._use_starttls = use_starttls
+        # Envelope sender (MAIL FROM). Only Gmail like accounts log in with their
+        # address: a SendGrid username is "apikey", an SES one an IAM key id
+        self._from_email = from_email or username
+        self._timeout = timeout
+        self.ssl_context = ssl.create_default_context()
+        self.ssl_context.load_verify_locations(cafile=certifi.where())
+
+        # Idle connections ready to be reused (LIFO keeps the warmest one on top)
+        self._idle: queue.LifoQueue[_PooledConnection] = queue.LifoQueue(maxsize=pool_size)
+        # Limits how many connections (idle + in use) exist at the same time
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def send(self, email: MIMEMultipart | MIMEText | bytes, to: str) -> bool:
+        return self.send_with_result(email, to) == SendResultEnum.SENT
+
+    def send_with_result(self, email: MIMEMultipart | MIMEText | bytes, to: str) -> SendResultEnum:
+        message = email if isinstance(email, bytes) else email.as_string()
+
+        # A pooled session can be dropped by the server while idle, so a
+        # disconnection gets exactly one retry on a brand new connection.
+        for attempt in range(2):
+            self._slots.acquire()
+            connection = None
+            try:
+                connection = self._acquire_connection()
+                connection.server.sendmail(self._from_email, to, message)
+                connection.sent_count += 1
+                self._release_connection(connection)
+                self._logger.log_info(f"Email sent successfully by {self._from_email} to {to}")
+                return SendResultEnum.SENT
+            except smtplib.SMTPServerDisconnected as disconnected_error:
+                self._discard_connection(connection)
+                if attempt == 0:
+                    self._logger.log_info(f"SMTP connection lost ({disconnected_error}), reconnecting to send to {to}")
+                    continue
+                self._logger.log_error(f"SMTP server disconnected while sending from {self._from_email}: {disconnected_error}")
+                return SendResultEnum.SENDER_FAILED
+            except smtplib.SMTPAuthenticationError as auth_error:
+                self._discard_connection(connection)
+                self._logger.log_error(f"Authentication Error for {self._username}: {auth_error}. Check App Password/Less Secure Apps.")
+                return SendResultEnum.SENDER_FAILED
+            except smtplib.SMTPRecipientsRefused as refused_error:
+                if any(_is_throttling(code, reply) for code, reply in refused_error.recipients.values()):
+                    # Refused because of the sending rate, not because of the address
+                    self._discard_connection(connection)
+                    self._logger.log_error(f"SMTP throttling while sending from {self._from_email} to {to}: {refused_error}")
+                    return SendResultEnum.THROTTLED
+                # The session is still usable, only this recipient was rejected
+                self._release_connection(connection)
+                self._logger.log_error(f"SMTP Error during sending from {self._from_email} to {to}: {refused_error}")
+                return SendResultEnum.RECIPIENT_REFUSED
+            except smtplib.SMTPException as smtp_error:
+                self._discard_connection(connection)
+                if isinstance(smtp_error, smtplib.SMTPResponseException) and _is_throttling(smtp_error.smtp_code, smtp_error.smtp_error):
+                    self._logger.log_error(f"SMTP throttling while sending from {self._from_email}: {smtp_error}")
+                    return SendResultEnum.THROTTLED
+                self._logger.log_error(f"SMTP Error during sending from {self._from_email}: {smtp_error}")
+                return SendResultEnum.SENDER_FAILED
+            except Exception as e:
+                self._discard_connection(connection)
+                self._logger.log_error(f"An unexpected error occurred during email sending: {e}")
+                return SendResultEnum.SENDER_FAILED
+        return SendResultEnum.SENDER_FAILED
+
+    def close(self) -> None:
+        """
+        Gracefully closes every idle connection. Connections in use are closed
+        when they are released after this call.
+        """
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._quit(connection)
+
+    ############################################################################
+    #### Private functions
+
+    def _acquire_connection(self) -> _PooledConnection:
+        """
+        Must be called holding a slot. Returns a healthy idle connection or
+        opens a new one.
+        """
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open_connection()
+
+            if self._is_healthy(connection):
+                return connection
+            self._quit(connection)
+
+    def _release_connection(self, connection: _PooledConnection) -> None:
+        connection.last_used_at = time.monotonic()
+        if connection.sent_count >= self._max_messages_per_connection:
+            # Recycle long lived sessions, providers throttle or drop them anyway
+            self._quit(connection)
+        else:
+            self._idle.put_nowait(connection)
+        self._slots.release()
+
+    def _discard_connection(self, connection: Optional[_PooledConnection]) -> None:
+        if connection is not None:
+            self._quit(connection)
+        self._slots.release()
+
+    def _open_connection(self) -> _PooledConnection:
+        server = smtplib.SMTP(self._host, self._port, timeout=self._timeout)
+        try:
+            if self._use_starttls:
+                server.starttls(context=self.ssl_context) # For secure connection
+            if self._username and self._password:
+                server.login(self._username, self._password)
+        except Exception:
+            server.close()
+            raise
+        return _PooledConnection(server)
+
+    def _is_healthy(self, connection: _PooledConnection) -> bool:
+        # NOOP costs a round trip, so recently used sessions are trusted as is
+        if time.monotonic() - connection.last_used_at < self._health_check_interval:
+            return True
+        try:
+            code, _ = connection.server.noop()
+            return code == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def _quit(self, connection: _PooledConnection) -> None:
+        try:
+            connection.server.quit()
+        except Exception:
+            connection.server.close()
+
+
+def _is_throttling(code: int, reply: bytes | str) -> bool:
+    """
+    Provider rate limiting: 421 (service not available, closing), 45x
+    (temporary local/quota errors) or an x.7.x enhanced status (policy, e.g.
+    Gmail's "4.7.0 rate limited" or "5.7.1 unusual rate of mail").
+    """
+    if isinstance(reply, bytes):
+        reply = reply.decode(errors="replace")
+    return code == 421 or 450 <= code <= 459 or reply.lstrip().startswith(("4.7.", "5.7."))
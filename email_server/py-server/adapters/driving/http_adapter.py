@@ -1,4 +1,5 @@
 from fastapi import APIRouter, BackgroundTasks, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr, Field, PastDate, field_validator, FieldValidationInfo
 from datetime import date, datetime
 from core.ports.driving_ports import IEmailService, IUserService
@@ -71,6 +72,8 @@ class DiscountCupomFillValues(BaseModel):
 class SendEmailsReqBody(BaseModel):
     email_template: TemplateCatalogEnum = Field("discount_cupom", description="What email template to use.")
     subject: str = Field(..., description="Subject of the email to be sent.")
+    count: Optional[int] = Field(1, gt=0, description="How many users to select. null streams the campaign to every user.")
+    seed: Optional[int] = Field(None, ge=0, description="Seed of the random selection, repeats the same draw over unchanged users (not on MongoDB, nor for birthdays without precomputed buckets).")
     template_fill_values: Annotated[
         Union[
             DiscountCupomFillValues,
@@ -93,6 +96,13 @@ class SenderBehaviorUpdateRequest(BaseModel):
 #### Endpoints mapping
 
 class HTTPAdapter:
+    """
+    The services and the repositories below them are synchronous (blocking
+    Supabase/Mongo/SQLite clients), so every endpoint that reaches them runs
+    the call with `run_in_threadpool`: a slow query then holds one worker
+    thread instead of the event loop shared by every request.
+    """
+
     def __init__(self, email_service: IEmailService, user_service: IUserService):
         self._email_service = email_service
         self._user_service = user_service
@@ -109,13 +119,15 @@ class HTTPAdapter:
         self.router.post("/emails/send-emails", status_code=status.HTTP_202_ACCEPTED)(self.send_emails_endpoint)
         self.router.patch("/emails/behavior", status_code=status.HTTP_200_OK)(self.change_sender_behavior_endpoint)
         self.router.get("/emails/behavior", status_code=status.HTTP_200_OK)(self.get_sender_behavior_endpoint)
+        self.router.get("/emails/metrics", status_code=status.HTTP_200_OK)(self.get_send_metrics_endpoint)
+        self.router.get("/emails/campaigns/{campaign_id}", status_code=status.HTTP_200_OK)(self.get_campaign_status_endpoint)
 
     ############################################################################
     #### --- User Endpoints ---
 
     async def create_user_endpoint(self, user_request: UserCreateRequest):
         try:
-            user = self._user_service.create_user(user_request.model_dump())
+            user = await run_in_threadpool(self._user_service.create_user, user_request.model_dump())
             return {"message": "User created successfully", "user_id": user._id}
         except ValueError as e:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
@@ -127,7 +139,7 @@ class HTTPAdapter:
         if not user_request.model_dump(exclude_unset=True):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No data provided for update")
         try:
-            user = self._user_service.update_user(user_id, user_request.model_dump(exclude_unset=True))
+            user = await run_in_threadpool(self._user_service.update_user, user_id, user_request.model_dump(exclude_unset=True))
             if not user:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
             return {"message": "User updated successfully", "user_id": user._id}
@@ -137,13 +149,13 @@ class HTTPAdapter:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to update user: {e}")
 
     async def get_user_by_id_endpoint(self, user_id: UUID):
-        user = self._user_service.get_user_by_id(user_id)
+        user = await run_in_threadpool(self._user_service.get_user_by_id, user_id)
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return user.to_dict()
 
-    async def get_total_users_endpoint(self):
-        total_users = self._user_service.get_total_users()
+    async def get_total_users_endpoint(self, estimated: bool = False):
+        total_users = await run_in_threadpool(self._user_service.get_total_users, estimated)
         return {"total_users": total_users}
 
     ############################################################################
@@ -151,9 +163,11 @@ class HTTPAdapter:
 
     async def send_emails_endpoint(self, request_body: SendEmailsReqBody, background_tasks: BackgroundTasks):
         try:
-            self._email_service.send_emails(
+            campaign_id = await run_in_threadpool(
+                self._email_service.send_emails,
                 background_tasks=background_tasks,
-                count=1, 
+                count=request_body.count, 
+                seed=request_body.seed,
                 subject=request_body.subject,
                 template_name=request_body.email_template, 
                 fill_values=request_body.template_fill_values.model_dump()
@@ -161,13 +175,23 @@ class HTTPAdapter:
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to send emails: {e}")
         
-        return {"message": "Emails sent successfully"}
+        return {"message": "Emails sent successfully", "campaign_id": campaign_id}
 
 
     async def change_sender_behavior_endpoint(self, request_body: SenderBehaviorUpdateRequest):
-        self._email_service.change_sender_behavior(request_body.strategy)
+        await run_in_threadpool(self._email_service.change_sender_behavior, request_body.strategy)
         return {"message": f"Sender behavior was updated to '{request_body.strategy}'."}
 
     async def get_sender_behavior_endpoint(self):
-        behavior = self._email_service.get_sender_behavior()
+        behavior = await run_in_threadpool(self._email_service.get_sender_behavior)
         return {"strategy": behavior.value}
+
+    async def get_send_metrics_endpoint(self):
+        # In memory counters, fine on the event loop
+        return self._email_service.get_send_metrics()
+
+    async def get_campaign_status_endpoint(self, campaign_id: UUID):
+        campaign_status = await run_in_threadpool(self._email_service.get_campaign_status, str(campaign_id))
+        if campaign_status is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Campaign tracking requires EMAIL_DISPATCH_MODE=queue")
+        return {"campaign_id": campaign_id, "jobs": campaign_status}
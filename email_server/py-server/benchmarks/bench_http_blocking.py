@@ -0,0 +1,91 @@
+"""
+Load test of GET /users/{id} through the real HTTPAdapter, in process with
+httpx.ASGITransport, over a user service that blocks for `--query-ms` like a
+database round trip.
+
+"before" runs the service calls directly on the event loop (how the
+endpoints called them before run_in_threadpool), "after" is the current code.
+
+    python -m benchmarks.bench_http_blocking --clients 200 --requests 5 --query-ms 20
+"""
+import argparse
+import asyncio
+from datetime import date
+import statistics
+import time
+from uuid import uuid4
+import anyio
+import httpx
+from fastapi import FastAPI
+import adapters.driving.http_adapter as http_adapter
+from adapters.driving.http_adapter import HTTPAdapter
+from core.domain.user import User
+
+
+class _BlockingUserService:
+    def __init__(self, query_seconds: float):
+        self._query_seconds = query_seconds
+
+    def get_user_by_id(self, user_id):
+        time.sleep(self._query_seconds) # Blocking client, e.g. a database round trip
+        return User(_id=str(user_id), created_at=None, client_full_name="Bench User", birth_date=date(1990, 1, 1),
+                    email="bench@example.com", telephone=None, cpf="12345678901")
+
+
+async def _run_inline(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+async def _load_test(app: FastAPI, clients: int, requests_per_client: int, threads: int) -> tuple[float, list[float]]:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+    latencies: list[float] = []
+
+    async def client(http: httpx.AsyncClient, load_started_at: float) -> None:
+        # Each request is sent as soon as the previous one answers, so its
+        # latency counts from then: a blocked loop delays the send itself,
+        # which timing only around `http.get` would not see
+        sent_at = load_started_at
+        for _ in range(requests_per_client):
+            response = await http.get(f"/users/{uuid4()}")
+            response.raise_for_status()
+            answered_at = time.perf_counter()
+            latencies.append(answered_at - sent_at)
+            sent_at = answered_at
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(client(http, started_at) for _ in range(clients)))
+        return time.perf_counter() - started_at, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5, help="Requests per client.")
+    parser.add_argument("--query-ms", type=float, default=20)
+    parser.add_argument("--threads", type=int, default=100, help="Thread limiter size, like HTTP_THREADPOOL_SIZE.")
+    parser.add_argument("--mode", choices=["before", "after", "both"], default="both")
+    args = parser.parse_args()
+
+    app = FastAPI()
+    app.include_router(HTTPAdapter(email_service=None, user_service=_BlockingUserService(args.query_ms / 1000)).router)
+
+    total = args.clients * args.requests
+    print(f"{total} requests from {args.clients} concurrent clients, {args.query_ms:.0f} ms blocking query, {args.threads} threads")
+    for mode in (["before", "after"] if args.mode == "both" else [args.mode]):
+        run_in_threadpool = http_adapter.run_in_threadpool
+        if mode == "before":
+            http_adapter.run_in_threadpool = _run_inline
+        try:
+            elapsed, latencies = asyncio.run(_load_test(app, args.clients, args.requests, args.threads))
+        finally:
+            http_adapter.run_in_threadpool = run_in_threadpool
+
+        percentiles = statistics.quantiles(latencies, n=100)
+        print(f"{mode:6}: {elapsed:6.2f} s  {total / elapsed:7.0f} req/s  "
+              f"p50 {percentiles[49] * 1000:7.0f} ms  p99 {percentiles[98] * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
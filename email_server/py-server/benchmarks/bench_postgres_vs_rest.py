@@ -0,0 +1,89 @@
+"""
+Latency of find_by_id and find_random_users through PostgresRepository (direct
+connection pool) vs SupabaseRepository (PostgREST over HTTPS), on the users
+already in the database. Read only.
+
+    python -m benchmarks.bench_postgres_vs_rest --iterations 200 --random-limit 100
+
+Postgres uses --postgres-dsn (defaults to the host/port/user/password/dbname
+variables of DATABASE_TYPE=postgres), PostgREST uses SUPABASE_URL and
+SUPABASE_SECRET_KEY. A side without credentials is skipped.
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, Optional
+from core.ports.driven_ports import IUserRepository
+from config.global_env_vars import (
+    SUPABASE_URL, SUPABASE_SECRET_KEY,
+    SUPABASE_HOST, SUPABASE_PORT, SUPABASE_USER, SUPABASE_PASSWORD, SUPABASE_DBNAME
+)
+
+
+def _postgres_repository(dsn: Optional[str]) -> Optional[IUserRepository]:
+    if not (dsn or SUPABASE_HOST):
+        return None
+    from psycopg.conninfo import conninfo_to_dict
+    from adapters.driven.db.postgres_repository import PostgresRepository
+
+    if dsn:
+        params = conninfo_to_dict(dsn)
+        return PostgresRepository(params.get("host", "localhost"), params.get("port", 5432), params.get("user"),
+                                  params.get("password"), params.get("dbname"))
+    return PostgresRepository(SUPABASE_HOST, SUPABASE_PORT, SUPABASE_USER, SUPABASE_PASSWORD, SUPABASE_DBNAME)
+
+
+def _rest_repository() -> Optional[IUserRepository]:
+    if not (SUPABASE_URL and SUPABASE_SECRET_KEY):
+        return None
+    from adapters.driven.db.supabase_repository import SupabaseRepository
+
+    return SupabaseRepository(SUPABASE_URL, SUPABASE_SECRET_KEY)
+
+
+def _latencies_ms(call: Callable[[], object], iterations: int) -> list[float]:
+    call() # Warm up: connection, TLS, prepared statement
+    latencies = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - started_at) * 1000)
+    return latencies
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"  {name:28} p50 {percentiles[49]:8.2f} ms  p99 {percentiles[98]:8.2f} ms  mean {statistics.fmean(latencies):8.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--postgres-dsn", default=None)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--random-limit", type=int, default=100, help="Users per find_random_users call.")
+    parser.add_argument("--sample-ids", type=int, default=1000, help="User ids looked up by find_by_id.")
+    args = parser.parse_args()
+
+    repositories = {"postgres (pool)": _postgres_repository(args.postgres_dsn), "postgrest (rest)": _rest_repository()}
+    repositories = {name: repository for name, repository in repositories.items() if repository is not None}
+    if not repositories:
+        raise SystemExit("No credentials: pass --postgres-dsn or set the SUPABASE_* variables.")
+
+    # Same ids for every backend, read from the first one
+    first = next(iter(repositories.values()))
+    user_ids = [user._id for user, _ in zip(first.iter_users(page_size=args.sample_ids), range(args.sample_ids))]
+    if not user_ids:
+        raise SystemExit("The users table is empty.")
+
+    print(f"{args.iterations} calls each, {len(user_ids)} sampled ids, find_random_users({args.random_limit})")
+    for name, repository in repositories.items():
+        print(name)
+        _report("find_by_id", _latencies_ms(lambda: repository.find_by_id(random.choice(user_ids)), args.iterations))
+        _report("find_random_users", _latencies_ms(lambda: repository.find_random_users(args.random_limit), args.iterations))
+        if hasattr(repository, "close"):
+            repository.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Mean time to sample `--limit` random users with ORDER BY random() vs the
+indexed random_key range scan of migrations/002_users_random_key.sql, at
+several table sizes.
+
+SQLite in memory stands in for Postgres: same columns, index and query shape,
+so it shows how each query scales with the table, not Postgres timings.
+
+    python -m benchmarks.bench_random_users --sizes 10000 100000 1000000 --limit 100 --samples 20
+"""
+import argparse
+import random
+import sqlite3
+import time
+from typing import Callable
+
+ORDER_BY_RANDOM = "SELECT * FROM users ORDER BY random() LIMIT :limit"
+# Same query as get_random_users / PostgresRepository.find_random_users
+RANDOM_KEY_RANGE = """
+    SELECT * FROM (SELECT * FROM users WHERE random_key >= :start_key ORDER BY random_key LIMIT :limit)
+    UNION ALL
+    SELECT * FROM (SELECT * FROM users WHERE random_key < :start_key ORDER BY random_key LIMIT :limit)
+    LIMIT :limit
+"""
+
+
+def _users_table(size: int, rng: random.Random) -> sqlite3.Connection:
+    connection = sqlite3.connect(":memory:")
+    connection.execute(
+        "CREATE TABLE users (_id INTEGER PRIMARY KEY, client_full_name TEXT, email TEXT, cpf TEXT, random_key REAL NOT NULL)"
+    )
+    connection.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?, ?)",
+        ((i, f"User {i}", f"user{i}@example.com", f"{i:011d}", rng.random()) for i in range(size))
+    )
+    connection.execute("CREATE INDEX users_random_key_idx ON users (random_key)")
+    connection.execute("ANALYZE")
+    return connection
+
+
+def _mean_ms(sample: Callable[[], list], samples: int, expected: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(samples):
+        ids = sample()
+        if len(ids) != expected or len(set(ids)) != expected:
+            raise RuntimeError(f"Expected {expected} distinct users, got {len(set(ids))} of {len(ids)}.")
+    return (time.perf_counter() - started_at) * 1000 / samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"mean of {args.samples} samples of {args.limit} users")
+    print(f"{'users':>10}  {'ORDER BY random()':>18}  {'random_key range':>17}")
+    for size in args.sizes:
+        connection = _users_table(size, rng)
+        query = lambda sql, **params: [row[0] for row in connection.execute(sql, {"limit": args.limit, **params})]
+        expected = min(args.limit, size) # Exactly `limit` users, or all of them
+        order_by_random = _mean_ms(lambda: query(ORDER_BY_RANDOM), args.samples, expected)
+        random_key = _mean_ms(lambda: query(RANDOM_KEY_RANGE, start_key=rng.random()), args.samples, expected)
+        print(f"{size:>10}  {order_by_random:>15.2f} ms  {random_key:>14.2f} ms")
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Messages per second of PooledSmtpAdapter against a local aiosmtpd server,
+reusing up to `--pool-size` sessions vs opening a connection per message.
+
+No TLS and no AUTH on the local server, so the real gain against a provider
+(STARTTLS + AUTH handshake per connection) is larger than the one measured.
+
+    python -m benchmarks.bench_smtp_pool --messages 2000 --pool-size 4
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+import socket
+import time
+from aiosmtpd.controller import Controller
+from core.ports.driven_ports import ILogger
+from adapters.driven.smtp_pool_adapter import PooledSmtpAdapter
+
+
+class _QuietLogger(ILogger):
+    def log_info(self, message: str) -> None:
+        pass
+
+    def log_error(self, message: str, error: Exception | None = None) -> None:
+        print(message)
+
+
+class _DiscardHandler:
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _messages_per_second(sender: PooledSmtpAdapter, message: bytes, messages: int, threads: int) -> float:
+    recipients = [f"user{i}@example.com" for i in range(messages)]
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda to: sender.send(message, to), recipients))
+    elapsed = time.perf_counter() - started_at
+    sender.close()
+    if not all(results):
+        raise RuntimeError(f"{results.count(False)} of {messages} sends failed.")
+    return messages / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    message = MIMEText("<p>Benchmark</p>", "html")
+    message["Subject"] = "Benchmark"
+    message = message.as_bytes()
+
+    controller = Controller(_DiscardHandler(), hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    try:
+        options = dict(host=controller.hostname, port=controller.port, username="bench@example.com",
+                       password=None, use_starttls=False, pool_size=args.pool_size)
+        pooled = _messages_per_second(
+            PooledSmtpAdapter(_QuietLogger(), **options), message, args.messages, args.pool_size
+        )
+        per_message = _messages_per_second(
+            PooledSmtpAdapter(_QuietLogger(), max_messages_per_connection=1, **options), message, args.messages, args.pool_size
+        )
+    finally:
+        controller.stop()
+
+    print(f"{args.messages} messages, {args.pool_size} threads")
+    print(f"pooled ({args.pool_size} sessions): {pooled:8.0f} msg/s")
+    print(f"connection per message:   {per_message:8.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
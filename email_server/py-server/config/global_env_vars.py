@@ -55,10 +55,65 @@ def _convert_to_int(value: str)-> int:
     return int(value)
 
 SERVER_PORT = _convert_to_int(os.environ.get('SERVER_PORT', 8000))
-DATABASE_TYPE = os.environ.get('DATABASE_TYPE', 'supabase') # mongodb or supabase
+DATABASE_TYPE = os.environ.get('DATABASE_TYPE', 'supabase') # mongodb (or mongo), supabase or postgres
 EMAIL_SENDER = os.environ.get('EMAIL_SENDER', 'espaco.pamela@gmail.com.br')
 IS_PROD = _convert_to_bool(os.environ.get('IS_PROD', True))
 
+# SMTP connection pool
+SMTP_POOL_SIZE = _convert_to_int(os.environ.get('SMTP_POOL_SIZE', 4))
+SMTP_MAX_MESSAGES_PER_CONNECTION = _convert_to_int(os.environ.get('SMTP_MAX_MESSAGES_PER_CONNECTION', 100))
+SMTP_HEALTH_CHECK_INTERVAL = _convert_to_int(os.environ.get('SMTP_HEALTH_CHECK_INTERVAL', 30)) # seconds idle before a NOOP check
+
+# Multi account sending (active SenderBehavior records, see migrations/005_sender_accounts.sql)
+SENDER_ROUTING = _convert_to_bool(os.environ.get('SENDER_ROUTING', False)) # False: single GOOGLE_SENDER_EMAIL account
+SENDER_COUNTS_FLUSH_INTERVAL = _convert_to_int(os.environ.get('SENDER_COUNTS_FLUSH_INTERVAL', 30)) # seconds between counter writes
+SENDER_FAILURE_THRESHOLD = _convert_to_int(os.environ.get('SENDER_FAILURE_THRESHOLD', 3)) # failures in a row before pausing an account
+SENDER_COOLDOWN = _convert_to_int(os.environ.get('SENDER_COOLDOWN', 300)) # seconds a throttled account is paused
+
+# MongoDB client (DATABASE_TYPE=mongodb)
+MONGO_MAX_POOL_SIZE = _convert_to_int(os.environ.get('MONGO_MAX_POOL_SIZE', 100)) # keep >= HTTP_THREADPOOL_SIZE
+MONGO_MIN_POOL_SIZE = _convert_to_int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+MONGO_CONNECT_TIMEOUT_MS = _convert_to_int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = _convert_to_int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary') # for random picks and counts
+
+# Direct Postgres connection pool (DATABASE_TYPE=postgres), uses the SUPABASE_HOST/PORT/USER/PASSWORD/DBNAME credentials
+POSTGRES_POOL_MIN_SIZE = _convert_to_int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 1))
+POSTGRES_POOL_MAX_SIZE = _convert_to_int(os.environ.get('POSTGRES_POOL_MAX_SIZE', 20)) # mind the database max_connections
+POSTGRES_POOL_TIMEOUT = _convert_to_int(os.environ.get('POSTGRES_POOL_TIMEOUT', 5)) # seconds waiting for a free connection
+POSTGRES_PREPARED_STATEMENTS = _convert_to_bool(os.environ.get('POSTGRES_PREPARED_STATEMENTS', True)) # False behind a transaction pooler
+
+# Worker threads running the blocking service/repository calls of the HTTP endpoints (anyio default: 40)
+HTTP_THREADPOOL_SIZE = _convert_to_int(os.environ.get('HTTP_THREADPOOL_SIZE', 100))
+
+# Email dispatch
+EMAIL_DISPATCH_MODE = os.environ.get('EMAIL_DISPATCH_MODE', 'async') # async, queue or background_tasks
+SMTP_ASYNC_CONCURRENCY = _convert_to_int(os.environ.get('SMTP_ASYNC_CONCURRENCY', 20))
+SMTP_RATE_LIMIT_PER_SECOND = _convert_to_int(os.environ.get('SMTP_RATE_LIMIT_PER_SECOND', 10)) # per provider, 0 disables
+
+# Email job queue (EMAIL_DISPATCH_MODE=queue) and its workers
+JOB_QUEUE_PATH = os.environ.get('JOB_QUEUE_PATH', 'email_jobs.sqlite3')
+JOB_MAX_ATTEMPTS = _convert_to_int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+JOB_RETRY_BASE_DELAY = _convert_to_int(os.environ.get('JOB_RETRY_BASE_DELAY', 30)) # seconds, doubled on each attempt
+JOB_VISIBILITY_TIMEOUT = _convert_to_int(os.environ.get('JOB_VISIBILITY_TIMEOUT', 300)) # seconds before an unacked job is retried
+WORKER_PROCESSES = _convert_to_int(os.environ.get('WORKER_PROCESSES', 2))
+
+# Campaign recipients are fetched/sent in pages of this size
+USERS_PAGE_SIZE = _convert_to_int(os.environ.get('USERS_PAGE_SIZE', 1000))
+
+# BY_BIRTHDAY recipients precomputed once a day for today and the next days, 0 disables
+BIRTHDAY_BUCKET_DAYS = _convert_to_int(os.environ.get('BIRTHDAY_BUCKET_DAYS', 8))
+
+# User lookups cache (by id, email and CPF), 0 entries disables it
+USER_CACHE_MAX_SIZE = _convert_to_int(os.environ.get('USER_CACHE_MAX_SIZE', 10000))
+USER_CACHE_TTL = _convert_to_int(os.environ.get('USER_CACHE_TTL', 300)) # seconds
+USER_CACHE_NEGATIVE_TTL = _convert_to_int(os.environ.get('USER_CACHE_NEGATIVE_TTL', 30)) # seconds a "not found" is remembered
+USER_COUNT_CACHE_TTL = _convert_to_int(os.environ.get('USER_COUNT_CACHE_TTL', 10)) # seconds, GET /users/total
+SENDER_BEHAVIOR_CACHE_TTL = _convert_to_int(os.environ.get('SENDER_BEHAVIOR_CACHE_TTL', 30)) # seconds, 0 disables
+
+# Email templates
+TEMPLATE_IMAGE_CACHE_MAX_BYTES = _convert_to_int(os.environ.get('TEMPLATE_IMAGE_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
 ################################################################################
 #### Generated global environment variables
 
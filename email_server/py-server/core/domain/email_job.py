@@ -0,0 +1,12 @@
+from dataclasses import dataclass, asdict
+
+
+@dataclass
+class EmailJob:
+    _id: int
+    campaign_id: str
+    recipient: str
+    attempts: int # Including the current one
+
+    def to_dict(self):
+        return asdict(self)
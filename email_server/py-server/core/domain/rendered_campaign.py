@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+import email.policy
+from core.utils.template_cache import prepend_headers
+
+
+@dataclass(frozen=True)
+class RenderedCampaign:
+    """
+    Immutable, already serialized campaign email. Per recipient wire bytes
+    are built by prepending a single To header to the shared message, so it
+    can be used from many threads/tasks at once at a constant cost per send.
+    """
+    campaign_id: str
+    message: bytes # Serialized with CRLF line endings, Subject included, no To
+
+    @classmethod
+    def from_mime(cls, campaign_id: str, subject: str, mime_email: MIMEMultipart | MIMEText) -> "RenderedCampaign":
+        if 'To' in mime_email or 'Subject' in mime_email:
+            raise ValueError("Campaign template must not carry To/Subject headers, they are added per campaign/recipient.")
+
+        body = mime_email.as_bytes(policy=email.policy.SMTP)
+        return cls(campaign_id=campaign_id, message=prepend_headers(body, Subject=subject))
+
+    def for_recipient(self, to: str) -> bytes:
+        return prepend_headers(self.message, To=to)
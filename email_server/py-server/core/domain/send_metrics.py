@@ -0,0 +1,47 @@
+from collections import deque
+from dataclasses import dataclass, field
+import time
+
+
+@dataclass
+class SendMetrics:
+    """
+    Throughput and latency counters of an email sender since it was created.
+    Latency percentiles are computed over the last `window` sends.
+    """
+    window: int = 1000
+    sent: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    _latencies: deque = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self._latencies is None:
+            self._latencies = deque(maxlen=self.window)
+
+    def record(self, latency: float, was_sent: bool) -> None:
+        self._latencies.append(latency)
+        if was_sent:
+            self.sent += 1
+        else:
+            self.failed += 1
+
+    def to_dict(self) -> dict[str, float | int]:
+        elapsed = time.monotonic() - self.started_at
+        latencies = sorted(self._latencies)
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "throughput_per_second": self.sent / elapsed if elapsed > 0 else 0.0,
+            "latency_avg_ms": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p50_ms": 1000 * _percentile(latencies, 0.50),
+            "latency_p99_ms": 1000 * _percentile(latencies, 0.99),
+        }
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
@@ -0,0 +1,7 @@
+from enum import StrEnum
+
+class SendResultEnum(StrEnum):
+    SENT = "sent"
+    RECIPIENT_REFUSED = "recipient_refused" # This address only, the sending account is fine
+    THROTTLED = "throttled"                 # Provider rate limiting (421, 45x, x.7.x)
+    SENDER_FAILED = "sender_failed"         # Connection, authentication or any other error
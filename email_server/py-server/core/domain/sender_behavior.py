@@ -20,12 +20,13 @@ class SenderBehavior:
 
     @classmethod
     def from_dict(cls, data: dict):
+        sender_id = data.get("_id") or data.get("id") # Suporta MongoDB (_id) e outros (id)
         return cls(
-            id=str(data.get("_id") or data.get("id")), # Suporta MongoDB (_id) e outros (id)
+            _id=str(sender_id) if sender_id is not None else None,
             name=data.get("name"),
             provider=data.get("provider"),
-            max_daily_limit=data.get("max_daily_limit"),
-            priority=data.get("priority"),
+            max_daily_limit=data.get("max_daily_limit"), # None: no daily limit
+            priority=data.get("priority") if data.get("priority") is not None else 100,
             config=data.get("config"),
             is_active=data.get("is_active", True)
         )
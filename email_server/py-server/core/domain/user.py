@@ -50,7 +50,7 @@ class User:
             data["birth_date"] = date.fromisoformat(data["birth_date"])
         elif isinstance(data.get("birth_date"), datetime): # if DB returns datetime
             data["birth_date"] = data["birth_date"].date()
-        else:
+        elif not isinstance(data.get("birth_date"), date): # Postgres drivers already return a date
             print("investigar, pode ser um bug")
 
         if isinstance(data.get("created_at"), str):
@@ -1,15 +1,37 @@
 from abc import ABC, abstractmethod
+from datetime import date
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import List, Optional
+from typing import Any, Callable, Iterable, Iterator, List, Optional
 from uuid import UUID
 from core.domain.email import Email
+from core.domain.email_job import EmailJob
+from core.domain.rendered_campaign import RenderedCampaign
+from core.domain.send_metrics import SendMetrics
+from core.domain.send_result_enum import SendResultEnum
 from core.domain.user import User
+from core.domain.sender_behavior import SenderBehavior
 from core.domain.sender_behavior_enum import SenderBehaviorEnum
 
 class IEmailSender(ABC):
     @abstractmethod
-    def send(self, email: MIMEMultipart | MIMEText, to: str) -> bool:
+    def send(self, email: MIMEMultipart | MIMEText | bytes, to: str) -> bool:
+        """`email` as bytes must be already serialized, with CRLF line endings."""
+        pass
+    def send_with_result(self, email: MIMEMultipart | MIMEText | bytes, to: str) -> SendResultEnum:
+        """Like `send`, telling why it failed. Senders that can't tell report SENDER_FAILED."""
+        return SendResultEnum.SENT if self.send(email, to) else SendResultEnum.SENDER_FAILED
+
+class IAsyncEmailSender(ABC):
+    @abstractmethod
+    async def send(self, campaign: RenderedCampaign, to: str) -> bool:
+        pass
+    @abstractmethod
+    async def send_many(self, campaign: RenderedCampaign, recipients: Iterable[str]) -> int:
+        """Sends `campaign` to every recipient and returns how many were sent."""
+        pass
+    @abstractmethod
+    def get_metrics(self) -> SendMetrics:
         pass
 
 class ISenderBehaviorRepository(ABC):
@@ -20,6 +42,20 @@ class ISenderBehaviorRepository(ABC):
     def update_behavior(self, new_behavior: SenderBehaviorEnum) -> None:
         pass
 
+class ISenderAccountRepository(ABC):
+    """Sending accounts (SenderBehavior records) and how many emails each one sent per day."""
+    @abstractmethod
+    def find_active_senders(self) -> List[SenderBehavior]:
+        pass
+    @abstractmethod
+    def get_sent_counts(self, day: date) -> dict[str, int]:
+        """Emails sent on `day`, by sender name."""
+        pass
+    @abstractmethod
+    def add_sent_counts(self, day: date, counts: dict[str, int]) -> None:
+        """Adds `counts` to the stored ones atomically, so the sends of every process add up."""
+        pass
+
 class IUserRepository(ABC):
     @abstractmethod
     def save(self, user: User) -> None:
@@ -37,14 +73,98 @@ class IUserRepository(ABC):
     def find_by_cpf(self, cpf: str) -> Optional[User]:
         pass
     @abstractmethod
-    def get_total_count(self) -> int:
+    def find_conflicts(self, email: Optional[str], cpf: Optional[str]) -> List[User]:
+        """Users holding `email` or `cpf` (None values are ignored), fetched in a single round trip."""
         pass
     @abstractmethod
-    def find_random_users(self, limit: int) -> List[User]:
+    def get_total_count(self, estimated: bool = False) -> int:
+        """`estimated` reads the database statistics instead of counting every user."""
+        pass
+    @abstractmethod
+    def find_random_users(self, limit: int, start_key: Optional[float] = None) -> List[User]:
+        """
+        `limit` random users. `start_key`, in [0, 1), picks the sample (a new
+        one when None): where the database allows it the same key picks the
+        same users again while the table does not change.
+        """
         pass
     @abstractmethod
     def find_random_users_by_birthday(self, limit: int) -> List[User]:
         pass
+    @abstractmethod
+    def iter_users(self, page_size: int) -> Iterator[User]:
+        """Streams every user, fetching `page_size` users per round trip."""
+        pass
+    @abstractmethod
+    def iter_sampled_users(self, rate: float, seed: int, page_size: int) -> Iterator[User]:
+        """
+        Streams a random subset of the users, each one kept with probability
+        `rate`, picked by the database. Where the database allows it the same
+        `seed` picks the same users again.
+        """
+        pass
+    @abstractmethod
+    def iter_users_by_birthday(self, day: date, page_size: int) -> Iterator[User]:
+        """Streams every user celebrating on `day` (Feb 29 birthdays on Feb 28 of non leap years)."""
+        pass
+
+class IEmailJobQueue(ABC):
+    @abstractmethod
+    def enqueue_campaign(self, campaign: RenderedCampaign, recipients: Iterable[str]) -> int:
+        """
+        Persists the campaign, then one job per recipient in committed batches
+        (workers may start on the first ones). Returns the number of jobs.
+        """
+        pass
+    @abstractmethod
+    def get_campaign(self, campaign_id: str) -> Optional[RenderedCampaign]:
+        pass
+    @abstractmethod
+    def reserve(self, visibility_timeout: float) -> Optional[EmailJob]:
+        """Takes the next due job. It goes back to the queue if not acked within `visibility_timeout` seconds."""
+        pass
+    @abstractmethod
+    def ack(self, job_id: int) -> None:
+        pass
+    @abstractmethod
+    def retry(self, job_id: int, delay: float, error: str) -> None:
+        pass
+    @abstractmethod
+    def dead_letter(self, job_id: int, error: str) -> None:
+        pass
+    @abstractmethod
+    def get_campaign_status(self, campaign_id: str) -> dict[str, int]:
+        pass
+
+class ICache(ABC):
+    """Key/value cache with per entry expiration. Any value, None included, can be cached."""
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        """Returns `default` when `key` is missing or expired."""
+        pass
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """`ttl` in seconds, None uses the cache default."""
+        pass
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        pass
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+    @abstractmethod
+    def get_stats(self) -> dict[str, int]:
+        pass
+
+class IChangeNotifier(ABC):
+    """Broadcasts that some shared state changed, so other replicas drop their cached copy."""
+    @abstractmethod
+    def publish(self, channel: str, message: str) -> None:
+        pass
+    @abstractmethod
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> None:
+        """`callback` receives the message, possibly from another thread."""
+        pass
 
 class ILogger(ABC):
     @abstractmethod
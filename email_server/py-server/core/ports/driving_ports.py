@@ -2,6 +2,7 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, List
 from uuid import UUID
+from fastapi import BackgroundTasks
 from core.domain.email import Email
 from core.domain.user import User
 from core.domain.sender_behavior_enum import SenderBehaviorEnum
@@ -9,7 +10,14 @@ from core.domain.template_catalog_enum import TemplateCatalogEnum
 
 class IEmailService(ABC):
     @abstractmethod
-    def send_emails(self, count: int, template_name: TemplateCatalogEnum, fill_values: dict[str, Any]) -> None:
+    def send_emails(self, 
+                    background_tasks: BackgroundTasks, 
+                    count: Optional[int], 
+                    subject: str, 
+                    template_name: TemplateCatalogEnum, 
+                    fill_values: dict[str, Any],
+                    seed: Optional[int] = None
+                    ) -> str:
         pass
 
     @abstractmethod
@@ -20,6 +28,14 @@ class IEmailService(ABC):
     def get_sender_behavior(self) -> SenderBehaviorEnum:
         pass
 
+    @abstractmethod
+    def get_send_metrics(self) -> dict[str, float | int]:
+        pass
+
+    @abstractmethod
+    def get_campaign_status(self, campaign_id: str) -> Optional[dict[str, int]]:
+        pass
+
 
 class IUserService(ABC):
     @abstractmethod
@@ -35,7 +51,8 @@ class IUserService(ABC):
         pass
 
     @abstractmethod
-    def get_total_users(self) -> Optional[User]:
+    def get_total_users(self, estimated: bool = False) -> int:
+        """`estimated` trades exactness for a count that doesn't scan the table."""
         pass
 
     # TODO
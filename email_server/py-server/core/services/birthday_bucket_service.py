@@ -0,0 +1,82 @@
+from datetime import date, datetime, time, timedelta
+import threading
+from typing import Optional
+from core.ports.driven_ports import IUserRepository, ILogger
+from core.domain.user import User
+from core.utils.birthday import birth_mmdd, birthday_keys
+
+
+class BirthdayBucketService:
+    """
+    Keeps, in memory, the recipients of the BY_BIRTHDAY campaigns of today
+    and of the next `days - 1` days: one bucket per day mapping user id ->
+    email. `refresh` rebuilds them once a day through the indexed birthday
+    lookup, and user creations/updates of this process are applied on the
+    fly, so a campaign trigger only reads a bucket.
+
+    Users written by other processes (another replica, the import pipeline)
+    show up on the next refresh.
+    """
+
+    def __init__(self, user_repository: IUserRepository, logger: ILogger, days: int, page_size: int):
+        self._user_repository = user_repository
+        self._logger = logger
+        self._days = days
+        self._page_size = page_size
+        self._buckets: dict[date, dict[str, str]] = {}
+        # Users changed while a refresh runs, applied again over its result
+        self._changed_during_refresh: Optional[dict[str, User]] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, today: Optional[date] = None) -> None:
+        today = today or date.today()
+        with self._lock:
+            self._changed_during_refresh = {}
+
+        try:
+            buckets = {}
+            for day in (today + timedelta(days=offset) for offset in range(self._days)):
+                buckets[day] = {
+                    str(user._id): user.email
+                    for user in self._user_repository.iter_users_by_birthday(day, self._page_size)
+                }
+        finally:
+            with self._lock:
+                changed, self._changed_during_refresh = self._changed_during_refresh, None
+
+        with self._lock:
+            self._buckets = buckets
+            for user in changed.values():
+                self._place(user)
+
+        sizes = ", ".join(f"{day:%d/%m}: {len(bucket)}" for day, bucket in buckets.items())
+        self._logger.log_info(f"Birthday buckets refreshed ({sizes}).")
+
+    def get_recipients(self, day: date) -> Optional[list[str]]:
+        """Emails of the users celebrating on `day`, None when that day is not materialized."""
+        with self._lock:
+            bucket = self._buckets.get(day)
+            return list(bucket.values()) if bucket is not None else None
+
+    def on_user_saved(self, user: User) -> None:
+        """Moves `user` to the buckets of its (possibly new) birth date, with its current email."""
+        with self._lock:
+            if self._changed_during_refresh is not None:
+                self._changed_during_refresh[str(user._id)] = user
+            self._place(user)
+
+    def seconds_until_next_refresh(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.now()
+        next_day = datetime.combine(now.date() + timedelta(days=1), time.min)
+        return (next_day - now).total_seconds()
+
+    ############################################################################
+    #### Private functions
+
+    def _place(self, user: User) -> None:
+        user_id, user_mmdd = str(user._id), birth_mmdd(user.birth_date)
+        for day, bucket in self._buckets.items():
+            if user_mmdd in birthday_keys(day):
+                bucket[user_id] = user.email
+            else:
+                bucket.pop(user_id, None)
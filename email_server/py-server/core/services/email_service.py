@@ -1,24 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import random
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
+from uuid import uuid4
 from datetime import date
 from email.mime.multipart import MIMEMultipart
-from email.mime.image import MIMEImage
 from email.mime.text import MIMEText
 
 from fastapi import BackgroundTasks
-from config.global_env_vars import (GOOGLE_SENDER_EMAIL) 
+from config.global_env_vars import (GOOGLE_SENDER_EMAIL, SMTP_POOL_SIZE, TEMPLATE_IMAGE_CACHE_MAX_BYTES, USERS_PAGE_SIZE) 
 from core.ports.driving_ports import IEmailService
-from core.ports.driven_ports import IEmailSender, ISenderBehaviorRepository, IUserRepository, ILogger
+from core.ports.driven_ports import IAsyncEmailSender, IEmailJobQueue, IEmailSender, ISenderBehaviorRepository, IUserRepository, ILogger
 from core.domain.email import Email
 from core.domain.user import User
+from core.domain.rendered_campaign import RenderedCampaign
 from core.domain.sender_behavior_enum import SenderBehaviorEnum
 from core.domain.template_catalog_enum import TemplateCatalogEnum
 from core.domain.email_templates import DISCOUNT_CUPOM_TEMPLATE
+from core.services.birthday_bucket_service import BirthdayBucketService
+from core.utils.template_cache import ImagePartCache
 
 
 CHANCE_HIGH = 0.85
 CHANCE_MODERATE = 0.50
 CHANCE_LOW = 0.25
+CHANCES_TO_SEND = {
+    SenderBehaviorEnum.LOW_CHANCE: CHANCE_LOW,
+    SenderBehaviorEnum.MODERATE_CHANCE: CHANCE_MODERATE,
+    SenderBehaviorEnum.HIGH_CHANCE: CHANCE_HIGH,
+}
 
 
 class EmailService(IEmailService):
@@ -26,40 +36,74 @@ class EmailService(IEmailService):
                  email_sender: IEmailSender, 
                  sender_behavior_repository: ISenderBehaviorRepository, 
                  user_repository: IUserRepository, 
-                 logger: ILogger
+                 logger: ILogger,
+                 async_email_sender: Optional[IAsyncEmailSender] = None,
+                 job_queue: Optional[IEmailJobQueue] = None,
+                 image_cache: Optional[ImagePartCache] = None,
+                 birthday_buckets: Optional[BirthdayBucketService] = None
                 ):
         self._email_sender = email_sender
+        self._async_email_sender = async_email_sender
+        self._job_queue = job_queue
         self._sender_behavior_repository = sender_behavior_repository
         self._user_repository = user_repository
         self._logger = logger
+        self._image_cache = image_cache or ImagePartCache(TEMPLATE_IMAGE_CACHE_MAX_BYTES)
+        self._birthday_buckets = birthday_buckets
 
     def send_emails(self, 
                     background_tasks: BackgroundTasks, 
-                    count: int, 
+                    count: Optional[int], 
                     subject: str, 
                     template_name: TemplateCatalogEnum, 
-                    fill_values: dict[str, Any]
-                    ) -> None:
+                    fill_values: dict[str, Any],
+                    seed: Optional[int] = None
+                    ) -> str:
+        """
+        Returns the campaign ID. Sending happens after the response is sent.
+        `count=None` sends to every user, streamed page by page. `seed`
+        repeats the random draws of a previous campaign over unchanged users,
+        except where the database can't seed them: MongoDB's random sample
+        and the birthday lookup when the daily buckets are not materialized.
+        """
+
+        campaign_id = str(uuid4())
         current_behavior = self._sender_behavior_repository.get_current_behavior()
-        chance_to_send: float = None
-
-        if current_behavior == SenderBehaviorEnum.NOT_DEFINED:
-            users = self._user_repository.find_random_users(count)
-            chance_to_send = 1.0
-        elif current_behavior == SenderBehaviorEnum.BY_BIRTHDAY:
-            users = self._user_repository.find_by_birthday(count)
-            chance_to_send = 1.0
-        elif current_behavior == SenderBehaviorEnum.LOW_CHANCE:
-            users = self._user_repository.find_random_users(count)
-            chance_to_send = CHANCE_LOW
-        elif current_behavior == SenderBehaviorEnum.MODERATE_CHANCE:
-            users = self._user_repository.find_random_users(count)
-            chance_to_send = CHANCE_MODERATE
-        elif current_behavior == SenderBehaviorEnum.HIGH_CHANCE:
-            users = self._user_repository.find_random_users(count)
-            chance_to_send = CHANCE_HIGH
+        chance_to_send = CHANCES_TO_SEND.get(current_behavior, 1.0)
+        # Logged, so any campaign can be drawn again by passing its seed
+        seed = seed if seed is not None else random.randrange(2**31)
+        rng = random.Random(seed)
+        users: Iterable[User]
+        recipients: Optional[Iterable[str]] = None
+
+        if current_behavior == SenderBehaviorEnum.BY_BIRTHDAY:
+            recipients = self._get_precomputed_birthday_recipients(count or USERS_PAGE_SIZE, rng)
+            if recipients is None:
+                users = self._user_repository.find_random_users_by_birthday(count or USERS_PAGE_SIZE)
+            selection = f"up to {count or USERS_PAGE_SIZE} of today's birthdays"
+        elif count is None and chance_to_send < 1.0:
+            # Lazy, and the coin flips happen in the database: only the kept users are fetched
+            users = self._user_repository.iter_sampled_users(chance_to_send, rng.randrange(2**31), USERS_PAGE_SIZE)
+            selection = f"every user with a {chance_to_send:.0%} chance"
+        elif count is None:
+            # Lazy: pages are only fetched as the sending consumes them
+            users = self._user_repository.iter_users(USERS_PAGE_SIZE)
+            selection = "every user"
+        else:
+            # One coin flip per user of a random sample of `count` keeps a
+            # Binomial(count, chance) number of them: draw that number and
+            # fetch only those (no draw needed when every user is kept)
+            selected = count if chance_to_send >= 1.0 else rng.binomialvariate(count, chance_to_send)
+            users = self._user_repository.find_random_users(selected, rng.random()) if selected > 0 else []
+            selection = f"{selected} of {count} random users ({chance_to_send:.0%} chance)"
+
+        self._logger.log_info(
+            f"Campaign {campaign_id}: behavior {current_behavior.value}, sending to {selection}, seed {seed}."
+        )
 
         mime_email = self._generate_email_body(template_name, fill_values)
+        # Serialized once per campaign, recipients only get their To header prepended
+        campaign = RenderedCampaign.from_mime(campaign_id, subject, mime_email)
         # mime_email['Subject'] = subject
         # mime_email['To'] = "victor6g0@gmail.com"
 
@@ -71,13 +115,16 @@ class EmailService(IEmailService):
         #     subject=subject,
         #     mime_email=mime_email
         # )
+        if recipients is None:
+            # Generator, so a streamed `users` is consumed page by page by the sender
+            recipients = (user.email for user in users)
+
         self._send_emails_in_background(
             background_tasks=background_tasks,
-            users=users, 
-            chance_to_send=chance_to_send,
-            subject=subject,
-            mime_email=mime_email
+            recipients=recipients,
+            campaign=campaign
         )
+        return campaign_id
     
 
     def change_sender_behavior(self, new_behavior: SenderBehaviorEnum) -> None:
@@ -85,6 +132,16 @@ class EmailService(IEmailService):
     
     def get_sender_behavior(self) -> SenderBehaviorEnum:
         return self._sender_behavior_repository.get_current_behavior()
+
+    def get_send_metrics(self) -> dict[str, float | int]:
+        if self._async_email_sender is None:
+            return {}
+        return self._async_email_sender.get_metrics().to_dict()
+
+    def get_campaign_status(self, campaign_id: str) -> Optional[dict[str, int]]:
+        if self._job_queue is None:
+            return None
+        return self._job_queue.get_campaign_status(campaign_id)
     
     ############################################################################
     #### Private functions 
@@ -139,10 +196,7 @@ class EmailService(IEmailService):
 
         try:
             image_path = f'core/domain/template_images/{img_name}'
-            with open(image_path, 'rb') as image_file:
-                image_part = MIMEImage(image_file.read())
-                image_part.add_header('Content-ID', '<promo_header>')
-                msg.attach(image_part)
+            msg.attach(self._image_cache.get(image_path, '<promo_header>'))
         except FileNotFoundError:
             self._logger.log_error(f"A imagem '{image_path}' não foi encontrada. O e-mail será enviado sem ela.")
 
@@ -151,53 +205,74 @@ class EmailService(IEmailService):
 
     def _send_emails_in_background(self,
                                    background_tasks: BackgroundTasks,
-                                   users: list[User],
-                                   chance_to_send: float,
-                                   subject: str,
-                                   mime_email: MIMEMultipart | MIMEText
+                                   recipients: Iterable[str],
+                                   campaign: RenderedCampaign
                                    ) -> None:
         """
         Send emails asyncronously to give response early.
         """
 
-        # succes_counter = 0
-        for i, user in enumerate(users):
-
-            if random.random() > chance_to_send:
-                self._logger.log_info(f"Skipping email {i+1} due to chance threshold.")
-                continue
-            
-            background_tasks.add_task(
-                self._send_email_in_background,
-                mime_email=mime_email,
-                subject=subject,
-                to=user.email
-            )
-            
-            # if was_sent:
-            #     succes_counter += 1
-
-        # if succes_counter == 0:
-        #     self._logger.log_info(f"Falha ao enviar todos os {count} e-mails.")
-        # elif succes_counter < count:
-        #     self._logger.log_info(f"Apenas {succes_counter}/{count} e-mails foram enviados com sucesso.")
-        # else:
-        #     self._logger.log_info(f"Todos os {count} e-mails foram enviados com sucesso.")
-        
+        if self._job_queue is not None:
+            # Durable: workers (worker.py) send the jobs, even after a restart.
+            # Enqueued after the response, the recipients may span many pages
+            background_tasks.add_task(self._enqueue_campaign, campaign, recipients)
+        elif self._async_email_sender is not None:
+            # One background task drives the whole campaign concurrently
+            background_tasks.add_task(self._async_email_sender.send_many, campaign, recipients)
+        else:
+            background_tasks.add_task(self._send_emails_in_threads, campaign, recipients)
+
+    def _enqueue_campaign(self, campaign: RenderedCampaign, recipients: Iterable[str]) -> None:
+        try:
+            jobs_count = self._job_queue.enqueue_campaign(campaign, recipients)
+        except Exception as e:
+            self._logger.log_error(f"Failed to enqueue campaign {campaign.campaign_id}.", e)
+            return
+        self._logger.log_info(f"Campaign {campaign.campaign_id} enqueued with {jobs_count} emails.")
+
+    def _get_precomputed_birthday_recipients(self, limit: int, rng: random.Random) -> Optional[list[str]]:
+        """Up to `limit` of today's celebrants, from the daily buckets. None when not materialized."""
+        if self._birthday_buckets is None:
+            return None
+        celebrants = self._birthday_buckets.get_recipients(date.today())
+        if celebrants is None:
+            return None
+        return rng.sample(celebrants, min(limit, len(celebrants)))
+
+    def _send_emails_in_threads(self, campaign: RenderedCampaign, recipients: Iterable[str]) -> None:
+        """
+        RenderedCampaign is immutable, so one campaign is safely shared by
+        as many sending threads as the SMTP pool has connections.
+        """
+
+        count = 0
+        succes_counter = 0
+        recipients = iter(recipients)
+        with ThreadPoolExecutor(max_workers=SMTP_POOL_SIZE) as executor:
+            # Executor.map submits everything at once, so feed it one page at a time
+            while page := list(islice(recipients, USERS_PAGE_SIZE)):
+                count += len(page)
+                succes_counter += sum(executor.map(
+                    lambda to: self._send_email_in_background(campaign, to),
+                    page
+                ))
+
+        if succes_counter == 0 and count > 0:
+            self._logger.log_info(f"Falha ao enviar todos os {count} e-mails.")
+        elif succes_counter < count:
+            self._logger.log_info(f"Apenas {succes_counter}/{count} e-mails foram enviados com sucesso.")
+        else:
+            self._logger.log_info(f"Todos os {count} e-mails foram enviados com sucesso.")
 
     def _send_email_in_background(self,
-                                   mime_email: MIMEMultipart | MIMEText,
-                                   subject: str,
+                                   campaign: RenderedCampaign,
                                    to: str
                                    ) -> bool:
         """
         Send emails asyncronously to give response early.
         """
 
-        mime_email['Subject'] = subject
-        mime_email['To'] = to
-            
-        was_sent = self._email_sender.send(mime_email, to)
+        was_sent = self._email_sender.send(campaign.for_recipient(to), to)
         if was_sent:
             self._logger.log_info(f"Email sent successfully to {to}")
         else:
@@ -3,29 +3,35 @@ from uuid import UUID
 from core.ports.driving_ports import IUserService
 from core.ports.driven_ports import IUserRepository, ILogger
 from core.domain.user import User
+from core.services.birthday_bucket_service import BirthdayBucketService
 from typing import Any, Optional
 
 class UserService(IUserService):
-    def __init__(self, user_repository: IUserRepository, logger: ILogger):
+    def __init__(self,
+                 user_repository: IUserRepository,
+                 logger: ILogger,
+                 birthday_buckets: Optional[BirthdayBucketService] = None
+                 ):
         self._user_repository = user_repository
         self._logger = logger
+        self._birthday_buckets = birthday_buckets
 
     def create_user(self, user_data: dict[str, Any]) -> User:
-        
-        # Validação
-        if self._user_repository.find_by_email(user_data["email"]):
-            raise ValueError("User with this email already exists.")
-        if self._user_repository.find_by_cpf(user_data["cpf"]):
-            raise ValueError("User with this CPF already exists.")
 
-        # Criação (CPU)
+        # Criação (CPU), antes de qualquer IO
         try:
             user = User(_id=None, created_at=None, **user_data)
         except ValueError as e:
             raise ValueError(f"Invalid user data: {e}")
 
-        # Banco de dados (IO)
+        # Validação: email e CPF numa única consulta
+        conflicts = self._user_repository.find_conflicts(user.email, user.cpf)
+        self._raise_on_conflict(conflicts, user.email, user.cpf, "User with this {} already exists.")
+
+        # Banco de dados (IO). Se outro cadastro ganhar a corrida, a constraint unique gera ValueError
         self._user_repository.save(user)
+        if self._birthday_buckets is not None:
+            self._birthday_buckets.on_user_saved(user)
         
         self._logger.log_info(f"User created: user_data={user_data}")
         return user
@@ -40,12 +46,11 @@ class UserService(IUserService):
         if not user:
             raise ValueError("User not found.")
         
-        if "email" in user_data and user_data["email"] != user.email:
-            if self._user_repository.find_by_email(user_data["email"]):
-                raise ValueError("New email already exists for another user.")
-        if "cpf" in user_data and user_data["cpf"] != user.cpf:
-            if self._user_repository.find_by_cpf(user_data["cpf"]):
-                raise ValueError("New CPF already exists for another user.")
+        new_email = user_data["email"] if user_data.get("email", user.email) != user.email else None
+        new_cpf = user_data["cpf"] if user_data.get("cpf", user.cpf) != user.cpf else None
+        if new_email or new_cpf:
+            conflicts = [other for other in self._user_repository.find_conflicts(new_email, new_cpf) if other._id != str(user._id)]
+            self._raise_on_conflict(conflicts, new_email, new_cpf, "New {} already exists for another user.")
 
         # Atualizar campos in memory
         for key, value in user_data.items():
@@ -59,6 +64,8 @@ class UserService(IUserService):
             raise ValueError(f"Invalid updated user data: {e}")
 
         self._user_repository.update(user)
+        if self._birthday_buckets is not None: # Birth date or email may have changed
+            self._birthday_buckets.on_user_saved(user)
         self._logger.log_info(f"User updated: {user.email}")
         return user
 
@@ -68,5 +75,19 @@ class UserService(IUserService):
     def get_user_by_email(self, email: str) -> Optional[User]:
         return self._user_repository.find_by_email(email)
 
-    def get_total_users(self) -> int:
-        return self._user_repository.get_total_count()
+    def get_total_users(self, estimated: bool = False) -> int:
+        return self._user_repository.get_total_count(estimated)
+
+    ############################################################################
+    #### Private functions
+
+    def _raise_on_conflict(self,
+                           conflicts: list[User],
+                           email: Optional[str],
+                           cpf: Optional[str],
+                           message: str
+                           ) -> None:
+        if email is not None and any(other.email == email for other in conflicts):
+            raise ValueError(message.format("email"))
+        if cpf is not None and any(other.cpf == cpf for other in conflicts):
+            raise ValueError(message.format("CPF"))
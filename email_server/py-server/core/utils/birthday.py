@@ -0,0 +1,17 @@
+import calendar
+from datetime import date
+
+
+def birth_mmdd(birth_date: date) -> str:
+    """Month-day key ("MM-DD") stored and indexed next to every birth_date."""
+    return birth_date.strftime("%m-%d")
+
+def birthday_keys(day: date) -> list[str]:
+    """
+    Keys of the users celebrating on `day`. Users born on Feb 29 celebrate
+    on Feb 28 when the year is not a leap year.
+    """
+    keys = [birth_mmdd(day)]
+    if (day.month, day.day) == (2, 28) and not calendar.isleap(day.year):
+        keys.append("02-29")
+    return keys
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from email.mime.image import MIMEImage
+import email.policy
+import os
+import threading
+
+
+class ImagePartCache:
+    """
+    LRU cache of template images already wrapped (and base64 encoded) as
+    MIMEImage parts. Bounded by the total encoded size and invalidated when
+    the image file modification time changes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._size = 0
+        # (path, content_id) -> (mtime_ns, part, encoded size)
+        self._entries: OrderedDict[tuple[str, str], tuple[int, MIMEImage, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, content_id: str) -> MIMEImage:
+        """
+        Raises FileNotFoundError if the image does not exist.
+        """
+
+        key = (path, content_id)
+        mtime_ns = os.stat(path).st_mtime_ns
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == mtime_ns:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        with open(path, 'rb') as image_file:
+            part = MIMEImage(image_file.read())
+        part.add_header('Content-ID', content_id)
+        size = len(part.get_payload())
+
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self._size -= old_entry[2]
+            self._entries[key] = (mtime_ns, part, size)
+            self._size += size
+            # Always keeps the newest entry, even if alone it exceeds the bound
+            while self._size > self._max_bytes and len(self._entries) > 1:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+        return part
+
+
+def prepend_headers(message: bytes, **headers: str) -> bytes:
+    """
+    Returns `message` (already serialized with CRLF line endings) with the
+    given headers added on top, RFC 2047 encoded when needed. Lets a campaign
+    body be serialized once and reused for every recipient.
+
+    prepend_headers(body, Subject="Olá", To="a@b.com")
+    """
+
+    policy = email.policy.SMTP
+    folded = "".join(
+        policy.header_factory(name, value).fold(policy=policy)
+        for name, value in headers.items()
+    )
+    return folded.encode("ascii") + message
+
+
+def replace_headers(message: bytes, **headers: str) -> bytes:
+    """
+    prepend_headers, after removing the headers of `message` with the same
+    names (folded continuation lines included).
+
+    replace_headers(message, From="promo@loja.com")
+    """
+
+    names = {name.lower().encode("ascii") for name in headers}
+    header_block, separator, body = message.partition(b"\r\n\r\n")
+    kept, dropping = [], False
+    for line in header_block.split(b"\r\n"):
+        if not line.startswith((b" ", b"\t")): # Not the continuation of the previous header
+            dropping = line.split(b":", 1)[0].strip().lower() in names
+        if not dropping:
+            kept.append(line)
+    return prepend_headers(b"\r\n".join(kept) + separator + body, **headers)
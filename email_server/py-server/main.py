@@ -1,17 +1,38 @@
+import asyncio
+import anyio.to_thread
 from fastapi import FastAPI
 from adapters.driving.http_adapter import HTTPAdapter
-from adapters.driven.smtp_adapter import SmtpAdapter
+from adapters.driven.smtp_pool_adapter import PooledSmtpAdapter
+from adapters.driven.sender_router import SenderRouter, create_smtp_sender_router
+from adapters.driven.async_smtp_adapter import AsyncSmtpAdapter
 from adapters.driven.logger_adapter import ConsoleLogger
+from adapters.driven.queue.sqlite_job_queue import SqliteJobQueue
 from adapters.driven.db.mongodb_repository import MongoDbRepository
 from adapters.driven.db.supabase_repository import SupabaseRepository
+from adapters.driven.db.postgres_repository import PostgresRepository
+from adapters.driven.db.cached_user_repository import CachedUserRepository
+from adapters.driven.db.cached_sender_behavior_repository import CachedSenderBehaviorRepository
+from core.services.birthday_bucket_service import BirthdayBucketService
 from core.services.email_service import EmailService
 from core.services.user_service import UserService
+from core.utils.ttl_cache import TTLCache
 from config.global_env_vars import (
+    BIRTHDAY_BUCKET_DAYS,
     DATABASE_TYPE,
+    EMAIL_DISPATCH_MODE,
+    HTTP_THREADPOOL_SIZE,
     IS_PROD, 
+    JOB_QUEUE_PATH,
     MONGO_URI, MONGO_DB_NAME, 
-    SUPABASE_URL, SUPABASE_SECRET_KEY
-    # USER, PASSWORD, HOST, PORT, DBNAME
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_READ_PREFERENCE,
+    SENDER_ROUTING, SENDER_COUNTS_FLUSH_INTERVAL, SENDER_FAILURE_THRESHOLD, SENDER_COOLDOWN,
+    SUPABASE_URL, SUPABASE_SECRET_KEY,
+    SUPABASE_HOST, SUPABASE_PORT, SUPABASE_USER, SUPABASE_PASSWORD, SUPABASE_DBNAME,
+    POSTGRES_POOL_MIN_SIZE, POSTGRES_POOL_MAX_SIZE, POSTGRES_POOL_TIMEOUT, POSTGRES_PREPARED_STATEMENTS,
+    USER_CACHE_MAX_SIZE, USER_CACHE_TTL, USER_CACHE_NEGATIVE_TTL, USER_COUNT_CACHE_TTL,
+    SENDER_BEHAVIOR_CACHE_TTL,
+    USERS_PAGE_SIZE
 )
 # from starlette.middleware.errors import ServerErrorMiddleware
 # from starlette.middleware.exceptions import DebugMiddleware
@@ -25,12 +46,21 @@ if not IS_PROD:
 
 # Output adapters
 logger = ConsoleLogger()
-email_sender = SmtpAdapter(logger)
+email_sender = PooledSmtpAdapter(logger)
+async_email_sender = AsyncSmtpAdapter(logger) if EMAIL_DISPATCH_MODE == "async" else None
+job_queue = SqliteJobQueue(JOB_QUEUE_PATH) if EMAIL_DISPATCH_MODE == "queue" else None
 user_repository = None
 sender_behavior_repository = None
 
-if DATABASE_TYPE == "mongo":
-    db_connector = MongoDbRepository(MONGO_URI, MONGO_DB_NAME)
+if DATABASE_TYPE in ("mongodb", "mongo"):
+    db_connector = MongoDbRepository(
+        MONGO_URI, MONGO_DB_NAME,
+        max_pool_size=MONGO_MAX_POOL_SIZE,
+        min_pool_size=MONGO_MIN_POOL_SIZE,
+        connect_timeout_ms=MONGO_CONNECT_TIMEOUT_MS,
+        server_selection_timeout_ms=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        read_preference=MONGO_READ_PREFERENCE
+    )
     user_repository = db_connector
     sender_behavior_repository = db_connector
     logger.log_info("Using MongoDB for user and email repositories.")
@@ -39,19 +69,70 @@ elif DATABASE_TYPE == "supabase":
     user_repository = db_connector
     sender_behavior_repository = db_connector
     logger.log_info("Using Supabase for user and email repositories.")
+elif DATABASE_TYPE == "postgres":
+    db_connector = PostgresRepository(
+        SUPABASE_HOST, SUPABASE_PORT, SUPABASE_USER, SUPABASE_PASSWORD, SUPABASE_DBNAME,
+        pool_min_size=POSTGRES_POOL_MIN_SIZE,
+        pool_max_size=POSTGRES_POOL_MAX_SIZE,
+        pool_timeout=POSTGRES_POOL_TIMEOUT,
+        prepare_threshold=0 if POSTGRES_PREPARED_STATEMENTS else None
+    )
+    user_repository = db_connector
+    sender_behavior_repository = db_connector
+    logger.log_info("Using Postgres (direct connection) for user and email repositories.")
 else:
     raise ValueError("Invalid DATABASE_TYPE specified in environment variables.")
 
+if SENDER_ROUTING:
+    sender_router = create_smtp_sender_router(
+        db_connector, logger,
+        flush_interval=SENDER_COUNTS_FLUSH_INTERVAL,
+        failure_threshold=SENDER_FAILURE_THRESHOLD,
+        cooldown=SENDER_COOLDOWN
+    )
+    if sender_router is None:
+        logger.log_info("SENDER_ROUTING is on but there is no active sending account, using the single account.")
+    else:
+        email_sender.close()
+        email_sender = sender_router
+        # The router is an IEmailSender: campaigns go through the thread pool dispatch
+        async_email_sender = None
+        logger.log_info("Spreading sends over the active sending accounts.")
+
+if USER_CACHE_MAX_SIZE > 0:
+    user_repository = CachedUserRepository(
+        user_repository,
+        TTLCache(max_size=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL),
+        negative_ttl=USER_CACHE_NEGATIVE_TTL,
+        count_ttl=USER_COUNT_CACHE_TTL
+    )
+if SENDER_BEHAVIOR_CACHE_TTL > 0:
+    # Other replicas see a change within the TTL. Pass an IChangeNotifier to make it immediate.
+    sender_behavior_repository = CachedSenderBehaviorRepository(
+        sender_behavior_repository,
+        TTLCache(max_size=1, ttl=SENDER_BEHAVIOR_CACHE_TTL)
+    )
+
 # Services
+birthday_buckets = BirthdayBucketService(
+    user_repository=user_repository,
+    logger=logger,
+    days=BIRTHDAY_BUCKET_DAYS,
+    page_size=USERS_PAGE_SIZE
+) if BIRTHDAY_BUCKET_DAYS > 0 else None
 user_service = UserService(
     user_repository=user_repository, 
-    logger=logger
+    logger=logger,
+    birthday_buckets=birthday_buckets
 )
 email_service = EmailService(
     email_sender=email_sender,
     sender_behavior_repository=sender_behavior_repository,
     user_repository=user_repository,
-    logger=logger
+    logger=logger,
+    async_email_sender=async_email_sender,
+    job_queue=job_queue,
+    birthday_buckets=birthday_buckets
 )
 
 # Input Adapters
@@ -63,5 +144,44 @@ http_adapter = HTTPAdapter(
 # Bind endpoints
 app.include_router(http_adapter.router)
 
+# Threads shared by run_in_threadpool (endpoints) and sync background tasks
+def _size_thread_pool() -> None:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = HTTP_THREADPOOL_SIZE
+app.add_event_handler("startup", _size_thread_pool)
+
+# Birthday buckets rebuilt at startup and then every midnight, off the event loop
+BIRTHDAY_REFRESH_RETRY_SECONDS = 300
+
+async def _refresh_birthday_buckets_daily() -> None:
+    while True:
+        try:
+            await anyio.to_thread.run_sync(birthday_buckets.refresh)
+            delay = birthday_buckets.seconds_until_next_refresh()
+        except Exception as e:
+            # Meanwhile BY_BIRTHDAY campaigns query the database, or use the buckets built the day before
+            logger.log_error("Failed to refresh the birthday buckets.", e)
+            delay = BIRTHDAY_REFRESH_RETRY_SECONDS
+        await asyncio.sleep(delay)
+
+_background_tasks: set[asyncio.Task] = set()
+def _start_birthday_buckets() -> None:
+    _background_tasks.add(asyncio.create_task(_refresh_birthday_buckets_daily()))
+def _stop_background_tasks() -> None:
+    for task in _background_tasks:
+        task.cancel()
+if birthday_buckets is not None:
+    app.add_event_handler("startup", _start_birthday_buckets)
+    app.add_event_handler("shutdown", _stop_background_tasks)
+
+# Release pooled SMTP sessions on shutdown
+app.add_event_handler("shutdown", email_sender.close)
+if isinstance(email_sender, SenderRouter):
+    app.add_event_handler("shutdown", lambda: logger.log_info(f"Emails sent today per account: {email_sender.get_sent_counts()}"))
+if isinstance(user_repository, CachedUserRepository):
+    app.add_event_handler("shutdown", lambda: logger.log_info(f"User cache stats: {user_repository.get_cache_stats()}"))
+if isinstance(db_connector, PostgresRepository):
+    # Last, the sender router still writes its counters on shutdown
+    app.add_event_handler("shutdown", db_connector.close)
+
 # Execute the application
 # uvicorn: uvicorn main:app --reload --port 7999
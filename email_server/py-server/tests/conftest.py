@@ -0,0 +1,10 @@
+from pathlib import Path
+import pytest
+
+
+@pytest.fixture
+def server_environment(monkeypatch):
+    """What EmailService expects from the server process to render templates."""
+    # Template images are looked up relative to the server folder
+    monkeypatch.chdir(Path(__file__).resolve().parents[1])
+    monkeypatch.setattr("core.services.email_service.GOOGLE_SENDER_EMAIL", "sender@example.com")
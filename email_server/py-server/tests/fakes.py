@@ -0,0 +1,88 @@
+from datetime import date
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+import threading
+from typing import Iterator, List, Optional
+from core.ports.driven_ports import IEmailSender, ILogger
+from core.domain.sender_behavior_enum import SenderBehaviorEnum
+from core.domain.user import User
+from core.utils.birthday import birth_mmdd, birthday_keys
+
+# Discount template values, with the banner shipped in core/domain/template_images
+FILL_VALUES = {
+    "image_name": "discount_banner_1200_by_400.png",
+    "discount_value": 10,
+    "cupom_code": "TESTE10",
+    "valid_dates_start": date(2026, 1, 1),
+    "valid_dates_end": date(2026, 1, 31),
+}
+
+
+class FakeEmailSender(IEmailSender):
+    """Keeps every message it is asked to send instead of sending it."""
+
+    def __init__(self, was_sent: bool = True):
+        self.was_sent = was_sent
+        self.sent: list[tuple[str, bytes]] = []
+        self._lock = threading.Lock()
+
+    def send(self, email: MIMEMultipart | MIMEText | bytes, to: str) -> bool:
+        with self._lock:
+            self.sent.append((to, email if isinstance(email, bytes) else email.as_bytes()))
+        return self.was_sent
+
+
+class FakeSenderBehaviorRepository:
+    def __init__(self, behavior: SenderBehaviorEnum = SenderBehaviorEnum.NOT_DEFINED):
+        self.behavior = behavior
+
+    def get_current_behavior(self) -> SenderBehaviorEnum:
+        return self.behavior
+
+    def update_behavior(self, new_behavior: SenderBehaviorEnum) -> None:
+        self.behavior = new_behavior
+
+
+class FakeUserRepository:
+    """In memory users, only the lookups used to pick campaign recipients."""
+
+    def __init__(self, users: List[User]):
+        self.users = users
+        self.calls: list[tuple] = [] # (method name, arguments), to check the selection
+
+    def find_random_users(self, limit: int, start_key: Optional[float] = None) -> List[User]:
+        self.calls.append(("find_random_users", limit, start_key))
+        return self.users[:limit]
+
+    def iter_users(self, page_size: int) -> Iterator[User]:
+        self.calls.append(("iter_users",))
+        return iter(self.users)
+
+    def iter_sampled_users(self, rate: float, seed: int, page_size: int) -> Iterator[User]:
+        self.calls.append(("iter_sampled_users", rate, seed))
+        return iter(self.users)
+
+    def iter_users_by_birthday(self, day: date, page_size: int) -> Iterator[User]:
+        self.calls.append(("iter_users_by_birthday", day))
+        keys = birthday_keys(day)
+        return iter([user for user in self.users if birth_mmdd(user.birth_date) in keys])
+
+
+class FakeLogger(ILogger):
+    def __init__(self):
+        self.infos: list[str] = []
+        self.errors: list[str] = []
+
+    def log_info(self, message: str) -> None:
+        self.infos.append(message)
+
+    def log_error(self, message: str, error: Optional[Exception] = None) -> None:
+        self.errors.append(message)
+
+
+def make_users(count: int) -> List[User]:
+    return [
+        User(_id=str(i), created_at=None, client_full_name=f"User {i}", birth_date=date(1990, 1, 1),
+             email=f"user{i}@{'x' * (i % 7)}example.com", telephone=None, cpf=f"{i:011d}")
+        for i in range(count)
+    ]
@@ -0,0 +1,104 @@
+from dataclasses import replace
+from datetime import date
+import threading
+from typing import Iterator
+from core.domain.user import User
+from core.services.birthday_bucket_service import BirthdayBucketService
+from tests.fakes import FakeLogger, FakeUserRepository
+
+TODAY = date(2026, 5, 17)
+
+
+def _user(i: int, birth_date: date) -> User:
+    return User(_id=str(i), created_at=None, client_full_name=f"User {i}", birth_date=birth_date,
+                email=f"user{i}@example.com", telephone=None, cpf=f"{i:011d}")
+
+
+def _service(users: list[User], days: int = 3) -> tuple[BirthdayBucketService, FakeUserRepository]:
+    user_repository = FakeUserRepository(users)
+    return BirthdayBucketService(user_repository, FakeLogger(), days=days, page_size=100), user_repository
+
+
+class _PausedUserRepository(FakeUserRepository):
+    """Reads the first birthday bucket, then waits for `resume` before handing it to the refresh."""
+
+    def __init__(self, users: list[User]):
+        super().__init__(users)
+        self.reading = threading.Event()
+        self.resume = threading.Event()
+
+    def iter_users_by_birthday(self, day: date, page_size: int) -> Iterator[User]:
+        users = list(super().iter_users_by_birthday(day, page_size))
+        if not self.reading.is_set():
+            self.reading.set()
+            assert self.resume.wait(timeout=5)
+        return iter(users)
+
+
+def test_buckets_hold_the_birthdays_of_the_next_days():
+    users = [_user(0, date(1990, 5, 17)), _user(1, date(1985, 5, 18)), _user(2, date(1970, 5, 18)), _user(3, date(1990, 6, 1))]
+    service, _ = _service(users)
+    assert service.get_recipients(TODAY) is None # Nothing materialized before the first refresh
+
+    service.refresh(TODAY)
+
+    assert service.get_recipients(TODAY) == ["user0@example.com"]
+    assert sorted(service.get_recipients(date(2026, 5, 18))) == ["user1@example.com", "user2@example.com"]
+    assert service.get_recipients(date(2026, 5, 19)) == []
+    assert service.get_recipients(date(2026, 5, 20)) is None # Past `days`
+
+
+def test_feb_28_bucket_includes_feb_29_births_in_non_leap_years():
+    users = [_user(0, date(2000, 2, 29)), _user(1, date(1990, 2, 28)), _user(2, date(1990, 3, 1))]
+
+    service, _ = _service(users, days=2)
+    service.refresh(date(2027, 2, 28))
+    assert sorted(service.get_recipients(date(2027, 2, 28))) == ["user0@example.com", "user1@example.com"]
+    assert service.get_recipients(date(2027, 3, 1)) == ["user2@example.com"]
+
+    service, _ = _service(users, days=2)
+    service.refresh(date(2028, 2, 28))
+    assert service.get_recipients(date(2028, 2, 28)) == ["user1@example.com"]
+    assert service.get_recipients(date(2028, 2, 29)) == ["user0@example.com"]
+
+
+def test_saved_users_move_between_buckets():
+    user = _user(0, date(1990, 5, 17))
+    service, _ = _service([user])
+    service.refresh(TODAY)
+
+    service.on_user_saved(replace(user, email="changed@example.com"))
+    assert service.get_recipients(TODAY) == ["changed@example.com"]
+
+    service.on_user_saved(replace(user, email="changed@example.com", birth_date=date(1990, 5, 19)))
+    assert service.get_recipients(TODAY) == []
+    assert service.get_recipients(date(2026, 5, 19)) == ["changed@example.com"]
+
+    service.on_user_saved(_user(1, date(2001, 5, 18))) # Created
+    assert service.get_recipients(date(2026, 5, 18)) == ["user1@example.com"]
+
+    service.on_user_saved(replace(user, birth_date=date(1990, 12, 25))) # Out of every materialized day
+    assert [service.get_recipients(day) for day in (TODAY, date(2026, 5, 18), date(2026, 5, 19))] == [
+        [], ["user1@example.com"], []
+    ]
+
+
+def test_users_saved_during_a_refresh_survive_it():
+    moved, renamed = _user(0, date(1990, 5, 17)), _user(1, date(1985, 5, 17))
+    user_repository = _PausedUserRepository([moved, renamed])
+    service = BirthdayBucketService(user_repository, FakeLogger(), days=3, page_size=100)
+
+    refresh = threading.Thread(target=service.refresh, args=(TODAY,))
+    refresh.start()
+    assert user_repository.reading.wait(timeout=5)
+
+    # The refresh already read today's bucket with the old values of both users
+    service.on_user_saved(replace(moved, birth_date=date(1990, 5, 19)))
+    service.on_user_saved(replace(renamed, email="renamed@example.com"))
+    service.on_user_saved(_user(2, date(2000, 5, 17))) # Created
+    user_repository.resume.set()
+    refresh.join(timeout=5)
+
+    assert not refresh.is_alive()
+    assert sorted(service.get_recipients(TODAY)) == ["renamed@example.com", "user2@example.com"]
+    assert service.get_recipients(date(2026, 5, 19)) == ["user0@example.com"]
@@ -0,0 +1,72 @@
+import asyncio
+import time
+import pytest
+from fastapi import BackgroundTasks
+from adapters.driven.async_smtp_adapter import AsyncSmtpAdapter
+from adapters.driven.queue.sqlite_job_queue import PENDING, SqliteJobQueue
+from core.domain.rendered_campaign import RenderedCampaign
+from core.services.email_service import EmailService
+from tests.fakes import FakeEmailSender, FakeLogger, FakeSenderBehaviorRepository, FakeUserRepository
+
+CAMPAIGN = RenderedCampaign(campaign_id="campaign-1", message=b"Subject: Test\r\n\r\nBody\r\n")
+PAGE_FETCH_SECONDS = 0.1
+
+
+def _paged_recipients(pages: int, page_size: int):
+    """Lazy recipients that block on every page, like a repository iter_users."""
+    for page in range(pages):
+        time.sleep(PAGE_FETCH_SECONDS)
+        yield from (f"user{page}-{i}@example.com" for i in range(page_size))
+
+
+class _DeliveredAsyncSmtpAdapter(AsyncSmtpAdapter):
+    async def _deliver(self, connection, message, to):
+        return True, connection
+
+
+def test_send_many_reads_lazy_recipients_off_the_event_loop():
+    async def run() -> tuple[int, float]:
+        sender = _DeliveredAsyncSmtpAdapter(FakeLogger(), concurrency=2, rate_limit_per_second=0)
+        heartbeats = []
+
+        async def heartbeat():
+            while True:
+                heartbeats.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        heartbeat_task = asyncio.create_task(heartbeat())
+        sent = await sender.send_many(CAMPAIGN, _paged_recipients(pages=3, page_size=10))
+        heartbeat_task.cancel()
+        return sent, max(later - earlier for earlier, later in zip(heartbeats, heartbeats[1:]))
+
+    sent, longest_stall = asyncio.run(run())
+    assert sent == 30
+    assert longest_stall < PAGE_FETCH_SECONDS / 2
+
+
+def test_queue_mode_enqueues_after_the_response_in_committed_batches(tmp_path):
+    job_queue = SqliteJobQueue(str(tmp_path / "jobs.sqlite3"), enqueue_batch_size=4)
+    service = EmailService(
+        FakeEmailSender(), FakeSenderBehaviorRepository(), FakeUserRepository([]), FakeLogger(), job_queue=job_queue
+    )
+
+    background_tasks = BackgroundTasks()
+    service._send_emails_in_background(background_tasks, _paged_recipients(pages=2, page_size=5), CAMPAIGN)
+    assert job_queue.get_campaign_status(CAMPAIGN.campaign_id)[PENDING] == 0
+
+    asyncio.run(background_tasks())
+    assert job_queue.get_campaign(CAMPAIGN.campaign_id) == CAMPAIGN
+    assert job_queue.get_campaign_status(CAMPAIGN.campaign_id)[PENDING] == 10
+
+
+def test_enqueue_campaign_commits_the_batches_already_read(tmp_path):
+    job_queue = SqliteJobQueue(str(tmp_path / "jobs.sqlite3"), enqueue_batch_size=4)
+
+    def failing_recipients():
+        yield from (f"user{i}@example.com" for i in range(9))
+        raise ConnectionError("page fetch failed")
+
+    with pytest.raises(ConnectionError):
+        job_queue.enqueue_campaign(CAMPAIGN, failing_recipients())
+    # Two full batches were committed before the third one failed
+    assert job_queue.get_campaign_status(CAMPAIGN.campaign_id)[PENDING] == 8
@@ -0,0 +1,52 @@
+import sys
+import pytest
+from fastapi import BackgroundTasks
+from core.domain.sender_behavior_enum import SenderBehaviorEnum
+from core.domain.template_catalog_enum import TemplateCatalogEnum
+from core.services.email_service import CHANCE_LOW, EmailService
+from tests.fakes import FILL_VALUES, FakeEmailSender, FakeLogger, FakeSenderBehaviorRepository, FakeUserRepository, make_users
+
+requires_binomialvariate = pytest.mark.skipif(
+    sys.version_info < (3, 12), reason="random.binomialvariate is new in Python 3.12"
+)
+
+
+def _select(behavior: SenderBehaviorEnum, count, seed=None) -> list[tuple]:
+    """Triggers a campaign and returns the repository lookups it made to pick the recipients."""
+    user_repository = FakeUserRepository(make_users(50))
+    service = EmailService(FakeEmailSender(), FakeSenderBehaviorRepository(behavior), user_repository, FakeLogger())
+    service.send_emails(BackgroundTasks(), count, "Cupom", TemplateCatalogEnum.DISCOUNT_CUPOM, FILL_VALUES, seed=seed)
+    return user_repository.calls
+
+
+def test_without_chance_every_requested_user_is_fetched_without_a_draw(server_environment):
+    [(method, selected, _)] = _select(SenderBehaviorEnum.NOT_DEFINED, 20)
+    assert (method, selected) == ("find_random_users", 20)
+
+
+def test_random_samples_repeat_with_the_same_seed(server_environment):
+    first = _select(SenderBehaviorEnum.NOT_DEFINED, 20, seed=7)
+    assert first == _select(SenderBehaviorEnum.NOT_DEFINED, 20, seed=7) # Same start key of the random_key scan
+    assert first != _select(SenderBehaviorEnum.NOT_DEFINED, 20, seed=8)
+
+
+def test_sampled_campaigns_repeat_with_the_same_seed(server_environment):
+    first = _select(SenderBehaviorEnum.LOW_CHANCE, None, seed=7)
+    assert first == _select(SenderBehaviorEnum.LOW_CHANCE, None, seed=7)
+    assert first[0][:2] == ("iter_sampled_users", CHANCE_LOW)
+    assert first != _select(SenderBehaviorEnum.LOW_CHANCE, None, seed=8)
+
+
+@requires_binomialvariate
+def test_binomial_draw_repeats_with_the_same_seed(server_environment):
+    draws = [_select(SenderBehaviorEnum.LOW_CHANCE, 1000, seed=seed)[0][1] for seed in (1, 1, 2)]
+    assert draws[0] == draws[1]
+    assert draws[0] != draws[2]
+    # Binomial(1000, 0.25): mean 250, standard deviation ~14
+    assert all(150 < selected < 350 for selected in draws)
+
+
+@requires_binomialvariate
+def test_binomial_draw_averages_to_the_chance(server_environment):
+    draws = [_select(SenderBehaviorEnum.MODERATE_CHANCE, 100, seed=seed)[0][1] for seed in range(200)]
+    assert 45 < sum(draws) / len(draws) < 55
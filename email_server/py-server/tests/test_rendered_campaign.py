@@ -0,0 +1,29 @@
+import asyncio
+import email
+import email.policy
+from fastapi import BackgroundTasks
+from core.domain.template_catalog_enum import TemplateCatalogEnum
+from core.services.email_service import EmailService
+from tests.fakes import FILL_VALUES, FakeEmailSender, FakeLogger, FakeSenderBehaviorRepository, FakeUserRepository, make_users
+
+
+def test_every_recipient_gets_the_same_message_with_a_single_to_header(server_environment):
+    users = make_users(25)
+    email_sender = FakeEmailSender()
+    logger = FakeLogger()
+    service = EmailService(email_sender, FakeSenderBehaviorRepository(), FakeUserRepository(users), logger)
+
+    background_tasks = BackgroundTasks()
+    service.send_emails(background_tasks, None, "Cupom", TemplateCatalogEnum.DISCOUNT_CUPOM, FILL_VALUES)
+    asyncio.run(background_tasks())
+
+    assert not logger.errors
+    assert sorted(to for to, _ in email_sender.sent) == sorted(user.email for user in users)
+    for to, message in email_sender.sent:
+        parsed = email.message_from_bytes(message, policy=email.policy.SMTP)
+        assert parsed.get_all("To") == [to]
+        assert parsed.get_all("Subject") == ["Cupom"]
+    # Nothing but the address changes from one recipient to the next
+    assert len({len(message) - len(to) for to, message in email_sender.sent}) == 1
+    bodies = {message.split(b"\r\n", 1)[1] for _, message in email_sender.sent}
+    assert len(bodies) == 1
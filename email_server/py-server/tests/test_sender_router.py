@@ -0,0 +1,164 @@
+from datetime import date
+import email
+import email.policy
+import random
+import smtplib
+import pytest
+from adapters.driven.sender_router import SenderRouter, create_smtp_sender_router
+from adapters.driven.smtp_pool_adapter import PooledSmtpAdapter, _PooledConnection
+from core.domain.send_result_enum import SendResultEnum
+from core.domain.sender_behavior import SenderBehavior
+from core.ports.driven_ports import IEmailSender
+from tests.fakes import FakeLogger
+
+MESSAGE = b"Subject: Test\r\n\r\nBody\r\n"
+
+
+class _ScriptedSender(IEmailSender):
+    """Result per recipient, SENT for the others."""
+
+    def __init__(self, results: dict[str, SendResultEnum] = None, default: SendResultEnum = SendResultEnum.SENT):
+        self.results = results or {}
+        self.default = default
+        self.attempts: list[str] = []
+        self.messages: list = []
+
+    def send(self, email, to: str) -> bool:
+        return self.send_with_result(email, to) == SendResultEnum.SENT
+
+    def send_with_result(self, email, to: str) -> SendResultEnum:
+        self.attempts.append(to)
+        self.messages.append(email)
+        return self.results.get(to, self.default)
+
+
+class _AccountRepository:
+    def __init__(self, senders: list[SenderBehavior] = None):
+        self.senders = senders or []
+        self.added: dict[str, int] = {}
+
+    def find_active_senders(self):
+        return self.senders
+
+    def get_sent_counts(self, day: date) -> dict[str, int]:
+        return dict(self.added)
+
+    def add_sent_counts(self, day: date, counts: dict[str, int]) -> None:
+        for name, sent in counts.items():
+            self.added[name] = self.added.get(name, 0) + sent
+
+
+def _router(*senders: tuple[str, int, IEmailSender], logger=None) -> SenderRouter:
+    routes = [
+        (SenderBehavior(_id=None, name=name, provider="smtp", max_daily_limit=1000, priority=priority), sender)
+        for name, priority, sender in senders
+    ]
+    return SenderRouter(routes, _AccountRepository(), logger or FakeLogger(), failure_threshold=3, cooldown=300)
+
+
+@pytest.fixture(autouse=True)
+def _seeded_account_choice():
+    random.seed(0)
+
+
+def test_refused_recipients_neither_fail_over_nor_pause_the_accounts():
+    bad_recipients = [f"bad{i}@example.com" for i in range(10)]
+    refused = {to: SendResultEnum.RECIPIENT_REFUSED for to in bad_recipients}
+    first, second = _ScriptedSender(refused), _ScriptedSender(refused)
+    router = _router(("first", 1, first), ("second", 1, second))
+
+    assert [router.send_with_result(MESSAGE, to) for to in bad_recipients] == [SendResultEnum.RECIPIENT_REFUSED] * 10
+    # One attempt per address, on a single account
+    assert len(first.attempts) + len(second.attempts) == 10
+
+    assert all(router.send(MESSAGE, f"good{i}@example.com") for i in range(10))
+    counts = router.get_sent_counts()
+    assert sum(counts.values()) == 10 # Refused sends gave their quota back
+    assert first.attempts[-1].startswith("good") and second.attempts[-1].startswith("good") # Nobody paused
+
+
+@pytest.mark.parametrize("failure", [SendResultEnum.THROTTLED, SendResultEnum.SENDER_FAILED])
+def test_throttled_or_failing_accounts_fail_over_and_cool_down(failure):
+    failing, healthy = _ScriptedSender(default=failure), _ScriptedSender()
+    logger = FakeLogger()
+    # The failing account is preferred (lower priority value), so it is tried first
+    router = _router(("failing", 1, failing), ("healthy", 100, healthy), logger=logger)
+
+    assert all(router.send(MESSAGE, f"user{i}@example.com") for i in range(20))
+    assert len(healthy.attempts) == 20
+    assert len(failing.attempts) == 3 # Paused after `failure_threshold` failures in a row
+    assert any("failing" in error and "paused" in error for error in logger.errors)
+    assert router.get_sent_counts() == {"failing": 0, "healthy": 20}
+
+
+class _FakeSmtpServer:
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.sent: list[tuple] = []
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        if self.error is not None:
+            raise self.error
+        self.sent.append((from_addr, to_addrs, msg))
+
+    def quit(self):
+        pass
+
+
+@pytest.mark.parametrize("error, expected", [
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"5.1.1 User unknown")}), SendResultEnum.RECIPIENT_REFUSED),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (421, b"4.7.0 Try again later")}), SendResultEnum.THROTTLED),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (452, b"4.5.3 Too many recipients")}), SendResultEnum.THROTTLED),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"5.7.1 Unusual rate of mail")}), SendResultEnum.THROTTLED),
+    (smtplib.SMTPSenderRefused(451, b"4.7.1 Rate limited", "sender@example.com"), SendResultEnum.THROTTLED),
+    (smtplib.SMTPDataError(554, b"5.6.0 Message rejected"), SendResultEnum.SENDER_FAILED),
+    (smtplib.SMTPAuthenticationError(535, b"5.7.8 Bad credentials"), SendResultEnum.SENDER_FAILED),
+    (ConnectionRefusedError("connection refused"), SendResultEnum.SENDER_FAILED),
+])
+def test_pooled_sender_classifies_smtp_failures(monkeypatch, error, expected):
+    monkeypatch.setattr(PooledSmtpAdapter, "_open_connection", lambda self: _PooledConnection(_FakeSmtpServer(error)))
+    sender = PooledSmtpAdapter(FakeLogger(), pool_size=1, host="localhost", port=25, username="sender@example.com")
+
+    assert sender.send_with_result(MESSAGE, "a@example.com") == expected
+    assert sender.send(MESSAGE, "a@example.com") is False
+
+
+def test_each_account_sends_with_its_own_envelope_sender_and_from_header(monkeypatch):
+    servers: dict[str, _FakeSmtpServer] = {}
+    monkeypatch.setattr(
+        PooledSmtpAdapter, "_open_connection",
+        lambda self: _PooledConnection(servers.setdefault(self._host, _FakeSmtpServer()))
+    )
+    accounts = [
+        SenderBehavior(_id=None, name="sendgrid", provider="sendgrid", max_daily_limit=None, priority=1, config={
+            "host": "smtp.sendgrid.net", "username": "apikey", "password": "SG.secret", "from_email": "promo@loja.com.br"
+        }),
+        SenderBehavior(_id=None, name="gmail", provider="gmail", max_daily_limit=None, priority=1, config={
+            "host": "smtp.gmail.com", "username": "loja@gmail.com", "password": "app password"
+        }),
+    ]
+    router = create_smtp_sender_router(_AccountRepository(accounts), FakeLogger())
+    message = b"From: sender@example.com\r\nSubject: Test\r\n\r\nBody\r\n"
+
+    assert all(router.send(message, f"user{i}@example.com") for i in range(40))
+
+    # Message From header aligned with the envelope sender of each account
+    expected = {"smtp.sendgrid.net": "promo@loja.com.br", "smtp.gmail.com": "loja@gmail.com"}
+    assert set(servers) == set(expected)
+    for host, server in servers.items():
+        for from_addr, _, sent in server.sent:
+            assert from_addr == expected[host]
+            parsed = email.message_from_bytes(sent, policy=email.policy.SMTP)
+            # Accounts without from_email keep the From header of the message
+            assert parsed.get_all("From") == [expected[host] if host == "smtp.sendgrid.net" else "sender@example.com"]
+            assert parsed.get_content().strip() == "Body"
+
+
+def test_from_email_replaces_a_folded_from_header():
+    route_sender = _ScriptedSender()
+    behavior = SenderBehavior(_id=None, name="ses", provider="aws_ses", priority=1, config={"from_email": "promo@loja.com.br"})
+    router = SenderRouter([(behavior, route_sender)], _AccountRepository(), FakeLogger())
+
+    message = b"Subject: Test\r\nFrom: Loja\r\n <sender@example.com>\r\nX-Campaign: 1\r\n\r\nFrom: body line\r\n"
+    assert router.send(message, "user@example.com")
+    assert route_sender.messages == [b"From: promo@loja.com.br\r\nSubject: Test\r\nX-Campaign: 1\r\n\r\nFrom: body line\r\n"]
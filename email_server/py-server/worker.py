@@ -0,0 +1,91 @@
+"""
+Consumes the email job queue filled by `POST /emails/send-emails` when
+EMAIL_DISPATCH_MODE=queue. Runs apart from the HTTP server, as many processes
+as needed on the same host as it (the queue is a local SQLite file):
+
+    python worker.py --processes 4
+"""
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import random
+import time
+from adapters.driven.logger_adapter import ConsoleLogger
+from adapters.driven.smtp_pool_adapter import PooledSmtpAdapter
+from adapters.driven.queue.sqlite_job_queue import SqliteJobQueue
+from core.ports.driven_ports import IEmailJobQueue, IEmailSender, ILogger
+from core.domain.email_job import EmailJob
+from core.domain.rendered_campaign import RenderedCampaign
+from config.global_env_vars import (
+    JOB_QUEUE_PATH,
+    JOB_MAX_ATTEMPTS, JOB_RETRY_BASE_DELAY, JOB_VISIBILITY_TIMEOUT,
+    WORKER_PROCESSES
+)
+
+IDLE_SLEEP_SECONDS = 1.0
+# Rendered campaigns kept per worker, least recently used evicted first
+CAMPAIGN_CACHE_SIZE = 8
+
+
+def process_job(job: EmailJob,
+                job_queue: IEmailJobQueue,
+                email_sender: IEmailSender,
+                campaign: RenderedCampaign,
+                logger: ILogger
+                ) -> bool:
+    if email_sender.send(campaign.for_recipient(job.recipient), job.recipient):
+        job_queue.ack(job._id)
+        return True
+
+    error = f"Failed to send email to {job.recipient}"
+    if job.attempts >= JOB_MAX_ATTEMPTS:
+        job_queue.dead_letter(job._id, error)
+        logger.log_error(f"Job {job._id} dead-lettered after {job.attempts} attempts: {error}")
+    else:
+        # Exponential backoff with jitter so retries of a failing provider spread out
+        delay = JOB_RETRY_BASE_DELAY * 2 ** (job.attempts - 1) * random.uniform(0.5, 1.5)
+        job_queue.retry(job._id, delay, error)
+        logger.log_info(f"Job {job._id} will be retried in {delay:.0f}s (attempt {job.attempts}/{JOB_MAX_ATTEMPTS})")
+    return False
+
+
+def run_worker(worker_index: int) -> None:
+    logger = ConsoleLogger()
+    job_queue = SqliteJobQueue(JOB_QUEUE_PATH)
+    email_sender = PooledSmtpAdapter(logger, pool_size=1)
+    campaigns: OrderedDict[str, RenderedCampaign] = OrderedDict() # campaigns are immutable, safe to keep
+
+    logger.log_info(f"Worker {worker_index} consuming jobs from {JOB_QUEUE_PATH}")
+    try:
+        while True:
+            job = job_queue.reserve(JOB_VISIBILITY_TIMEOUT)
+            if job is None:
+                time.sleep(IDLE_SLEEP_SECONDS)
+                continue
+
+            campaign = campaigns.get(job.campaign_id)
+            if campaign is None:
+                campaign = job_queue.get_campaign(job.campaign_id)
+                if campaign is None:
+                    job_queue.dead_letter(job._id, f"Campaign {job.campaign_id} not found")
+                    continue
+                campaigns[job.campaign_id] = campaign
+                if len(campaigns) > CAMPAIGN_CACHE_SIZE:
+                    campaigns.popitem(last=False)
+            else:
+                campaigns.move_to_end(job.campaign_id)
+
+            process_job(job, job_queue, email_sender, campaign, logger)
+    finally:
+        email_sender.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Email job queue worker")
+    parser.add_argument("--processes", type=int, default=WORKER_PROCESSES, help="Number of worker processes.")
+    args = parser.parse_args()
+
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        futures = [executor.submit(run_worker, i) for i in range(args.processes)]
+        for future in futures:
+            future.result()
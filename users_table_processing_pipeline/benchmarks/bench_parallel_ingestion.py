@@ -0,0 +1,79 @@
+"""
+Reading + cleaning throughput of the sequential pipeline vs the parallel one
+with 1..N worker processes, on a generated patients CSV (nothing uploaded).
+
+    python -m benchmarks.bench_parallel_ingestion --rows 400000 --max-workers 4
+
+Pass `--file` to measure an existing CSV instead of a generated one.
+"""
+import argparse
+from contextlib import redirect_stdout
+import io
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from ingestion import run_pipeline
+from parallel_ingestion import run_parallel_pipeline
+
+
+def write_patients_csv(path: str, rows: int, seed: int = 0) -> None:
+    """Patients table shaped like the real export: `;` separated, latin1, some invalid rows."""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(rows)
+    birth = pd.to_datetime("1940-01-01") + pd.to_timedelta(rng.integers(0, 365 * 80, rows), unit="D")
+    df = pd.DataFrame({
+        "Nome": "Paciente " + pd.Series(ids).astype(str),
+        "DataNascimento": np.where(rng.random(rows) < 0.5, birth.strftime("%d/%m/%Y"), birth.strftime("%Y-%m-%d")),
+        "Email": "paciente" + pd.Series(ids).astype(str) + "@example.com",
+        "Telefone_1": np.where(rng.random(rows) < 0.3, "", "(11) 9" + pd.Series(rng.integers(10**7, 10**8, rows)).astype(str)),
+        "Telefone_2": "11 3" + pd.Series(rng.integers(10**6, 10**7, rows)).astype(str),
+        "CPF": pd.Series(rng.integers(10**10, 10**11, rows)).astype(str),
+    })
+    df.loc[rng.random(rows) < 0.05, "CPF"] = "invalido"
+    df.loc[rng.random(rows) < 0.05, "Email"] = ""
+    df.to_csv(path, sep=";", index=False, encoding="latin1")
+
+
+def _seconds(run) -> tuple[float, int]:
+    users = 0
+
+    def count_users(users_df: pd.DataFrame) -> None:
+        nonlocal users
+        users += len(users_df)
+
+    started_at = time.perf_counter()
+    with redirect_stdout(io.StringIO()): # The pipelines print every chunk
+        run(count_users)
+    return time.perf_counter() - started_at, users
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", default=None, help="Existing CSV, generated when omitted.")
+    parser.add_argument("--rows", type=int, default=400_000)
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = args.file
+        if filepath is None:
+            filepath = os.path.join(tmp_dir, "patients.csv")
+            write_patients_csv(filepath, args.rows)
+
+        sequential, expected_users = _seconds(lambda upload: run_pipeline(filepath, "big", args.chunksize, upload))
+        print(f"{os.path.getsize(filepath) / 1024 / 1024:.0f} MB, {expected_users} valid users, {os.cpu_count()} cores")
+        print(f"sequential:  {sequential:6.2f} s")
+        for workers in range(1, args.max_workers + 1):
+            elapsed, users = _seconds(
+                lambda upload: run_parallel_pipeline(filepath, "big", args.chunksize, upload, workers)
+            )
+            if users != expected_users:
+                raise RuntimeError(f"{workers} workers gave {users} users instead of {expected_users}.")
+            print(f"{workers:2d} worker(s): {elapsed:6.2f} s  ({sequential / elapsed:4.2f}x sequential)")
+
+
+if __name__ == "__main__":
+    main()
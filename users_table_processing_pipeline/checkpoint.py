@@ -0,0 +1,52 @@
+from dataclasses import asdict, dataclass
+import hashlib
+import json
+import os
+from typing import Optional
+
+
+@dataclass
+class Checkpoint:
+    """
+    Progress of an import, saved after every chunk that was fully uploaded.
+    Only valid for the exact same source file (`source_sha256`) going to the
+    same database (`destination`), read the same way (`source_format`).
+    """
+    source_sha256: str
+    destination: str
+    source_format: str = "csv" # "csv" counts CSV rows, "parquet" counts cached users
+    rows_done: int = 0 # CSV data rows (header excluded) already uploaded
+    byte_offset: Optional[int] = None # Where those rows end in the file, known only in parallel mode
+    chunks_done: int = 0
+    completed: bool = False
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Checkpoint"]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls(**json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def save(self, path: str) -> None:
+        # Write + rename, so a crash never leaves a half written checkpoint
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def matches(self, source_sha256: str, destination: str, source_format: str) -> bool:
+        # A completed import is done however the next run would read the file
+        return (self.source_sha256 == source_sha256
+                and self.destination == destination
+                and (self.source_format == source_format or self.completed))
+
+
+def file_sha256(filepath: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
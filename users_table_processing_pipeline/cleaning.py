@@ -0,0 +1,133 @@
+from typing import Literal
+import pandas as pd
+
+################################################################################
+#### Escolhendo colunas e limpando as linhas
+
+COLUMNS_TO_LOOK_FOR = {
+    "client_full_name": ["nome", "nomecivil"],
+    "birth_date": ["datanascimento"],
+    "email": ["email"],
+    "telephone": ["telefone_1", "telefone_2", "telefone_3", "telefone_4"], # Prioritizing multiple telephone columns
+    "cpf": ["cpf"],
+}
+
+ESSENTIAL_FIELDS = ["client_full_name", "birth_date", "email", "cpf"]
+
+
+def clean_and_transform_dataframe(df: pd.DataFrame,
+                                  file_type: Literal["big", "small"]
+                                  ) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Vectorized cleaning of a raw patients table. Returns `(users, rejects)`:
+    the valid users with the columns of COLUMNS_TO_LOOK_FOR, and the dropped
+    rows (original index) with a `reason` column explaining why.
+    """
+
+    # Lowercased view of the columns, without copying the data
+    columns = {col.lower().strip(): df[col] for col in df.columns}
+
+    raw = {
+        user_field: _first_non_null(columns, csv_cols_options, df.index)
+        for user_field, csv_cols_options in COLUMNS_TO_LOOK_FOR.items()
+    }
+
+    users = pd.DataFrame({
+        "client_full_name": _to_stripped_text(raw["client_full_name"]),
+        "birth_date": _parse_birth_date(raw["birth_date"]),
+        "email": _to_stripped_text(raw["email"]),
+        "telephone": _normalize_telephone(raw["telephone"]),
+        "cpf": _normalize_cpf(raw["cpf"]),
+    }, index=df.index)
+
+    # Empty strings count as missing, same as None
+    present = users[ESSENTIAL_FIELDS].notna() & users[ESSENTIAL_FIELDS].ne("")
+    is_valid = present.all(axis=1)
+
+    problems = {}
+    for field in ESSENTIAL_FIELDS:
+        if field in ("birth_date", "cpf"):
+            # A value that was there but could not be parsed is "invalid"
+            problems[f"invalid {field}"] = ~present[field] & _is_truthy(raw[field])
+            problems[f"missing {field}"] = ~present[field] & ~_is_truthy(raw[field])
+        else:
+            problems[f"missing {field}"] = ~present[field]
+    problems = pd.DataFrame(problems)
+
+    rejects = users.loc[~is_valid].copy()
+    rejected_problems = problems.loc[~is_valid]
+    rejects["reason"] = rejected_problems.dot(rejected_problems.columns + ", ").str.rstrip(", ")
+
+    return users.loc[is_valid].reset_index(drop=True), rejects
+
+
+################################################################################
+#### Private functions
+
+def _first_non_null(columns: dict[str, pd.Series], options: list[str], index: pd.Index) -> pd.Series:
+    """
+    First non null value among the `options` columns that exist, like the
+    fallback between e.g. telefone_1, telefone_2, ...
+    """
+
+    result = pd.Series(None, index=index, dtype=object)
+    for col_name_option in reversed(options):
+        if col_name_option in columns:
+            result = columns[col_name_option].astype(object).combine_first(result)
+    return result
+
+
+def _is_truthy(raw: pd.Series) -> pd.Series:
+    # Element wise `bool(value)` for not null values ('' and 0 are falsy)
+    return raw.notna() & raw.astype(bool)
+
+
+def _where(values: pd.Series, mask: pd.Series) -> pd.Series:
+    # Object dtype with None for missing values, like a list of dicts would give
+    return values.astype(object).where(mask, None)
+
+
+def _only_strings(raw: pd.Series) -> pd.Series:
+    try:
+        return raw.where(raw.str.len().notna()) # .str yields NaN for non strings
+    except AttributeError: # Column without a single string
+        return pd.Series(None, index=raw.index, dtype=object)
+
+
+def _to_stripped_text(raw: pd.Series) -> pd.Series:
+    return _where(raw.astype(str).str.strip(), raw.notna())
+
+
+def _parse_birth_date(raw: pd.Series) -> pd.Series:
+    """
+    DD/MM/YYYY or YYYY-MM-DD strings -> ISO date string. Anything else -> None.
+    """
+
+    text = _only_strings(raw)
+    has_slash = text.str.contains("/", regex=False, na=False)
+    has_dash = ~has_slash & text.str.contains("-", regex=False, na=False)
+
+    parsed = pd.to_datetime(text.where(has_slash), format="%d/%m/%Y", errors="coerce")
+    parsed = parsed.fillna(pd.to_datetime(text.where(has_dash), format="%Y-%m-%d", errors="coerce"))
+
+    # Built from the fields: strftime("%Y") does not zero pad years below 1000
+    # ("990-02-01"), date.isoformat() does ("0990-02-01")
+    iso_date = (
+        parsed.dt.year.astype("Int64").astype(str).str.zfill(4) + "-"
+        + parsed.dt.month.astype("Int64").astype(str).str.zfill(2) + "-"
+        + parsed.dt.day.astype("Int64").astype(str).str.zfill(2)
+    )
+    return _where(iso_date, parsed.notna())
+
+
+def _normalize_telephone(raw: pd.Series) -> pd.Series:
+    phone_str = raw.astype(str).str.strip()
+    digits = phone_str.str.replace(r"[^0-9]", "", regex=True)
+    phone = digits.where(~phone_str.str.startswith("+"), "+" + digits)
+    return _where(phone, _is_truthy(raw) & phone.ne(""))
+
+
+def _normalize_cpf(raw: pd.Series) -> pd.Series:
+    cpf_str = raw.astype(str).str.replace(".", "", regex=False).str.replace("-", "", regex=False).str.strip()
+    is_valid = cpf_str.str.isdigit() & cpf_str.str.len().eq(11)
+    return _where(cpf_str, _is_truthy(raw) & is_valid)
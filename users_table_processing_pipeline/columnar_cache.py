@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+from typing import Callable, Literal, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import cleaning
+from checkpoint import Checkpoint
+from cleaning import COLUMNS_TO_LOOK_FOR
+from ingestion import PipelineStats
+
+CACHE_DIR = 'sensitive_data/cache'
+
+# Every cleaned column is text (dates as ISO strings), see clean_and_transform_dataframe
+USERS_SCHEMA = pa.schema([(user_field, pa.string()) for user_field in COLUMNS_TO_LOOK_FOR])
+_STATS_METADATA_KEY = "pipeline_stats"
+
+
+def cache_path_for(source_sha256: str, file_type: Literal["big", "small"], cache_dir: str = CACHE_DIR) -> str:
+    """
+    One cache file per source content, file type and version of the cleaning
+    code: changing cleaning.py never serves users cleaned by the old rules.
+    """
+    return os.path.join(cache_dir, f"{source_sha256[:16]}_{file_type}_{_cleaning_version()}.parquet")
+
+
+class ParquetCacheWriter:
+    """
+    Appends every cleaned chunk as a Parquet row group while the pipeline
+    runs. The file only appears at `path` after `finish`, so an interrupted
+    run never leaves a partial cache behind.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._tmp_path = f"{path}.tmp"
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def wrap(self, upload: Callable[[pd.DataFrame], None]) -> Callable[[pd.DataFrame], None]:
+        def write_and_upload(users_df: pd.DataFrame) -> None:
+            self.write(users_df)
+            upload(users_df)
+        return write_and_upload
+
+    def write(self, users_df: pd.DataFrame) -> None:
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            self._writer = pq.ParquetWriter(self._tmp_path, USERS_SCHEMA, compression="zstd")
+        self._writer.write_table(pa.Table.from_pandas(users_df, schema=USERS_SCHEMA, preserve_index=False))
+
+    def finish(self, stats: PipelineStats) -> None:
+        if self._writer is None: # No valid user at all, still cache the empty result
+            self.write(pd.DataFrame({user_field: pd.Series(dtype=object) for user_field in COLUMNS_TO_LOOK_FOR}))
+
+        self._writer.add_key_value_metadata({_STATS_METADATA_KEY: json.dumps({
+            "rows_read": stats.rows_read,
+            "reject_reasons": stats.reject_reasons,
+        })})
+        self._writer.close()
+        os.replace(self._tmp_path, self._path)
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            os.remove(self._tmp_path)
+
+
+def run_cached_pipeline(cache_path: str,
+                        chunksize: Optional[int],
+                        upload: Callable[[pd.DataFrame], None],
+                        checkpoint: Optional[Checkpoint] = None,
+                        checkpoint_path: Optional[str] = None
+                        ) -> PipelineStats:
+    """
+    Uploads users already cleaned by a previous run, reading the memory
+    mapped Parquet file `chunksize` users at a time instead of parsing and
+    cleaning the CSV again. Checkpoints count users (not CSV rows) here.
+    """
+
+    cache = pq.ParquetFile(cache_path, memory_map=True)
+    cached_stats = json.loads(cache.metadata.metadata[_STATS_METADATA_KEY.encode()])
+
+    stats = PipelineStats()
+    skip_users = checkpoint.rows_done if checkpoint else 0
+    stats.rows_resumed = skip_users
+    if not skip_users:
+        stats.add_reject_reasons(cached_stats["reject_reasons"])
+
+    position = 0
+    for batch in cache.iter_batches(batch_size=chunksize or max(cache.metadata.num_rows, 1)):
+        batch_start, position = position, position + batch.num_rows
+        if position <= skip_users:
+            continue
+        batch = batch.slice(max(skip_users - batch_start, 0))
+
+        # Object columns with None for missing values, same as the cleaning output
+        df_processed = pd.DataFrame(batch.to_pydict(), dtype=object)
+        stats.chunks += 1
+        stats.rows_read += len(df_processed)
+        stats.rows_valid += len(df_processed)
+        if not df_processed.empty:
+            upload(df_processed)
+
+        if checkpoint:
+            checkpoint.rows_done = skip_users + stats.rows_read
+            checkpoint.chunks_done += 1
+            checkpoint.save(checkpoint_path)
+        print(f"Cached chunk {stats.chunks}: {stats.rows_read} users read so far ({stats.rows_per_second:,.0f} rows/s)")
+
+    if checkpoint:
+        checkpoint.completed = True
+        checkpoint.save(checkpoint_path)
+    return stats
+
+
+def _cleaning_version() -> str:
+    with open(cleaning.__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:8]
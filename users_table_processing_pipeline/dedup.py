@@ -0,0 +1,131 @@
+from typing import Callable, Iterable
+import numpy as np
+import pandas as pd
+
+
+class _KeySet:
+    """
+    Set of uint64 keys kept as one sorted numpy array: 8 bytes per key,
+    against ~60 for a python set of ints, which matters with millions of users.
+    """
+
+    def __init__(self):
+        self._keys = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        if len(self._keys) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        return self._keys[positions] == keys
+
+    def add(self, keys: np.ndarray) -> None:
+        # Linear merge of the sorted new keys, cheaper than re-sorting everything (np.union1d)
+        new_keys = np.unique(keys)
+        new_keys = new_keys[~self.contains(new_keys)]
+        self._keys = np.insert(self._keys, np.searchsorted(self._keys, new_keys), new_keys)
+
+
+class DedupIndex:
+    """
+    Drops, before the upload, users whose CPF or email was already seen in
+    this file or already exists in the database (when preloaded). CPFs are
+    indexed as ints and emails (trimmed, lowercased) as 64 bit hashes.
+
+    The index covers what this run has read: after resuming from a
+    checkpoint, preload the database keys to also catch the earlier rows.
+    """
+
+    def __init__(self):
+        self._file_cpfs = _KeySet()
+        self._file_emails = _KeySet()
+        self._database_cpfs = _KeySet()
+        self._database_emails = _KeySet()
+        self.dropped: dict[str, int] = {}
+
+    def wrap(self, upload: Callable[[pd.DataFrame], None]) -> Callable[[pd.DataFrame], None]:
+        def dedup_and_upload(users_df: pd.DataFrame) -> None:
+            new_users, _ = self.filter(users_df)
+            if not new_users.empty:
+                upload(new_users)
+        return dedup_and_upload
+
+    def preload(self, existing_keys: Iterable[pd.DataFrame]) -> int:
+        """Indexes the `cpf`/`email` columns of `existing_keys`, returns how many users were read."""
+        total = 0
+        for keys_df in existing_keys:
+            keys_df = keys_df.dropna(subset=["cpf", "email"])
+            # Rows saved by other means may have a formatted CPF, compare digits only
+            cpfs = keys_df["cpf"].astype(str).str.replace(r"[^0-9]", "", regex=True)
+            keys_df = keys_df.loc[cpfs.str.len().between(1, 18)]
+            self._database_cpfs.add(_cpf_keys(cpfs.loc[keys_df.index]))
+            self._database_emails.add(_email_keys(keys_df["email"]))
+            total += len(keys_df)
+        return total
+
+    def filter(self, users_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Returns `(new_users, duplicates)`, the latter with a `reason` column.
+        A user is dropped when an earlier kept user of the file has its CPF or
+        email, so the result does not depend on how the file is chunked.
+        """
+
+        cpfs = _cpf_keys(users_df["cpf"])
+        emails = _email_keys(users_df["email"])
+        in_database_cpfs = self._database_cpfs.contains(cpfs)
+        in_database_emails = self._database_emails.contains(emails)
+        duplicate_cpfs = self._file_cpfs.contains(cpfs)
+        duplicate_emails = self._file_emails.contains(emails)
+
+        # Rows sharing a key inside the chunk depend on which earlier ones are
+        # kept, e.g. (cpf1, a), (cpf2, a), (cpf2, c) keeps the first and the
+        # last: decided in order, only for those rows
+        repeated = (pd.Series(cpfs).duplicated(keep=False) | pd.Series(emails).duplicated(keep=False)).to_numpy()
+        kept_cpfs, kept_emails = set(), set()
+        for i in np.flatnonzero(repeated):
+            duplicate_cpfs[i] |= cpfs[i] in kept_cpfs
+            duplicate_emails[i] |= emails[i] in kept_emails
+            if not (in_database_cpfs[i] or in_database_emails[i] or duplicate_cpfs[i] or duplicate_emails[i]):
+                kept_cpfs.add(cpfs[i])
+                kept_emails.add(emails[i])
+
+        problems = pd.DataFrame({
+            "cpf already in database": in_database_cpfs,
+            "email already in database": in_database_emails,
+            "duplicate cpf in file": duplicate_cpfs,
+            "duplicate email in file": duplicate_emails,
+        }, index=users_df.index)
+        is_new = ~problems.any(axis=1)
+
+        self._file_cpfs.add(cpfs[is_new.to_numpy()])
+        self._file_emails.add(emails[is_new.to_numpy()])
+
+        duplicates = users_df.loc[~is_new].copy()
+        duplicate_problems = problems.loc[~is_new]
+        duplicates["reason"] = duplicate_problems.dot(duplicate_problems.columns + ", ").str.rstrip(", ")
+        for reason, count in duplicates["reason"].value_counts().items():
+            self.dropped[reason] = self.dropped.get(reason, 0) + count
+
+        return users_df.loc[is_new], duplicates
+
+    def report(self) -> str:
+        lines = [
+            f"{sum(self.dropped.values())} duplicated users not uploaded "
+            f"({len(self._file_cpfs)} unique users in file, {len(self._database_cpfs)} preloaded from the database)"
+        ]
+        lines += [f"  {count:>8} x {reason}" for reason, count in sorted(self.dropped.items(), key=lambda item: -item[1])]
+        return "\n".join(lines)
+
+
+################################################################################
+#### Private functions
+
+def _cpf_keys(cpfs: pd.Series) -> np.ndarray:
+    # The cleaning guarantees 11 digits, which fit in 64 bits
+    return cpfs.astype("int64").to_numpy().astype(np.uint64)
+
+def _email_keys(emails: pd.Series) -> np.ndarray:
+    normalized = emails.astype(str).str.strip().str.lower()
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
@@ -0,0 +1,134 @@
+from dataclasses import dataclass, field
+import time
+from typing import IO, Callable, Iterator, Literal, Optional
+import pandas as pd
+from checkpoint import Checkpoint
+from cleaning import COLUMNS_TO_LOOK_FOR, clean_and_transform_dataframe
+
+try:
+    import resource # Not available on Windows
+except ImportError:
+    resource = None
+
+# Only the columns the cleaning can use are parsed, everything else is skipped by the reader
+COLUMNS_TO_READ = {col for csv_cols_options in COLUMNS_TO_LOOK_FOR.values() for col in csv_cols_options}
+
+
+@dataclass
+class PipelineStats:
+    rows_read: int = 0
+    rows_valid: int = 0
+    rows_rejected: int = 0
+    chunks: int = 0
+    rows_resumed: int = 0 # Rows skipped because a previous run already uploaded them
+    started_at: float = field(default_factory=time.perf_counter)
+    reject_reasons: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return self.rows_read / elapsed if elapsed > 0 else 0.0
+
+    def add_rejects(self, rejects: pd.DataFrame) -> None:
+        self.add_reject_reasons(rejects["reason"].value_counts().to_dict())
+
+    def add_reject_reasons(self, reject_reasons: dict[str, int]) -> None:
+        for reason, count in reject_reasons.items():
+            self.rows_rejected += count
+            self.reject_reasons[reason] = self.reject_reasons.get(reason, 0) + count
+
+    def report(self) -> str:
+        lines = [
+            f"Resumed after {self.rows_resumed} rows already imported" if self.rows_resumed else "Started from the first row",
+            f"{self.rows_read} rows read in {self.chunks} chunk(s) at {self.rows_per_second:,.0f} rows/s",
+            f"{self.rows_valid} valid users, {self.rows_rejected} rows skipped",
+            f"Peak memory (RSS): {_peak_rss_mb()}",
+        ]
+        lines += [f"  {count:>8} x {reason}" for reason, count in sorted(self.reject_reasons.items(), key=lambda item: -item[1])]
+        return "\n".join(lines)
+
+
+def read_raw_chunks(filepath: str | IO[bytes],
+                    chunksize: Optional[int],
+                    encoding: Literal['latin1', 'ISO-8859-1', 'Windows-1252'] = 'latin1',
+                    sep: str = ';',
+                    skip_rows: int = 0
+                    ) -> Iterator[pd.DataFrame]:
+    """
+    Yields the raw table `chunksize` rows at a time (the whole file at once
+    when `chunksize` is None), starting after the first `skip_rows` data
+    rows. Columns are read as text: CPFs and telephones keep their leading
+    zeros and no float conversion happens.
+    """
+
+    reader = pd.read_csv(
+        filepath,
+        encoding=encoding,
+        sep=sep,
+        usecols=lambda col: col.lower().strip() in COLUMNS_TO_READ,
+        dtype=str,
+        # Skipped rows are only tokenized (quotes respected), never parsed into columns
+        skiprows=range(1, skip_rows + 1) if skip_rows else None,
+        chunksize=chunksize
+    )
+    if chunksize is None:
+        yield reader
+        return
+
+    with reader:
+        yield from reader
+
+
+def run_pipeline(filepath: str,
+                 file_type: Literal["big", "small"],
+                 chunksize: Optional[int],
+                 upload: Callable[[pd.DataFrame], None],
+                 checkpoint: Optional[Checkpoint] = None,
+                 checkpoint_path: Optional[str] = None
+                 ) -> PipelineStats:
+    """
+    Reads, cleans and uploads one chunk before reading the next, so the
+    memory used is bounded by `chunksize` and not by the file size.
+
+    With a `checkpoint`, the rows it already covers are skipped and it is
+    saved to `checkpoint_path` after every uploaded chunk. If `upload`
+    raises, the checkpoint still points at the end of the last good chunk.
+    """
+
+    stats = PipelineStats()
+    skip_rows = checkpoint.rows_done if checkpoint else 0
+    stats.rows_resumed = skip_rows
+
+    for df_raw in read_raw_chunks(filepath, chunksize, skip_rows=skip_rows):
+        df_processed, df_rejects = clean_and_transform_dataframe(df_raw, file_type)
+        stats.chunks += 1
+        stats.rows_read += len(df_raw)
+        stats.rows_valid += len(df_processed)
+        stats.add_rejects(df_rejects)
+        del df_raw, df_rejects
+
+        if not df_processed.empty:
+            upload(df_processed)
+
+        if checkpoint:
+            checkpoint.rows_done = skip_rows + stats.rows_read
+            checkpoint.byte_offset = None
+            checkpoint.chunks_done += 1
+            checkpoint.save(checkpoint_path)
+        print(f"Chunk {stats.chunks}: {stats.rows_read} rows read so far ({stats.rows_per_second:,.0f} rows/s)")
+
+    if checkpoint:
+        checkpoint.completed = True
+        checkpoint.save(checkpoint_path)
+    return stats
+
+
+def _peak_rss_mb() -> str:
+    if resource is None:
+        return "n/a"
+    # ru_maxrss is in KB on Linux
+    peak = f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:,.1f} MB"
+    children_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if children_peak:
+        peak += f" (largest worker process: {children_peak / 1024:,.1f} MB)"
+    return peak
@@ -0,0 +1,192 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import random
+import threading
+import time
+from typing import Iterator, Optional
+import pandas as pd
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import OperationFailure
+
+# Users are identified by CPF: it is validated by the cleaning and always
+# present, so re-running an import updates the same rows instead of duplicating.
+UPSERT_KEY = "cpf"
+# "MM-DD" of birth_date, the indexed birthday key of the email server. MongoDB
+# stores it like any field, Postgres computes it (generated column).
+BIRTH_MMDD_FIELD = "birth_mmdd"
+
+
+@dataclass
+class LoadStats:
+    batches: int = 0
+    failed_batches: int = 0
+    rows_written: int = 0
+    rows_failed: int = 0
+    retries: int = 0
+    busy_seconds: float = 0.0 # Wall time spent inside `load` calls
+    batch_latencies: list[float] = field(default_factory=list)
+
+    def report(self) -> str:
+        latencies = sorted(self.batch_latencies)
+        if latencies:
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            latency = f"batch latency p50 {p50 * 1000:,.0f} ms, p99 {p99 * 1000:,.0f} ms, max {latencies[-1] * 1000:,.0f} ms"
+        else:
+            latency = "no batch sent"
+        rows_per_second = self.rows_written / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+        return "\n".join([
+            f"{self.rows_written} rows upserted in {self.batches} batch(es) at {rows_per_second:,.0f} rows/s ({latency})",
+            f"{self.failed_batches} batch(es) / {self.rows_failed} rows failed after retries, {self.retries} retries",
+        ])
+
+
+class BulkLoader(ABC):
+    """
+    Upserts a users DataFrame in `batch_size` records batches, sending up to
+    `workers` batches at once. A failed batch is retried `max_retries` times
+    with exponential backoff; since writes are upserts a retry never duplicates.
+    Instances are the `upload` callback of `ingestion.run_pipeline`: `load`
+    raises if any batch is still failing, so that chunk is not checkpointed.
+    """
+
+    def __init__(self, batch_size: int, workers: int, max_retries: int, retry_base_delay: float = 1.0):
+        self._batch_size = batch_size
+        self._workers = workers
+        self._max_retries = max_retries
+        self._retry_base_delay = retry_base_delay
+        self._stats_lock = threading.Lock()
+        self.stats = LoadStats()
+
+    def __call__(self, users_df: pd.DataFrame) -> None:
+        self.load(users_df)
+
+    def load(self, users_df: pd.DataFrame) -> None:
+        started_at = time.perf_counter()
+        failed_batches_before = self.stats.failed_batches
+        # A batch can't touch the same key twice (Postgres refuses it), keep the last one
+        records = users_df.drop_duplicates(UPSERT_KEY, keep="last").to_dict(orient="records")
+
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            # list() propagates unexpected exceptions raised in the workers
+            list(executor.map(self._load_batch, _batches(records, self._batch_size)))
+
+        self.stats.busy_seconds += time.perf_counter() - started_at
+        failed_batches = self.stats.failed_batches - failed_batches_before
+        if failed_batches:
+            raise RuntimeError(f"{failed_batches} batch(es) of this chunk failed after {self._max_retries} retries.")
+
+    @abstractmethod
+    def fetch_existing_keys(self, page_size: int) -> Iterator[pd.DataFrame]:
+        """Yields the `cpf` and `email` of every user already in the database, `page_size` at a time."""
+        pass
+
+    ############################################################################
+    #### Private functions
+
+    @abstractmethod
+    def _write_batch(self, batch: list[dict]) -> None:
+        """Upserts `batch` by UPSERT_KEY. Raises on failure."""
+        pass
+
+    def _load_batch(self, batch: list[dict]) -> None:
+        started_at = time.perf_counter()
+        for attempt in range(self._max_retries + 1):
+            try:
+                self._write_batch(batch)
+                break
+            except Exception as e:
+                if attempt == self._max_retries:
+                    print(f"Batch of {len(batch)} users failed after {attempt + 1} attempts: {e}")
+                    with self._stats_lock:
+                        self.stats.failed_batches += 1
+                        self.stats.rows_failed += len(batch)
+                    return
+                with self._stats_lock:
+                    self.stats.retries += 1
+                # Full jitter, so batches failing together don't retry together
+                time.sleep(random.uniform(0, self._retry_base_delay * 2 ** attempt))
+
+        latency = time.perf_counter() - started_at
+        with self._stats_lock:
+            self.stats.batches += 1
+            self.stats.rows_written += len(batch)
+            self.stats.batch_latencies.append(latency)
+
+
+class SupabaseBulkLoader(BulkLoader):
+    """
+    `INSERT ... ON CONFLICT (cpf) DO UPDATE` through PostgREST. Requires a
+    unique constraint on users.cpf.
+    """
+
+    def __init__(self, supabase_client, batch_size: int, workers: int, max_retries: int, retry_base_delay: float = 1.0):
+        super().__init__(batch_size, workers, max_retries, retry_base_delay)
+        self._users_table = supabase_client.table('users')
+
+    def fetch_existing_keys(self, page_size: int) -> Iterator[pd.DataFrame]:
+        # Keyset pagination on cpf: each page is an index range scan, unlike offset
+        last_cpf: Optional[str] = None
+        while True:
+            query = self._users_table.select("cpf,email").order("cpf").limit(page_size)
+            if last_cpf is not None:
+                query = query.gt("cpf", last_cpf)
+            rows = query.execute().data
+            if not rows:
+                return
+            yield pd.DataFrame(rows, columns=["cpf", "email"], dtype=object)
+            if len(rows) < page_size:
+                return
+            last_cpf = rows[-1]["cpf"]
+
+    def _write_batch(self, batch: list[dict]) -> None:
+        self._users_table.upsert(batch, on_conflict=UPSERT_KEY, returning="minimal").execute()
+
+
+class MongoBulkLoader(BulkLoader):
+    """
+    Unordered `bulk_write` of upserts keyed by cpf: one bad document does not
+    stop the rest of the batch. An index on users.cpf keeps the upserts cheap.
+    Also writes the birth_mmdd key that the server's birthday campaigns query.
+    """
+
+    def __init__(self, mongo_client, db_name: str, batch_size: int, workers: int, max_retries: int, retry_base_delay: float = 1.0):
+        super().__init__(batch_size, workers, max_retries, retry_base_delay)
+        self._users_collection = mongo_client[db_name]['users']
+        # Same specs as the server's MongoDBRepository: a different spec on the
+        # same key would make one of them fail with IndexKeySpecsConflict
+        try:
+            self._users_collection.create_index([(UPSERT_KEY, ASCENDING)], unique=True)
+        except OperationFailure as e:
+            # Existing duplicates (or the plain index the server falls back to)
+            print(f"Warning: could not create a unique index on users.{UPSERT_KEY} ({e}), creating a plain one.")
+            self._users_collection.create_index([(UPSERT_KEY, ASCENDING)])
+        self._users_collection.create_index([(BIRTH_MMDD_FIELD, ASCENDING)])
+
+    def fetch_existing_keys(self, page_size: int) -> Iterator[pd.DataFrame]:
+        cursor = self._users_collection.find({}, {"cpf": 1, "email": 1, "_id": 0}, batch_size=page_size)
+        page = []
+        for user in cursor:
+            page.append(user)
+            if len(page) == page_size:
+                yield pd.DataFrame(page, columns=["cpf", "email"], dtype=object)
+                page = []
+        if page:
+            yield pd.DataFrame(page, columns=["cpf", "email"], dtype=object)
+
+    def _write_batch(self, batch: list[dict]) -> None:
+        self._users_collection.bulk_write(
+            [UpdateOne({UPSERT_KEY: user[UPSERT_KEY]}, {"$set": _with_birth_mmdd(user)}, upsert=True) for user in batch],
+            ordered=False
+        )
+
+
+def _with_birth_mmdd(user: dict) -> dict:
+    # birth_date is an ISO "YYYY-MM-DD" string after the cleaning
+    return {**user, BIRTH_MMDD_FIELD: user["birth_date"][5:]}
+
+def _batches(records: list[dict], batch_size: int) -> Iterator[list[dict]]:
+    for start in range(0, len(records), batch_size):
+        yield records[start:start + batch_size]
@@ -1,19 +1,29 @@
-import asyncio
-import datetime
-from typing import Any, Literal
-import numpy as np
+import argparse
+import os
+from typing import Literal
 import pandas as pd
+from pymongo import MongoClient
+from supabase import create_client
 # import matplotlib
 from global_env_vars import (
     DATABASE_TYPE, 
     MONGO_DB_NAME, MONGO_URI, 
     SUPABASE_SECRET_KEY, SUPABASE_URL
 )
-from db.mongodb_repository import MongoDbRepository
-from db.supabase_repository import SupabaseRepository
+from checkpoint import Checkpoint, file_sha256
+from dedup import DedupIndex
+from columnar_cache import ParquetCacheWriter, cache_path_for, run_cached_pipeline
+from ingestion import run_pipeline
+from parallel_ingestion import run_parallel_pipeline
+from loader import BulkLoader, MongoBulkLoader, SupabaseBulkLoader
 
 BIG_FILE_PATH = 'sensitive_data/big_PACIENTES.csv'
 SMALL_FILE_PATH = 'sensitive_data/small_PACIENTES.csv'
+DEFAULT_CHUNKSIZE = 50_000
+DEFAULT_BATCH_SIZE = 1_000
+DEFAULT_UPLOAD_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_PRELOAD_PAGE_SIZE = 10_000
 
 ################################################################################
 #### Observando os datasets
@@ -35,151 +45,120 @@ def plot_columns_names(filepath: str,
     except Exception as e:
         print(f"Erro ao ler o arquivo {filepath}: {e}\n")
 
-plot_columns_names(big_file)
-plot_columns_names(small_file)
-
-################################################################################
-#### Escolhendo colunas e limpando as linhas
-
-COLUMNS_TO_LOOK_FOR = {
-    "client_full_name": ["nome", "nomecivil"],
-    "birth_date": ["datanascimento"],
-    "email": ["email"],
-    "telephone": ["telefone_1", "telefone_2", "telefone_3", "telefone_4"], # Prioritizing multiple telephone columns
-    "cpf": ["cpf"],
-}
-
-def clean_and_transform_dataframe(df: pd.DataFrame, file_type: Literal["big", "small"]) -> pd.DataFrame:
-    processed_users = []
-    
-    column_mappings = COLUMNS_TO_LOOK_FOR
-    df.columns = [col.lower().strip() for col in df.columns]
-
-    for index, row in df.iterrows():
-        user_data: dict[str, Any] = {}
-        missing_essential_fields = False
-        
-        for user_field, csv_cols_options in column_mappings.items():
-            found_value = None
-            for col_name_option in csv_cols_options:
-                if col_name_option in row and pd.notna(row[col_name_option]):
-                    found_value = row[col_name_option]
-                    break
-            
-            if user_field == "birth_date":
-                if found_value:
-                    try:
-                        # Attempt DD/MM/YYYY first, then YYYY-MM-DD
-                        if isinstance(found_value, str):
-                            if '/' in found_value:
-                                user_data[user_field] = datetime.strptime(found_value, "%d/%m/%Y").date().isoformat()
-                            elif '-' in found_value:
-                                user_data[user_field] = datetime.strptime(found_value, "%Y-%m-%d").date().isoformat()
-                            else:
-                                user_data[user_field] = None
-                        elif isinstance(found_value, datetime):
-                            user_data[user_field] = found_value.date().isoformat()
-                        else:
-                            user_data[user_field] = None
-                    except ValueError:
-                        user_data[user_field] = None
-                        print(f"Warning: Row {index} - Could not parse birth_date '{found_value}'. Setting to None.")
-                else:
-                    user_data[user_field] = None
-
-            elif user_field == "telephone":
-                if found_value:
-                    phone_str = str(found_value).strip()
-                    if phone_str.startswith('+'):
-                        phone_str = '+' + ''.join(filter(str.isdigit, phone_str))
-                    else:
-                        phone_str = ''.join(filter(str.isdigit, phone_str))
-                    
-                    user_data[user_field] = phone_str if phone_str else None
-                else:
-                    user_data[user_field] = None
-
-            elif user_field == "cpf":
-                if found_value:
-                    cpf_str = str(found_value).replace(".", "").replace("-", "").strip()
-                    if not cpf_str.isdigit() or len(cpf_str) != 11:
-                        user_data[user_field] = None
-                        print(f"Warning: Row {index} - Invalid CPF format '{found_value}'. Setting to None.")
-                    else:
-                        user_data[user_field] = cpf_str
-                else:
-                    user_data[user_field] = None
-            
-            elif found_value is not None:
-                user_data[user_field] = str(found_value).strip()
-            else:
-                user_data[user_field] = None
-
-        if not user_data.get("client_full_name") or \
-           not user_data.get("birth_date") or \
-           not user_data.get("email") or \
-           not user_data.get("cpf"):
-            missing_essential_fields = True
-            print(f"Skipping row {index} due to missing essential data: {user_data}")
-
-        if not missing_essential_fields:
-            processed_users.append(user_data)
-
-    return pd.DataFrame(processed_users)
-
 ################################################################################
 #### Colocando no banco e dados
 
+def create_loader(database_type: str, batch_size: int, workers: int, max_retries: int) -> BulkLoader:
+    if database_type in ("mongodb", "mongo"):
+        print("Using MongoDB for user and email repositories.")
+        return MongoBulkLoader(MongoClient(MONGO_URI), MONGO_DB_NAME, batch_size, workers, max_retries)
+    if database_type == "supabase":
+        print("Using Supabase for user and email repositories.")
+        return SupabaseBulkLoader(create_client(SUPABASE_URL, SUPABASE_SECRET_KEY), batch_size, workers, max_retries)
+    raise ValueError("Invalid DATABASE_TYPE specified in environment variables.")
 
-async def upload_to_supabase(users_df: pd.DataFrame, 
-                             supabase_client: SupabaseRepository
-                             ) -> None:
-    
-    assert supabase_client is not None, "Supabase client must be initialized."
+def resume_or_start_checkpoint(source_sha256: str,
+                               checkpoint_path: str,
+                               destination: str,
+                               source_format: str,
+                               restart: bool
+                               ) -> Checkpoint:
+    checkpoint = None if restart else Checkpoint.load(checkpoint_path)
+
+    if checkpoint and checkpoint.matches(source_sha256, destination, source_format):
+        print(f"Resuming from checkpoint {checkpoint_path}: {checkpoint.rows_done} rows already imported.")
+        return checkpoint
+    if checkpoint:
+        print(f"Checkpoint {checkpoint_path} is for another file, database or source, starting from the first row.")
+    return Checkpoint(source_sha256=source_sha256, destination=destination, source_format=source_format)
 
-    print(f"Attempting to upload {len(users_df)} users to Supabase...")
-    table_name = 'users'
-    users_data_list = users_df.to_dict(orient='records')
+################################################################################
+#### Execução
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cleans a patients CSV and uploads the users to the database.")
+    parser.add_argument("--file", default=BIG_FILE_PATH, help="CSV file to import.")
+    parser.add_argument("--file-type", choices=["big", "small"], default="big")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE,
+                        help="Rows read, cleaned and uploaded at a time. 0 loads the whole file at once.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes reading and cleaning the file. Above 1 the file is split in byte ranges, "
+                             "which needs a CSV without line breaks inside quoted fields.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Users per upsert request.")
+    parser.add_argument("--upload-workers", type=int, default=DEFAULT_UPLOAD_WORKERS, help="Batches uploaded at once.")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help="Retries of a failed batch.")
+    parser.add_argument("--checkpoint", default=None, help="Progress file, defaults to <file>.checkpoint.json.")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and import from the first row.")
+    parser.add_argument("--database-type", choices=["supabase", "mongodb", "mongo"], default=DATABASE_TYPE,
+                        help="Overrides DATABASE_TYPE, e.g. to upload the cached users to another database.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Parse and clean the CSV even if a Parquet cache of it exists, and don't write one.")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Upload every cleaned user, even if its CPF or email was already seen in the file.")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="Preload the CPFs and emails already in the database and don't upload those users.")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Read and clean (filling the cache) without uploading nor checkpointing.")
+    parser.add_argument("--show-columns", action="store_true", help="Only print the CSV headers.")
+    args = parser.parse_args()
+
+    if args.show_columns:
+        plot_columns_names(args.file)
+        raise SystemExit(0)
+
+    source_sha256 = file_sha256(args.file)
+    cache_path = cache_path_for(source_sha256, args.file_type)
+    use_cache = not args.no_cache and os.path.exists(cache_path)
+    chunksize = args.chunksize or None
+
+    if args.dry_run:
+        print("Dry run: nothing will be uploaded.")
+        checkpoint, checkpoint_path, loader = None, None, None
+        upload = lambda users_df: None
+    else:
+        checkpoint_path = args.checkpoint or f"{args.file}.checkpoint.json"
+        checkpoint = resume_or_start_checkpoint(source_sha256, checkpoint_path, args.database_type,
+                                                "parquet" if use_cache else "csv", args.restart)
+        if checkpoint.completed:
+            print(f"{args.file} was already fully imported. Use --restart to import it again.")
+            raise SystemExit(0)
+        loader = create_loader(args.database_type, args.batch_size, args.upload_workers, args.max_retries)
+        upload = loader
+
+    dedup_index = None
+    if not args.no_dedup:
+        dedup_index = DedupIndex()
+        if args.skip_existing and loader:
+            preloaded = dedup_index.preload(loader.fetch_existing_keys(DEFAULT_PRELOAD_PAGE_SIZE))
+            print(f"{preloaded} users already in the database preloaded in the dedup index.")
+        upload = dedup_index.wrap(upload)
+
+    # The cache is only complete when the CSV is read from the first row
+    cache_writer = None
+    if not use_cache and not args.no_cache and not (checkpoint and checkpoint.rows_done):
+        cache_writer = ParquetCacheWriter(cache_path)
+        upload = cache_writer.wrap(upload)
 
     try:
-        response = await supabase_client.table(table_name).insert(users_data_list).execute()
-        if response.error:
-            print(f"Error uploading to Supabase: {response.error.message}")
+        if use_cache:
+            print(f"Reading the users already cleaned in {cache_path}.")
+            stats = run_cached_pipeline(cache_path, chunksize, upload, checkpoint, checkpoint_path)
+        elif args.workers > 1:
+            stats = run_parallel_pipeline(args.file, args.file_type, chunksize, upload,
+                                          args.workers, checkpoint, checkpoint_path)
         else:
-            print(f"Successfully uploaded {len(response.data)} users to Supabase.")
-    except Exception as e:
-        print(f"Unexpected error during Supabase upload: {e}")
-
-def upload_to_mongodb(users_df: pd.DataFrame, 
-                      mongo_client: MongoDbRepository
-                      ) -> None:
-    
-    assert mongo_client is not None, "MongoDB client must be initialized."
-
-    print(f"Attempting to upload {len(users_df)} users to MongoDB...")
-    db = mongo_client[MONGO_DB_NAME]
-    collection = db['users']
-    users_data_list = users_df.to_dict(orient='records')
-
-    try:
-        result = collection.insert_many(users_data_list)
-        print(f"Successfully uploaded {len(result.inserted_ids)} users to MongoDB.")
-    except Exception as e:
-        print(f"Unexpected error during MongoDB upload: {e}")
-
-
-if DATABASE_TYPE == "mongo":
-    user_repository = MongoDbRepository(MONGO_URI, MONGO_DB_NAME)
-    print("Using MongoDB for user and email repositories.")
-elif DATABASE_TYPE == "supabase":
-    user_repository = SupabaseRepository(SUPABASE_URL, SUPABASE_SECRET_KEY)
-    print("Using Supabase for user and email repositories.")
-else:
-    raise ValueError("Invalid DATABASE_TYPE specified in environment variables.")
-
-df_raw = pd.read_csv(BIG_FILE_PATH, encoding='latin1', sep=';')
-df_processed = clean_and_transform_dataframe(df_raw.copy(), "big")
-
-asyncio.run(upload_to_supabase(df_processed, supabase_client=user_repository))
-# upload_to_mongodb(df_processed, mongo_client=user_repository)
-
+            stats = run_pipeline(args.file, args.file_type, chunksize, upload, checkpoint, checkpoint_path)
+    except BaseException:
+        if cache_writer:
+            cache_writer.abort()
+        raise
+    finally:
+        if loader:
+            print(loader.stats.report())
+
+    if cache_writer:
+        cache_writer.finish(stats)
+        print(f"Cleaned users cached in {cache_path}.")
+    print(stats.report())
+    if dedup_index:
+        print(dedup_index.report())
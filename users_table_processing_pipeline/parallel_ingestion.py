@@ -0,0 +1,140 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import io
+import os
+from typing import Callable, Iterator, Literal, Optional
+import pandas as pd
+from checkpoint import Checkpoint
+from cleaning import clean_and_transform_dataframe
+from ingestion import PipelineStats, read_raw_chunks
+
+SAMPLE_BYTES = 1024 * 1024 # Used to estimate the average row size
+MIN_PARTITION_BYTES = 1024 * 1024
+
+
+def plan_partitions(filepath: str,
+                    start_offset: Optional[int],
+                    partition_bytes: int
+                    ) -> tuple[bytes, list[tuple[int, int]]]:
+    """
+    Splits the file after the header (or after `start_offset`) into
+    `[start, end)` byte ranges of about `partition_bytes`, every range ending
+    right after a newline. Returns the header line and the ranges.
+
+    A boundary is the first newline after the target offset, so this is only
+    correct for CSVs without line breaks inside quoted fields. Use the
+    sequential mode for those.
+    """
+
+    file_size = os.path.getsize(filepath)
+    with open(filepath, "rb") as f:
+        header = f.readline()
+        start = max(start_offset or 0, len(header))
+
+        partitions = []
+        while start < file_size:
+            f.seek(min(start + partition_bytes, file_size))
+            f.readline() # Moves to the end of the line the target offset fell in
+            end = min(f.tell(), file_size)
+            partitions.append((start, end))
+            start = end
+
+    return header, partitions
+
+
+def estimate_partition_bytes(filepath: str, rows_per_partition: int) -> int:
+    with open(filepath, "rb") as f:
+        f.readline()
+        sample = f.read(SAMPLE_BYTES)
+    avg_row_bytes = len(sample) / max(sample.count(b"\n"), 1)
+    return max(int(avg_row_bytes * rows_per_partition), MIN_PARTITION_BYTES)
+
+
+def run_parallel_pipeline(filepath: str,
+                          file_type: Literal["big", "small"],
+                          chunksize: Optional[int],
+                          upload: Callable[[pd.DataFrame], None],
+                          workers: int,
+                          checkpoint: Optional[Checkpoint] = None,
+                          checkpoint_path: Optional[str] = None
+                          ) -> PipelineStats:
+    """
+    Same contract as `ingestion.run_pipeline`, but partitions of about
+    `chunksize` rows are read and cleaned by `workers` processes while this
+    process uploads the results, in file order. At most `2 * workers`
+    partitions are in flight, so memory stays bounded by `chunksize`.
+    """
+
+    if checkpoint and checkpoint.rows_done and checkpoint.byte_offset is None:
+        raise ValueError("This checkpoint was written by the sequential mode, resume it with --workers 1.")
+
+    stats = PipelineStats()
+    stats.rows_resumed = checkpoint.rows_done if checkpoint else 0
+
+    if chunksize:
+        partition_bytes = estimate_partition_bytes(filepath, chunksize)
+    else:
+        partition_bytes = max(os.path.getsize(filepath) // workers + 1, MIN_PARTITION_BYTES)
+    header, partitions = plan_partitions(filepath, checkpoint.byte_offset if checkpoint else None, partition_bytes)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = _submit_in_order(executor, filepath, header, partitions, file_type, max_in_flight=2 * workers)
+        for (_, end), (rows_read, df_processed, reject_reasons) in zip(partitions, results):
+            stats.chunks += 1
+            stats.rows_read += rows_read
+            stats.rows_valid += len(df_processed)
+            stats.add_reject_reasons(reject_reasons)
+
+            if not df_processed.empty:
+                upload(df_processed)
+            del df_processed
+
+            if checkpoint:
+                checkpoint.rows_done = stats.rows_resumed + stats.rows_read
+                checkpoint.byte_offset = end
+                checkpoint.chunks_done += 1
+                checkpoint.save(checkpoint_path)
+            print(f"Partition {stats.chunks}/{len(partitions)}: {stats.rows_read} rows read so far ({stats.rows_per_second:,.0f} rows/s)")
+
+    if checkpoint:
+        checkpoint.completed = True
+        checkpoint.save(checkpoint_path)
+    return stats
+
+
+################################################################################
+#### Private functions
+
+def _submit_in_order(executor: ProcessPoolExecutor,
+                     filepath: str,
+                     header: bytes,
+                     partitions: list[tuple[int, int]],
+                     file_type: Literal["big", "small"],
+                     max_in_flight: int
+                     ) -> Iterator[tuple[int, pd.DataFrame, dict[str, int]]]:
+    # Unlike executor.map, never submits more than `max_in_flight` partitions
+    # ahead of the consumer, so a slow upload doesn't pile results in memory.
+    in_flight: deque[Future] = deque()
+    for start, end in partitions:
+        in_flight.append(executor.submit(_clean_partition, filepath, header, start, end, file_type))
+        if len(in_flight) >= max_in_flight:
+            yield in_flight.popleft().result()
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def _clean_partition(filepath: str,
+                     header: bytes,
+                     start: int,
+                     end: int,
+                     file_type: Literal["big", "small"]
+                     ) -> tuple[int, pd.DataFrame, dict[str, int]]:
+    # Runs in a worker process. Only the valid users and the reject counts
+    # are sent back, the raw rows never cross the process boundary.
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    df_raw = next(read_raw_chunks(io.BytesIO(header + data), None))
+    df_processed, df_rejects = clean_and_transform_dataframe(df_raw, file_type)
+    return len(df_raw), df_processed, df_rejects["reason"].value_counts().to_dict()
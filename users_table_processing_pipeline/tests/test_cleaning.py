@@ -0,0 +1,120 @@
+from datetime import datetime
+import random
+from typing import Any
+import numpy as np
+import pandas as pd
+import pytest
+from cleaning import COLUMNS_TO_LOOK_FOR, clean_and_transform_dataframe
+
+
+def _original_clean_and_transform_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Row by row cleaning that lived in main.py before it was vectorized (with
+    its `import datetime` bug fixed), kept as the reference behavior.
+    """
+
+    processed_users = []
+    df.columns = [col.lower().strip() for col in df.columns]
+
+    for index, row in df.iterrows():
+        user_data: dict[str, Any] = {}
+
+        for user_field, csv_cols_options in COLUMNS_TO_LOOK_FOR.items():
+            found_value = None
+            for col_name_option in csv_cols_options:
+                if col_name_option in row and pd.notna(row[col_name_option]):
+                    found_value = row[col_name_option]
+                    break
+
+            if user_field == "birth_date":
+                user_data[user_field] = None
+                if found_value and isinstance(found_value, str):
+                    try:
+                        if '/' in found_value:
+                            user_data[user_field] = datetime.strptime(found_value, "%d/%m/%Y").date().isoformat()
+                        elif '-' in found_value:
+                            user_data[user_field] = datetime.strptime(found_value, "%Y-%m-%d").date().isoformat()
+                    except ValueError:
+                        pass
+            elif user_field == "telephone":
+                user_data[user_field] = None
+                if found_value:
+                    phone_str = str(found_value).strip()
+                    digits = ''.join(filter(str.isdigit, phone_str))
+                    phone_str = '+' + digits if phone_str.startswith('+') else digits
+                    user_data[user_field] = phone_str if phone_str else None
+            elif user_field == "cpf":
+                user_data[user_field] = None
+                if found_value:
+                    cpf_str = str(found_value).replace(".", "").replace("-", "").strip()
+                    if cpf_str.isdigit() and len(cpf_str) == 11:
+                        user_data[user_field] = cpf_str
+            elif found_value is not None:
+                user_data[user_field] = str(found_value).strip()
+            else:
+                user_data[user_field] = None
+
+        if all(user_data.get(field) for field in ("client_full_name", "birth_date", "email", "cpf")):
+            processed_users.append(user_data)
+
+    return pd.DataFrame(processed_users)
+
+
+def _random_birth_date(rng: random.Random) -> Any:
+    year = rng.choice([rng.randint(1900, 2010), rng.randint(1, 999)]) # Years below 1000 need zero padding
+    month, day = rng.randint(1, 12), rng.randint(1, 31) # Some invalid days, e.g. 31/02
+    return rng.choice([
+        f"{day:02d}/{month:02d}/{year:04d}",
+        f"{year:04d}-{month:02d}-{day:02d}",
+        f"{day}/{month}/{year}",
+        f"{year}-{month}-{day}",
+        f"{day:02d}.{month:02d}.{year:04d}",
+        "not a date", "", np.nan,
+    ])
+
+
+def _random_frame(rng: random.Random, rows: int) -> pd.DataFrame:
+    def maybe_missing(value: Any) -> Any:
+        return rng.choice([value] * 6 + ["", "  ", np.nan])
+
+    return pd.DataFrame({
+        "Nome": [maybe_missing(f" Person {i} ") for i in range(rows)],
+        "NomeCivil": [maybe_missing(f"Civil {i}") for i in range(rows)],
+        "DataNascimento": [_random_birth_date(rng) for _ in range(rows)],
+        "Email": [maybe_missing(f"person{i}@example.com ") for i in range(rows)],
+        "Telefone_1": [maybe_missing(rng.choice(["+55 (11) 91234-5678", "(11) 1234-5678", "abc"])) for _ in range(rows)],
+        "Telefone_2": [maybe_missing("11 99999-0000") for _ in range(rows)],
+        "CPF": [maybe_missing(rng.choice(["123.456.789-01", "12345678901", "1234", "123.456.789-0x"])) for _ in range(rows)],
+    })
+
+
+def _as_objects(df: pd.DataFrame) -> pd.DataFrame:
+    # A DataFrame built from dicts infers string columns with NaN for None
+    return df.astype(object).where(df.notna(), None)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_matches_the_original_row_by_row_cleaning(seed):
+    df = _random_frame(random.Random(seed), rows=30)
+
+    users, rejects = clean_and_transform_dataframe(df.copy(), "big")
+    expected = _original_clean_and_transform_dataframe(df.copy())
+
+    assert len(users) + len(rejects) == len(df)
+    if expected.empty:
+        # The original lost the columns when every row was rejected
+        assert users.empty
+    else:
+        pd.testing.assert_frame_equal(_as_objects(users), _as_objects(expected))
+
+
+def test_birth_dates_before_year_1000_are_zero_padded():
+    df = pd.DataFrame({
+        "nome": ["Person A", "Person B"],
+        "datanascimento": ["01/02/0990", "0001-01-01"],
+        "email": ["a@example.com", "b@example.com"],
+        "cpf": ["12345678901", "12345678902"],
+    })
+
+    users, _ = clean_and_transform_dataframe(df, "big")
+    assert users["birth_date"].tolist() == ["0990-02-01", "0001-01-01"]
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from dedup import DedupIndex
+
+
+def _users(rows: list[tuple[str, str]]) -> pd.DataFrame:
+    return pd.DataFrame({"cpf": [cpf for cpf, _ in rows], "email": [email for _, email in rows]})
+
+
+def _filter_in_chunks(users_df: pd.DataFrame, chunksize: int, dedup_index: DedupIndex = None) -> pd.DataFrame:
+    dedup_index = dedup_index or DedupIndex()
+    kept = [dedup_index.filter(users_df.iloc[start:start + chunksize])[0] for start in range(0, len(users_df), chunksize)]
+    return pd.concat(kept)
+
+
+def test_a_user_is_only_dropped_by_an_earlier_kept_user():
+    users_df = _users([("00000000001", "a@x.com"), ("00000000002", "A@x.com "), ("00000000002", "c@x.com")])
+
+    new_users, duplicates = DedupIndex().filter(users_df)
+    # The second row is dropped, so its CPF does not drop the third one
+    assert new_users.index.tolist() == [0, 2]
+    assert duplicates["reason"].tolist() == ["duplicate email in file"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_same_users_kept_at_any_chunk_size(seed):
+    rng = pd.Series(range(200)).sample(frac=1, random_state=seed).to_numpy()
+    users_df = _users([(f"{value % 97:011d}", f"user{value % 83}@example.com") for value in rng])
+
+    whole = _filter_in_chunks(users_df, len(users_df))
+    for chunksize in (1, 7):
+        pd.testing.assert_frame_equal(_filter_in_chunks(users_df, chunksize), whole)
+
+
+def test_database_duplicates_do_not_block_the_file_rows_after_them():
+    dedup_index = DedupIndex()
+    dedup_index.preload([_users([("00000000001", "db@x.com")])])
+    users_df = _users([("00000000001", "a@x.com"), ("00000000002", "a@x.com")])
+
+    new_users, duplicates = dedup_index.filter(users_df)
+    assert new_users.index.tolist() == [1]
+    assert duplicates["reason"].tolist() == ["cpf already in database"]
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+import parallel_ingestion
+from dedup import DedupIndex
+from ingestion import run_pipeline
+from parallel_ingestion import run_parallel_pipeline
+
+
+def write_patients_csv(path, rows: int) -> None:
+    """Small patients table with invalid rows and repeated CPFs/emails."""
+    pd.DataFrame({
+        "Nome": [f"Paciente {i}" for i in range(rows)],
+        "DataNascimento": [f"{i % 28 + 1:02d}/{i % 12 + 1:02d}/19{i % 90 + 10}" if i % 13 else "invalida" for i in range(rows)],
+        "Email": [f"paciente{i % 150}@example.com" if i % 17 else "" for i in range(rows)],
+        "Telefone_1": [f"(11) 9{i:08d}" if i % 3 else "" for i in range(rows)],
+        "CPF": [f"{i % 180:011d}" for i in range(rows)],
+    }).to_csv(path, sep=";", index=False, encoding="latin1")
+
+
+def collect(run) -> tuple[pd.DataFrame, object]:
+    uploaded = []
+    stats = run(uploaded.append)
+    users = pd.concat(uploaded, ignore_index=True) if uploaded else pd.DataFrame()
+    return users, stats
+
+
+@pytest.fixture
+def patients_csv(tmp_path, monkeypatch):
+    # Partitions of a few rows, so the small file is split across the workers
+    monkeypatch.setattr(parallel_ingestion, "MIN_PARTITION_BYTES", 1)
+    path = tmp_path / "patients.csv"
+    write_patients_csv(path, 500)
+    return str(path)
+
+
+@pytest.mark.parametrize("workers, chunksize", [(2, 37), (3, 1), (4, None)])
+def test_parallel_output_equals_the_sequential_output(patients_csv, workers, chunksize):
+    expected, expected_stats = collect(lambda upload: run_pipeline(patients_csv, "big", None, upload))
+    users, stats = collect(lambda upload: run_parallel_pipeline(patients_csv, "big", chunksize, upload, workers))
+
+    assert stats.chunks > 1
+    pd.testing.assert_frame_equal(users, expected)
+    assert (stats.rows_read, stats.rows_valid, stats.reject_reasons) == (
+        expected_stats.rows_read, expected_stats.rows_valid, expected_stats.reject_reasons
+    )
+
+
+@pytest.mark.parametrize("workers, chunksize", [(2, 7), (3, 1)])
+def test_parallel_dedup_keeps_the_same_users_as_the_sequential_one(patients_csv, workers, chunksize):
+    expected, _ = collect(lambda upload: run_pipeline(patients_csv, "big", None, DedupIndex().wrap(upload)))
+    users, _ = collect(lambda upload: run_parallel_pipeline(patients_csv, "big", chunksize, DedupIndex().wrap(upload), workers))
+
+    assert 0 < len(expected) < 180
+    pd.testing.assert_frame_equal(users, expected)